@@ -2,7 +2,6 @@
 
 
 try:
-    import importlib
     import time
     import os
     import re
@@ -16,11 +15,7 @@ try:
     sys.path.append(os.path.dirname(__file__))
     import pltfm_mgr_rpc
     from pltfm_mgr_rpc.ttypes import *
-
-    from thrift.transport import TSocket
-    from thrift.transport import TTransport
-    from thrift.protocol import TBinaryProtocol
-    from thrift.protocol import TMultiplexedProtocol
+    from pltfm_mgr_client import get_client
 
     from argparse import ArgumentParser
     from cStringIO import StringIO
@@ -69,10 +64,6 @@ product_dict = { "Montara"   : "Wedge100BF-32X-O-AC-F-BF",
                  "Upper MAV" : "Wedge100BF-65X-O-AC-F-BF"
                }
 
-thrift_server = 'localhost'
-transport = None
-pltfm_mgr = None
-
 EEPROM_SYMLINK = "/var/run/platform/eeprom/syseeprom"
 EEPROM_STATUS = "/var/run/platform/eeprom/status"
 
@@ -107,30 +98,9 @@ class board(eeprom_tlvinfo.TlvInfoDecoder):
                 raise RuntimeError("eeprom.py: Initialization failed")
             time.sleep(1)
 
-    def thrift_setup(self):
-        global thrift_server, transport, pltfm_mgr
-        transport = TSocket.TSocket(thrift_server, 9090)
-
-        transport = TTransport.TBufferedTransport(transport)
-        bprotocol = TBinaryProtocol.TBinaryProtocol(transport)
-
-        pltfm_mgr_client_module = importlib.import_module(".".join(["pltfm_mgr_rpc", "pltfm_mgr_rpc"]))
-        pltfm_mgr_protocol = TMultiplexedProtocol.TMultiplexedProtocol(bprotocol, "pltfm_mgr_rpc")
-        pltfm_mgr = pltfm_mgr_client_module.Client(pltfm_mgr_protocol)
-
-        transport.open()
-
-    def thrift_teardown(self):
-        global transport
-        transport.close()
-
     def eeprom_init(self):
-        global pltfm_mgr
-
         try:
-            self.thrift_setup()
-            eeprom = pltfm_mgr.pltfm_mgr_sys_eeprom_get()
-            self.thrift_teardown()
+            eeprom = get_client().call('pltfm_mgr_sys_eeprom_get')
         except:
             return False
 
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+
+try:
+    import os
+    import sys
+    import socket
+    import threading
+
+    sys.path.append(os.path.dirname(__file__))
+    from pltfm_mgr_rpc.pltfm_mgr_rpc import Client
+
+    from thrift.transport import TSocket
+    from thrift.transport import TTransport
+    from thrift.protocol import TBinaryProtocol
+    from thrift.protocol import TMultiplexedProtocol
+except ImportError as e:
+    raise ImportError (str(e) + "- required module not found")
+
+THRIFT_SERVER = 'localhost'
+THRIFT_PORT = 9090
+THRIFT_TIMEOUT_MS = 5000
+
+# Errors after which the connection is dropped and opened again
+CONNECTION_ERRORS = (TTransport.TTransportException, socket.error, EOFError)
+
+
+class PltfmMgrClient(object):
+    """
+    Persistent connection to the pltfm_mgr_rpc service of the platform manager.
+    The connection is opened on first use and reopened once when a call fails
+    on a broken connection, e.g. after a restart of the server.
+    """
+
+    def __init__(self, server=THRIFT_SERVER, port=THRIFT_PORT):
+        self.server = server
+        self.port = port
+        self.lock = threading.RLock()
+        self.transport = None
+        self.pltfm_mgr = None
+        self.pid = None
+
+    def _open(self):
+        sock = TSocket.TSocket(self.server, self.port)
+        sock.setTimeout(THRIFT_TIMEOUT_MS)
+
+        transport = TTransport.TBufferedTransport(sock)
+        bprotocol = TBinaryProtocol.TBinaryProtocol(transport)
+        pltfm_mgr_protocol = TMultiplexedProtocol.TMultiplexedProtocol(bprotocol, "pltfm_mgr_rpc")
+        pltfm_mgr = Client(pltfm_mgr_protocol)
+
+        transport.open()
+        self.transport = transport
+        self.pltfm_mgr = pltfm_mgr
+        self.pid = os.getpid()
+
+    def close(self):
+        with self.lock:
+            if self.transport is not None:
+                try:
+                    self.transport.close()
+                except CONNECTION_ERRORS:
+                    pass
+            self.transport = None
+            self.pltfm_mgr = None
+
+    def _get_pltfm_mgr(self):
+        # A connection inherited from the parent process can't be shared with it
+        if self.transport is not None and self.pid != os.getpid():
+            self.close()
+        if self.transport is None:
+            self._open()
+        return self.pltfm_mgr
+
+    def call(self, name, *args):
+        """
+        Call an RPC of pltfm_mgr_rpc, e.g. call('pltfm_mgr_qsfp_presence_get', 1)
+        """
+        with self.lock:
+            try:
+                return getattr(self._get_pltfm_mgr(), name)(*args)
+            except CONNECTION_ERRORS:
+                self.close()
+            return getattr(self._get_pltfm_mgr(), name)(*args)
+
+    def is_alive(self):
+        """
+        Check that the server answers on the connection
+        """
+        try:
+            self.call('pltfm_mgr_dummy', 0)
+        except Exception:
+            return False
+        return True
+
+    def call_many(self, name, ports, default=None):
+        """
+        Call a per port RPC for several ports over the connection.
+        Raises if the server can't be reached.
+        :return: A dict which maps every port to the result of the call, or to default if it failed
+        """
+        result = {}
+        with self.lock:
+            for port in ports:
+                try:
+                    result[port] = self.call(name, port)
+                except CONNECTION_ERRORS:
+                    raise
+                except Exception:
+                    result[port] = default
+        return result
+
+    def qsfp_presence_get_many(self, ports):
+        return self.call_many('pltfm_mgr_qsfp_presence_get', ports, False)
+
+    def qsfp_lpmode_get_many(self, ports):
+        return self.call_many('pltfm_mgr_qsfp_lpmode_get', ports, False)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Retrieves the client shared by all the plugins of the process
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = PltfmMgrClient()
+        return _client
@@ -3,47 +3,22 @@
 try:
     import os
     import sys
-    import importlib
 
     sys.path.append(os.path.dirname(__file__))
     import pltfm_mgr_rpc
     from pltfm_mgr_rpc.ttypes import *
-
-    from thrift.transport import TSocket
-    from thrift.transport import TTransport
-    from thrift.protocol import TBinaryProtocol
-    from thrift.protocol import TMultiplexedProtocol
+    from pltfm_mgr_client import get_client
 
     from sonic_psu.psu_base import PsuBase
 except ImportError as e:
     raise ImportError (str(e) + "- required module not found")
 
-thrift_server = 'localhost'
-transport = None
-pltfm_mgr = None
-
 class PsuUtil(PsuBase):
     """Platform-specific PSUutil class"""
 
     def __init__(self):
         PsuBase.__init__(self)
-
-    def thrift_setup(self):
-        global thrift_server, transport, pltfm_mgr
-        transport = TSocket.TSocket(thrift_server, 9090)
-
-        transport = TTransport.TBufferedTransport(transport)
-        bprotocol = TBinaryProtocol.TBinaryProtocol(transport)
-
-        pltfm_mgr_client_module = importlib.import_module(".".join(["pltfm_mgr_rpc", "pltfm_mgr_rpc"]))
-        pltfm_mgr_protocol = TMultiplexedProtocol.TMultiplexedProtocol(bprotocol, "pltfm_mgr_rpc")
-        pltfm_mgr = pltfm_mgr_client_module.Client(pltfm_mgr_protocol)
-
-        transport.open()
-
-    def thrift_teardown(self):
-        global transport
-        transport.close()
+        self.client = get_client()
 
     def get_num_psus(self):
         """
@@ -62,12 +37,8 @@ class PsuUtil(PsuBase):
         if index is None:
             return False
 
-        global pltfm_mgr
-
         try:
-           self.thrift_setup()
-           psu_info = pltfm_mgr.pltfm_mgr_pwr_supply_info_get(index)
-           self.thrift_teardown()
+            psu_info = self.client.call('pltfm_mgr_pwr_supply_info_get', index)
         except:
             return False
 
@@ -83,12 +54,8 @@ class PsuUtil(PsuBase):
         if index is None:
             return False
 
-        global pltfm_mgr
-
         try:
-	    self.thrift_setup()
-	    status = pltfm_mgr.pltfm_mgr_pwr_supply_present_get(index)
-	    self.thrift_teardown()
+            status = self.client.call('pltfm_mgr_pwr_supply_present_get', index)
         except:
             return False
 
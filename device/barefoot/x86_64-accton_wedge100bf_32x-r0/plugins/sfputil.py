@@ -3,26 +3,17 @@
 try:
     import os
     import sys
-    import importlib
     import time
 
     sys.path.append(os.path.dirname(__file__))
     import pltfm_mgr_rpc
     from pltfm_mgr_rpc.ttypes import *
-
-    from thrift.transport import TSocket
-    from thrift.transport import TTransport
-    from thrift.protocol import TBinaryProtocol
-    from thrift.protocol import TMultiplexedProtocol
+    from pltfm_mgr_client import get_client
 
     from sonic_sfp.sfputilbase import SfpUtilBase
 except ImportError as e:
     raise ImportError (str(e) + "- required module not found")
 
-thrift_server = 'localhost'
-transport = None
-pltfm_mgr = None
-
 SFP_EEPROM_CACHE = "/var/run/platform/sfp/cache"
 
 class SfpUtil(SfpUtilBase):
@@ -61,6 +52,7 @@ class SfpUtil(SfpUtilBase):
         self.phy_port_dict = {'-1': 'system_not_ready'}
         self.phy_port_cur_state = {}
         self.qsfp_interval = self.QSFP_CHECK_INTERVAL
+        self.client = get_client()
 
         if not os.path.exists(os.path.dirname(SFP_EEPROM_CACHE)):
             try:
@@ -74,31 +66,10 @@ class SfpUtil(SfpUtilBase):
         SfpUtilBase.__init__(self)
 
     def update_port_info(self):
-        global pltfm_mgr
-
         if self.QSFP_PORT_END == 0:
-            self.thrift_setup()
-            self.QSFP_PORT_END = pltfm_mgr.pltfm_mgr_qsfp_get_max_port();
+            self.QSFP_PORT_END = self.client.call('pltfm_mgr_qsfp_get_max_port')
             self.PORT_END = self.QSFP_PORT_END
             self.PORTS_IN_BLOCK = self.QSFP_PORT_END
-            self.thrift_teardown()
-
-    def thrift_setup(self):
-        global thrift_server, transport, pltfm_mgr
-        transport = TSocket.TSocket(thrift_server, 9090)
-
-        transport = TTransport.TBufferedTransport(transport)
-        bprotocol = TBinaryProtocol.TBinaryProtocol(transport)
-
-        pltfm_mgr_client_module = importlib.import_module(".".join(["pltfm_mgr_rpc", "pltfm_mgr_rpc"]))
-        pltfm_mgr_protocol = TMultiplexedProtocol.TMultiplexedProtocol(bprotocol, "pltfm_mgr_rpc")
-        pltfm_mgr = pltfm_mgr_client_module.Client(pltfm_mgr_protocol)
-
-        transport.open()
-
-    def thrift_teardown(self):
-        global transport
-        transport.close()
 
     def get_presence(self, port_num):
         # Check for invalid port_num
@@ -108,9 +79,7 @@ class SfpUtil(SfpUtilBase):
         presence = False
 
         try:
-            self.thrift_setup()
-            presence = pltfm_mgr.pltfm_mgr_qsfp_presence_get(port_num)
-            self.thrift_teardown()
+            presence = self.client.call('pltfm_mgr_qsfp_presence_get', port_num)
         except Exception as e:
             print e.__doc__
             print e.message
@@ -122,19 +91,21 @@ class SfpUtil(SfpUtilBase):
         if port_num < self.port_start or port_num > self.port_end:
             return False
 
-        self.thrift_setup()
-        lpmode = pltfm_mgr.pltfm_mgr_qsfp_lpmode_get(port_num)
-        self.thrift_teardown()
-        return lpmode
+        return self.client.call('pltfm_mgr_qsfp_lpmode_get', port_num)
+
+    def get_low_power_mode_many(self, ports):
+        """
+        Retrieves the low power mode of several ports over one connection
+        :return: A dict which maps every port to its low power mode
+        """
+        return self.client.qsfp_lpmode_get_many(ports)
 
     def set_low_power_mode(self, port_num, lpmode):
         # Check for invalid port_num
         if port_num < self.port_start or port_num > self.port_end:
             return False
 
-        self.thrift_setup()
-        status = pltfm_mgr.pltfm_mgr_qsfp_lpmode_set(port_num, lpmode)
-        self.thrift_teardown()
+        status = self.client.call('pltfm_mgr_qsfp_lpmode_set', port_num, lpmode)
         return (status == 0)
 
     def reset(self, port_num):
@@ -142,10 +113,9 @@ class SfpUtil(SfpUtilBase):
         if port_num < self.port_start or port_num > self.port_end:
             return False
 
-        self.thrift_setup()
-        status = pltfm_mgr.pltfm_mgr_qsfp_reset(port_num, True)
-        status = pltfm_mgr.pltfm_mgr_qsfp_reset(port_num, False)
-        self.thrift_teardown()
+        with self.client.lock:
+            status = self.client.call('pltfm_mgr_qsfp_reset', port_num, True)
+            status = self.client.call('pltfm_mgr_qsfp_reset', port_num, False)
         return (status == 0)
 
     def check_transceiver_change(self):
@@ -154,18 +124,15 @@ class SfpUtil(SfpUtilBase):
 
         self.phy_port_dict = {}
 
+        # Get presence of each SFP
         try:
-            self.thrift_setup()
+            ports = range(self.port_start, self.port_end + 1)
+            presence = self.client.qsfp_presence_get_many(ports)
         except:
             return
 
-        # Get presence of each SFP
-        for port in range(self.port_start, self.port_end + 1):
-            try:
-                sfp_resent = pltfm_mgr.pltfm_mgr_qsfp_presence_get(port)
-            except:
-                sfp_resent = False
-            sfp_state = '1' if sfp_resent else '0'
+        for port in ports:
+            sfp_state = '1' if presence[port] else '0'
 
             if port in self.phy_port_cur_state:
                 if self.phy_port_cur_state[port] != sfp_state:
@@ -176,8 +143,6 @@ class SfpUtil(SfpUtilBase):
             # Update port current state
             self.phy_port_cur_state[port] = sfp_state
 
-        self.thrift_teardown()
-
     def get_transceiver_change_event(self, timeout=0):
         forever = False
         if timeout == 0:
@@ -190,12 +155,7 @@ class SfpUtil(SfpUtilBase):
 
         while forever or timeout > 0:
             if not self.ready:
-                try:
-                    self.thrift_setup()
-                    self.thrift_teardown()
-                except:
-                    pass
-                else:
+                if self.client.is_alive():
                     self.ready = True
                     self.phy_port_dict = {}
                     break
@@ -222,16 +182,14 @@ class SfpUtil(SfpUtilBase):
     def _get_port_eeprom_path(self, port_num, devid):
         eeprom_path = None
 
-        self.thrift_setup()
-        presence = pltfm_mgr.pltfm_mgr_qsfp_presence_get(port_num)
+        presence = self.client.call('pltfm_mgr_qsfp_presence_get', port_num)
         if presence == True:
             eeprom_cache = open(SFP_EEPROM_CACHE, 'wb')
-            eeprom_hex = pltfm_mgr.pltfm_mgr_qsfp_info_get(port_num)
+            eeprom_hex = self.client.call('pltfm_mgr_qsfp_info_get', port_num)
             eeprom_raw = bytearray.fromhex(eeprom_hex)
             eeprom_cache.write(eeprom_raw)
             eeprom_cache.close()
             eeprom_path = SFP_EEPROM_CACHE
-        self.thrift_teardown()
 
         return eeprom_path
 
@@ -3,12 +3,17 @@
 import os
 import struct
 import subprocess
+import threading
 from sonic_py_common import device_info
 from mmap import *
 
 HOST_CHK_CMD = "docker > /dev/null 2>&1"
 EMPTY_STRING = ""
 
+# PCI resources mapped by pci_get_value, kept for the lifetime of the process
+_pci_maps = {}
+_pci_maps_lock = threading.Lock()
+
 
 class APIHelper():
 
@@ -22,11 +27,15 @@ class APIHelper():
         status = True
         result = ""
         try:
-            fd = os.open(resource, os.O_RDWR)
-            mm = mmap(fd, 0)
-            mm.seek(int(offset))
-            read_data_stream = mm.read(4)
-            result = struct.unpack('I', read_data_stream)
+            with _pci_maps_lock:
+                mm = _pci_maps.get(resource)
+                if mm is None:
+                    fd = os.open(resource, os.O_RDWR)
+                    try:
+                        mm = _pci_maps[resource] = mmap(fd, 0)
+                    finally:
+                        os.close(fd)
+                result = struct.unpack_from('I', mm, int(offset))
         except:
             status = False
         return status, result
@@ -1,41 +1,42 @@
 #!/usr/bin/env python
 
 import os.path
-import subprocess
-import sys
-import re
+import imp
 
 try:
     from sonic_psu.psu_base import PsuBase
 except ImportError as e:
     raise ImportError (str(e) + "- required module not found")
 
+# The platform API is only installed in pmon, its IPMI access is loaded from
+# the platform directory
+IPMI_MODULE = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                           '..', 'sonic_platform', 'ipmi.py')
+IPMI_SENSOR_NETFN = 0x4
+IPMI_GET_SENSOR_READING = 0x2d
+
 
 class PsuUtil(PsuBase):
     """Platform-specific PSUutil class"""
 
     def __init__(self):
-        self.ipmi_raw = "docker exec -ti pmon ipmitool raw 0x4 0x2d"
-        self.psu1_id = "0x2f"
-        self.psu2_id = "0x39"
+        self.ipmi = imp.load_source('ipmi', IPMI_MODULE).IpmiCache()
+        self.psu1_id = 0x2f
+        self.psu2_id = 0x39
         PsuBase.__init__(self)
 
-    def run_command(self, command):
-        proc = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE)
-        (out, err) = proc.communicate()
+    def get_status_byte(self, psu_id):
+        """
+        Returns the sensor state byte of a PSU, None if it couldn't be read
+        """
+        status, data = self.ipmi.raw(IPMI_SENSOR_NETFN, "{0:#x} {1:#x}".format(
+            IPMI_GET_SENSOR_READING, psu_id))
+        # reading, flags, then the state bits
+        fields = data.split()
+        if not status or len(fields) < 3:
+            return None
+        return fields[2]
 
-        if proc.returncode != 0:
-            sys.exit(proc.returncode)
-    
-        return out
-    
-    def find_value(self, in_string):
-        result = re.search("^.+ ([0-9a-f]{2}) .+$", in_string)
-        if result:
-            return result.group(1)
-        else:
-            return result
-        
     def get_num_psus(self):
         """
         Retrieves the number of PSUs available on the device
@@ -54,8 +55,7 @@ class PsuUtil(PsuBase):
             return False
 
         psu_id = self.psu1_id if index == 1 else self.psu2_id
-        res_string = self.run_command(self.ipmi_raw + ' ' + psu_id)
-        status_byte = self.find_value(res_string)
+        status_byte = self.get_status_byte(psu_id)
         
         if status_byte is None:
             return False
@@ -78,8 +78,7 @@ class PsuUtil(PsuBase):
             return False
 
         psu_id = self.psu1_id if index == 1 else self.psu2_id
-        res_string = self.run_command(self.ipmi_raw + ' ' + psu_id)
-        status_byte = self.find_value(res_string)
+        status_byte = self.get_status_byte(psu_id)
         
         if status_byte is None:
             return False
@@ -1,12 +1,17 @@
 #!/usr/bin/env python
 
 import os
-import subprocess
+import threading
+from ipmi import IpmiCache
 
 
 HOST_CHK_CMD = "docker > /dev/null 2>&1"
 EMPTY_STRING = ""
 
+# IPMI session and FRU cache shared by the platform objects
+_ipmi = None
+_ipmi_lock = threading.Lock()
+
 
 class APIHelper():
 
@@ -25,32 +30,19 @@ class APIHelper():
             pass
         return None
 
+    def get_ipmi(self):
+        global _ipmi
+        with _ipmi_lock:
+            if _ipmi is None:
+                _ipmi = IpmiCache()
+            return _ipmi
+
     def ipmi_raw(self, netfn, cmd):
-        status = True
-        result = ""
-        try:
-            cmd = "ipmitool raw {} {}".format(str(netfn), str(cmd))
-            p = subprocess.Popen(
-                cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            raw_data, err = p.communicate()
-            if err == '':
-                result = raw_data.strip()
-        except:
-            status = False
-        return status, result
+        return self.get_ipmi().raw(netfn, cmd)
 
     def ipmi_fru_id(self, id, key=None):
-        status = True
-        result = ""
-        try:
-            cmd = "ipmitool fru print {}".format(str(
-                id)) if not key else "ipmitool fru print {0} | grep '{1}' ".format(str(id), str(key))
-
-            p = subprocess.Popen(
-                cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            raw_data, err = p.communicate()
-            if err == '':
-                result = raw_data.strip()
-        except:
-            status = False
+        status, result = self.get_ipmi().fru(id)
+        if status and key:
+            result = "\n".join(
+                line for line in result.splitlines() if str(key) in line).strip()
         return status, result
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+
+#############################################################################
+# Celestica
+#
+# IPMI access for the platform API: requests to the BMC go through the
+# ipmi device of the kernel instead of one ipmitool process each, and the
+# FRU contents are read once and kept for a while.
+#
+#############################################################################
+
+import os
+import time
+import fcntl
+import select
+import ctypes
+import threading
+import subprocess
+
+IPMI_DEV = "/dev/ipmi0"
+IPMI_TIMEOUT = 5
+# FRU data only changes when a FRU is replaced
+FRU_TTL = 60
+
+IPMI_SYSTEM_INTERFACE_ADDR_TYPE = 0x0c
+IPMI_BMC_CHANNEL = 0xf
+IPMI_MAX_MSG_LENGTH = 272
+
+
+class IpmiSystemInterfaceAddr(ctypes.Structure):
+    _fields_ = [("addr_type", ctypes.c_int),
+                ("channel", ctypes.c_short),
+                ("lun", ctypes.c_ubyte)]
+
+
+class IpmiMsg(ctypes.Structure):
+    _fields_ = [("netfn", ctypes.c_ubyte),
+                ("cmd", ctypes.c_ubyte),
+                ("data_len", ctypes.c_ushort),
+                ("data", ctypes.POINTER(ctypes.c_ubyte))]
+
+
+class IpmiReq(ctypes.Structure):
+    _fields_ = [("addr", ctypes.c_void_p),
+                ("addr_len", ctypes.c_uint),
+                ("msgid", ctypes.c_long),
+                ("msg", IpmiMsg)]
+
+
+class IpmiRecv(ctypes.Structure):
+    _fields_ = [("recv_type", ctypes.c_int),
+                ("addr", ctypes.c_void_p),
+                ("addr_len", ctypes.c_uint),
+                ("msgid", ctypes.c_long),
+                ("msg", IpmiMsg)]
+
+
+def _ioc(direction, nr, size):
+    return (direction << 30) | (size << 16) | (ord('i') << 8) | nr
+
+
+IPMICTL_RECEIVE_MSG_TRUNC = _ioc(3, 11, ctypes.sizeof(IpmiRecv))
+IPMICTL_SEND_COMMAND = _ioc(2, 13, ctypes.sizeof(IpmiReq))
+
+
+class IpmiDevice(object):
+    """
+    Session with the BMC over the ipmi device, kept open between requests
+    """
+
+    def __init__(self, path=IPMI_DEV, timeout=IPMI_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self.fd = None
+        self.msgid = 0
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def request(self, netfn, cmd, data=()):
+        """
+        Returns the response as a list of bytes, the completion code first
+        """
+        if self.fd is None:
+            self.fd = os.open(self.path, os.O_RDWR)
+
+        addr = IpmiSystemInterfaceAddr(IPMI_SYSTEM_INTERFACE_ADDR_TYPE, IPMI_BMC_CHANNEL, 0)
+        req_data = (ctypes.c_ubyte * max(len(data), 1))(*data)
+        self.msgid += 1
+        req = IpmiReq(ctypes.cast(ctypes.pointer(addr), ctypes.c_void_p),
+                      ctypes.sizeof(addr), self.msgid,
+                      IpmiMsg(netfn, cmd, len(data), req_data))
+        try:
+            fcntl.ioctl(self.fd, IPMICTL_SEND_COMMAND, req)
+
+            while True:
+                readable, _, _ = select.select([self.fd], [], [], self.timeout)
+                if not readable:
+                    raise IOError("No response from BMC to netfn {0:#x} cmd {1:#x}".format(netfn, cmd))
+
+                resp_addr = IpmiSystemInterfaceAddr()
+                resp_data = (ctypes.c_ubyte * IPMI_MAX_MSG_LENGTH)()
+                recv = IpmiRecv(0, ctypes.cast(ctypes.pointer(resp_addr), ctypes.c_void_p),
+                                ctypes.sizeof(resp_addr), 0,
+                                IpmiMsg(0, 0, IPMI_MAX_MSG_LENGTH, resp_data))
+                fcntl.ioctl(self.fd, IPMICTL_RECEIVE_MSG_TRUNC, recv)
+                # a response to a request which timed out before
+                if recv.msgid == self.msgid:
+                    return list(resp_data[:recv.msg.data_len])
+        except (IOError, OSError):
+            self.close()
+            raise
+
+
+class FakeIpmiDevice(object):
+    """
+    Stands for the ipmi device in tests: answers from responses, a dict of
+    (netfn, cmd, tuple of data) -> list of bytes with the completion code
+    first, after latency seconds. Requests are kept in requests.
+    """
+
+    def __init__(self, responses, latency=0):
+        self.responses = responses
+        self.latency = latency
+        self.requests = []
+
+    def close(self):
+        pass
+
+    def request(self, netfn, cmd, data=()):
+        self.requests.append((netfn, cmd, tuple(data)))
+        if self.latency:
+            time.sleep(self.latency)
+        # 0xc1: invalid command
+        return list(self.responses.get((netfn, cmd, tuple(data)), [0xc1]))
+
+
+def format_raw(response):
+    """
+    Formats response data as ipmitool raw prints it
+    """
+    lines = []
+    for start in range(0, len(response), 16):
+        lines.append(" ".join("{0:02x}".format(b) for b in response[start:start + 16]))
+    return "\n ".join(lines)
+
+
+class IpmiCache(object):
+    """
+    IPMI access shared by the objects of the platform API: raw requests go
+    to the BMC through device, FRU contents are read with ipmitool and kept
+    fru_ttl seconds. The ipmitool processes run are counted in forks.
+    """
+
+    def __init__(self, device=None, fru_ttl=FRU_TTL):
+        self.device = device or IpmiDevice()
+        self.fru_ttl = fru_ttl
+        self.lock = threading.Lock()
+        self.forks = 0
+        # id -> (expiry, output of fru print)
+        self.frus = {}
+
+    def run_ipmitool(self, args):
+        """
+        Returns (status, output) of ipmitool with args
+        """
+        self.forks += 1
+        try:
+            p = subprocess.Popen(["ipmitool"] + args,
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            raw_data, err = p.communicate()
+        except OSError:
+            return False, ""
+        return p.returncode == 0 and not err, raw_data.decode().strip()
+
+    def raw(self, netfn, cmd):
+        """
+        Sends a request, cmd being the command followed by its data as in
+        "ipmitool raw", e.g. raw(0x3a, "0x63 0x1"); returns (status, data)
+        with data printed as ipmitool does
+        """
+        try:
+            tokens = [int(str(token), 0) for token in str(cmd).split()]
+            netfn = int(str(netfn), 0)
+            with self.lock:
+                response = self.device.request(netfn, tokens[0], tokens[1:])
+        except (IOError, OSError, ValueError, IndexError):
+            return False, ""
+        if not response or response[0] != 0:
+            return False, ""
+        return True, format_raw(response[1:])
+
+    def fru(self, id):
+        """
+        Returns (status, output of "ipmitool fru print id")
+        """
+        with self.lock:
+            expiry, output = self.frus.get(id, (0, None))
+            if time.time() >= expiry:
+                status, output = self.run_ipmitool(["fru", "print", str(id)])
+                if not status:
+                    return False, ""
+                self.frus[id] = (time.time() + self.fru_ttl, output)
+            return True, output
@@ -6,7 +6,12 @@
 try:
     import time
     import subprocess
+    import functools
+    import threading
     from sonic_sfp.sfputilbase import *
+    from sonic_platform.module_eeprom import read_module_eeprom, is_module_present
+    from sonic_platform.sfp_eeprom_cache import SfpEepromCache
+    from multiprocessing.pool import ThreadPool
     import syslog
 except ImportError as e:
     raise ImportError("%s - required module not found" % str(e))
@@ -35,6 +40,9 @@ SYSTEM_FAIL = 'system_fail'
 
 GET_PLATFORM_CMD = "sonic-cfggen -d -v DEVICE_METADATA.localhost.platform"
 
+# Maximum number of modules read concurrently by the bulk APIs
+MAX_SFP_WORKERS = 8
+
 # Ethernet<n> <=> sfp<n+SFP_PORT_NAME_OFFSET>
 SFP_PORT_NAME_OFFSET = 0
 SFP_PORT_NAME_CONVENTION = "sfp{}"
@@ -54,6 +62,27 @@ def log_err(msg, also_print_to_console=False):
     syslog.syslog(syslog.LOG_ERR, msg)
     syslog.closelog()
 
+def eeprom_cached(func):
+    """
+    Serve the EEPROM reads of one call from a page cache, so that the fields
+    decoded by the call are taken from a few page reads. The cache is dropped
+    when the call returns, as the module can be replaced between two calls.
+    Caches are per thread, the bulk APIs decode several modules concurrently.
+    """
+    @functools.wraps(func)
+    def wrapper(self, port_num, *args, **kwargs):
+        eeprom_caches = self.get_eeprom_caches()
+        if port_num in eeprom_caches:
+            return func(self, port_num, *args, **kwargs)
+
+        sfpname = SFP_PORT_NAME_CONVENTION.format(port_num + SFP_PORT_NAME_OFFSET)
+        eeprom_caches[port_num] = SfpEepromCache(lambda offset, num_bytes: read_module_eeprom(sfpname, offset, num_bytes))
+        try:
+            return func(self, port_num, *args, **kwargs)
+        finally:
+            del eeprom_caches[port_num]
+    return wrapper
+
 class SfpUtil(SfpUtilBase):
     """Platform-specific SfpUtil class"""
     PORT_START = 0
@@ -100,9 +129,20 @@ class SfpUtil(SfpUtilBase):
         self.PORTS_IN_BLOCK = port_position_tuple[3]
         self.EEPROM_OFFSET = port_position_tuple[4]
         self.mlnx_sfpd_started = False
+        self.eeprom_local = threading.local()
+        self.worker_pool = None
 
         SfpUtilBase.__init__(self)
 
+    def get_eeprom_caches(self):
+        """
+        EEPROM caches of the calls in progress in the current thread, by port
+        """
+        eeprom_caches = getattr(self.eeprom_local, 'caches', None)
+        if eeprom_caches is None:
+            eeprom_caches = self.eeprom_local.caches = {}
+        return eeprom_caches
+
     def get_presence(self, port_num):
         presence = False
 
@@ -113,19 +153,7 @@ class SfpUtil(SfpUtilBase):
         port_num += SFP_PORT_NAME_OFFSET
         sfpname = SFP_PORT_NAME_CONVENTION.format(port_num)
 
-        ethtool_cmd = "ethtool -m {} 2>/dev/null".format(sfpname)
-        try:
-            proc = subprocess.Popen(ethtool_cmd, stdout=subprocess.PIPE, shell=True, stderr=subprocess.STDOUT)
-            stdout = proc.communicate()[0]
-            proc.wait()
-            result = stdout.rstrip('\n')
-            if result != '':
-                presence = True
-
-        except OSError, e:
-            return presence
-
-        return presence
+        return is_module_present(sfpname)
 
     def get_low_power_mode(self, port_num):
         # Check for invalid port_num
@@ -241,23 +269,14 @@ class SfpUtil(SfpUtilBase):
 
     # Read out any bytes from any offset
     def _read_eeprom_specific_bytes_via_ethtool(self, port_num, offset, num_bytes):
+        eeprom_cache = self.get_eeprom_caches().get(port_num)
+        if eeprom_cache is not None:
+            return eeprom_cache.read(offset, num_bytes)
+
         port_num += SFP_PORT_NAME_OFFSET
         sfpname = SFP_PORT_NAME_CONVENTION.format(port_num)
 
-        eeprom_raw = []
-        ethtool_cmd = "ethtool -m {} hex on offset {} length {}".format(sfpname, offset, num_bytes)
-        try:
-            output = subprocess.check_output(ethtool_cmd, shell=True)
-            output_lines = output.splitlines()
-            first_line_raw = output_lines[0]
-            if "Offset" in first_line_raw:
-                for line in output_lines[2:]:
-                    line_split = line.split()
-                    eeprom_raw = eeprom_raw + line_split[1:]
-        except subprocess.CalledProcessError as e:
-            return None
-
-        return eeprom_raw
+        return read_module_eeprom(sfpname, offset, num_bytes)
 
     # Read eeprom
     def _read_eeprom_devid(self, port_num, devid, offset, num_bytes = 512):
@@ -273,6 +292,7 @@ class SfpUtil(SfpUtilBase):
         return eeprom_raw
 
     # Read out SFP type, vendor name, PN, REV, SN from eeprom.
+    @eeprom_cached
     def get_transceiver_info_dict(self, port_num):
         transceiver_info_dict = {}
         compliance_code_dict = {}
@@ -441,6 +461,25 @@ class SfpUtil(SfpUtilBase):
 
         return transceiver_info_dict
 
+    def _get_transceiver_info_dict_safe(self, port_num):
+        try:
+            return port_num, self.get_transceiver_info_dict(port_num)
+        except Exception as e:
+            log_err("Failed to read transceiver info of port {} - {}".format(port_num, repr(e)))
+            return port_num, None
+
+    def get_transceiver_info_dict_bulk(self, ports):
+        """
+        Read the transceiver info of several ports, the modules are read concurrently
+        :param ports: List of port numbers
+        :return: A dict which maps every port to its transceiver info dict, or to None
+                 if the module is not present or can't be read
+        """
+        if self.worker_pool is None:
+            self.worker_pool = ThreadPool(MAX_SFP_WORKERS)
+        return dict(self.worker_pool.map(self._get_transceiver_info_dict_safe, ports))
+
+    @eeprom_cached
     def get_transceiver_dom_info_dict(self, port_num):
         transceiver_dom_info_dict = {}
 
@@ -591,6 +630,7 @@ class SfpUtil(SfpUtilBase):
 
         return transceiver_dom_info_dict
 
+    @eeprom_cached
     def get_transceiver_dom_threshold_info_dict(self, port_num):
         transceiver_dom_threshold_info_dict = {}
 
@@ -16,8 +16,11 @@ import subprocess
 from swsscommon import swsscommon
 import logging
 import logging.handlers
+import multiprocessing
 import re
 import os
+import socket
+import struct
 
 WARM_BOOT_FILE_DIR = '/var/warmboot/nat/'
 NAT_WARM_BOOT_FILE = 'nat_entries.dump'
@@ -25,6 +28,49 @@ IP_PROTO_TCP       = '6'
 
 MATCH_CONNTRACK_ENTRY = '^(\w+)\s+(\d+).*src=([\d.]+)\s+dst=([\d.]+)\s+sport=(\d+)\s+dport=(\d+).*src=([\d.]+)\s+dst=([\d.]+)\s+sport=(\d+)\s+dport=(\d+)'
 
+# Conntrack entries are restored with one IPCTNL_MSG_CT_NEW netlink message per entry,
+# NETLINK_BATCH_SIZE messages being sent to the kernel at once.
+NETLINK_BATCH_SIZE = 256
+NETLINK_WORKERS    = 1
+NETLINK_RCVBUF     = 4 * 1024 * 1024
+
+NETLINK_NETFILTER      = 12
+NFNL_SUBSYS_CTNETLINK  = 1
+IPCTNL_MSG_CT_NEW      = 0
+NFNETLINK_V0           = 0
+NLMSG_ERROR            = 2
+NLM_F_REQUEST          = 0x1
+NLM_F_ACK              = 0x4
+NLM_F_EXCL             = 0x200
+NLM_F_CREATE           = 0x400
+NLA_F_NESTED           = 0x8000
+
+CTA_TUPLE_ORIG         = 1
+CTA_TUPLE_REPLY        = 2
+CTA_STATUS             = 3
+CTA_PROTOINFO          = 4
+CTA_NAT_SRC            = 6
+CTA_TIMEOUT            = 7
+CTA_NAT_DST            = 13
+CTA_TUPLE_IP           = 1
+CTA_TUPLE_PROTO        = 2
+CTA_IP_V4_SRC          = 1
+CTA_IP_V4_DST          = 2
+CTA_PROTO_NUM          = 1
+CTA_PROTO_SRC_PORT     = 2
+CTA_PROTO_DST_PORT     = 3
+CTA_PROTOINFO_TCP      = 1
+CTA_PROTOINFO_TCP_STATE = 1
+CTA_NAT_V4_MINIP       = 1
+CTA_NAT_V4_MAXIP       = 2
+CTA_NAT_PROTO          = 3
+CTA_PROTONAT_PORT_MIN  = 1
+CTA_PROTONAT_PORT_MAX  = 2
+
+IPS_ASSURED                = 1 << 2
+TCP_CONNTRACK_ESTABLISHED  = 3
+CONNTRACK_TIMEOUT          = 432000
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 handler = logging.handlers.SysLogHandler(address = '/dev/log')
@@ -38,8 +84,143 @@ def add_nat_conntrack_entry_in_kernel(ipproto, srcip, dstip, srcport, dstport, n
     ctcmd = 'conntrack -I -n ' + natdstip + ':' + natdstport + ' -g ' + natsrcip + ':' + natsrcport + \
                        ' --protonum ' + ipproto + state + ' --timeout 432000 --src ' + srcip + ' --sport ' + srcport + \
                        ' --dst ' + dstip + ' --dport ' + dstport + ' -u ASSURED'
-    subprocess.call(ctcmd, shell=True)
+    if subprocess.call(ctcmd, shell=True) != 0:
+        logger.error("Failed to restore NAT entry: {}".format(ctcmd))
+        return False
     logger.info("Restored NAT entry: {}".format(ctcmd))
+    return True
+
+def nla(attr_type, payload):
+    length = 4 + len(payload)
+    return struct.pack('=HH', length, attr_type) + payload + b'\0' * ((4 - length % 4) % 4)
+
+def nla_nested(attr_type, *attrs):
+    return nla(attr_type | NLA_F_NESTED, b''.join(attrs))
+
+def nla_tuple(attr_type, ipproto, srcip, dstip, srcport, dstport):
+    return nla_nested(attr_type,
+                      nla_nested(CTA_TUPLE_IP,
+                                 nla(CTA_IP_V4_SRC, socket.inet_aton(srcip)),
+                                 nla(CTA_IP_V4_DST, socket.inet_aton(dstip))),
+                      nla_nested(CTA_TUPLE_PROTO,
+                                 nla(CTA_PROTO_NUM, struct.pack('B', int(ipproto))),
+                                 nla(CTA_PROTO_SRC_PORT, struct.pack('!H', int(srcport))),
+                                 nla(CTA_PROTO_DST_PORT, struct.pack('!H', int(dstport)))))
+
+def nla_nat(attr_type, ip, port):
+    return nla_nested(attr_type,
+                      nla(CTA_NAT_V4_MINIP, socket.inet_aton(ip)),
+                      nla(CTA_NAT_V4_MAXIP, socket.inet_aton(ip)),
+                      nla_nested(CTA_NAT_PROTO,
+                                 nla(CTA_PROTONAT_PORT_MIN, struct.pack('!H', int(port))),
+                                 nla(CTA_PROTONAT_PORT_MAX, struct.pack('!H', int(port)))))
+
+def build_nat_conntrack_msg(seq, ipproto, srcip, dstip, srcport, dstport, natsrcip, natdstip, natsrcport, natdstport):
+    # Same request as 'conntrack -I' in add_nat_conntrack_entry_in_kernel: the reply tuple is the
+    # inverse of the original one and the kernel applies the source and destination NAT to it.
+    attrs = [nla_tuple(CTA_TUPLE_ORIG, ipproto, srcip, dstip, srcport, dstport),
+             nla_tuple(CTA_TUPLE_REPLY, ipproto, dstip, srcip, dstport, srcport),
+             nla_nat(CTA_NAT_SRC, natdstip, natdstport),
+             nla_nat(CTA_NAT_DST, natsrcip, natsrcport),
+             nla(CTA_TIMEOUT, struct.pack('!I', CONNTRACK_TIMEOUT)),
+             nla(CTA_STATUS, struct.pack('!I', IPS_ASSURED))]
+    if (ipproto == IP_PROTO_TCP):
+        attrs.append(nla_nested(CTA_PROTOINFO,
+                                nla_nested(CTA_PROTOINFO_TCP,
+                                           nla(CTA_PROTOINFO_TCP_STATE, struct.pack('B', TCP_CONNTRACK_ESTABLISHED)))))
+    payload = struct.pack('=BBH', socket.AF_INET, NFNETLINK_V0, 0) + b''.join(attrs)
+    return struct.pack('=IHHII', 16 + len(payload), (NFNL_SUBSYS_CTNETLINK << 8) | IPCTNL_MSG_CT_NEW,
+                       NLM_F_REQUEST | NLM_F_ACK | NLM_F_CREATE | NLM_F_EXCL, seq, 0) + payload
+
+class ConntrackNetlinkRestorer(object):
+    """
+    Adds conntrack entries to the kernel over a single NETLINK_NETFILTER socket, sending
+    the IPCTNL_MSG_CT_NEW requests in batches and collecting one ack per request.
+    """
+    def __init__(self, sock=None):
+        if sock is None:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_NETFILTER)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, NETLINK_RCVBUF)
+            sock.bind((0, 0))
+        self.sock = sock
+        self.seq = 0
+        self.pending = {}
+        self.restored = 0
+        self.failed = 0
+
+    def close(self):
+        self.sock.close()
+
+    def parse_acks(self, data):
+        offset = 0
+        while offset + 16 <= len(data):
+            msg_len, msg_type, _, msg_seq, _ = struct.unpack_from('=IHHII', data, offset)
+            if msg_type == NLMSG_ERROR and msg_seq in self.pending:
+                cmdargs = self.pending.pop(msg_seq)
+                error = struct.unpack_from('=i', data, offset + 16)[0]
+                if error != 0:
+                    self.failed += 1
+                    logger.error("Failed to restore NAT entry {}: {}".format(cmdargs, os.strerror(-error)))
+                else:
+                    self.restored += 1
+            offset += (msg_len + 3) & ~3
+            if msg_len == 0:
+                break
+
+    def restore_batch(self, entries):
+        msgs = []
+        for cmdargs in entries:
+            self.seq += 1
+            self.pending[self.seq] = cmdargs
+            msgs.append(build_nat_conntrack_msg(self.seq, *cmdargs))
+        self.sock.send(b''.join(msgs))
+
+        while self.pending:
+            self.parse_acks(self.sock.recv(65536))
+
+    def restore(self, entries):
+        """
+        Returns the number of restored and failed entries, and the entries left without
+        an ack if the socket failed.
+        """
+        for i in range(0, len(entries), NETLINK_BATCH_SIZE):
+            try:
+                self.restore_batch(entries[i:i + NETLINK_BATCH_SIZE])
+            except socket.error as e:
+                logger.warning("Failed to restore NAT entries over netlink ({})".format(str(e)))
+                unacked = [self.pending[seq] for seq in sorted(self.pending)] + entries[i + NETLINK_BATCH_SIZE:]
+                self.pending = {}
+                return self.restored, self.failed, unacked
+        return self.restored, self.failed, []
+
+def restore_nat_conntrack_entries_worker(entries):
+    try:
+        restorer = ConntrackNetlinkRestorer()
+    except socket.error as e:
+        logger.warning("Failed to open a ctnetlink socket ({})".format(str(e)))
+        return 0, 0, entries
+    try:
+        return restorer.restore(entries)
+    finally:
+        restorer.close()
+
+def restore_nat_conntrack_entries(entries, workers=NETLINK_WORKERS):
+    """
+    Restore the entries over netlink, split across 'workers' processes each owning a socket.
+    Returns the number of restored and failed entries, and the entries which got no ack.
+    """
+    if workers <= 1 or len(entries) <= NETLINK_BATCH_SIZE:
+        return restore_nat_conntrack_entries_worker(entries)
+
+    chunk = (len(entries) + workers - 1) // workers
+    pool = multiprocessing.Pool(workers)
+    try:
+        results = pool.map(restore_nat_conntrack_entries_worker,
+                           [entries[i:i + chunk] for i in range(0, len(entries), chunk)])
+    finally:
+        pool.close()
+        pool.join()
+    return sum(r[0] for r in results), sum(r[1] for r in results), sum((r[2] for r in results), [])
 
 # Set the statedb "NAT_RESTORE_TABLE|Flags", so natsyncd can start reconciliation
 def set_statedb_nat_restore_done():
@@ -53,16 +234,29 @@ def set_statedb_nat_restore_done():
 def restore_update_kernel_nat_entries(filename):
     # Read the entries from nat_entries.dump file and add them to kernel
     conntrack_match_pattern = re.compile(r'{}'.format(MATCH_CONNTRACK_ENTRY))
+    entries = []
     with open(filename, 'r') as fp:
         for line in fp:
-            ctline = conntrack_match_pattern.findall(line)
+            ctline = conntrack_match_pattern.match(line)
             if not ctline:
                 continue
-            cmdargs = list(ctline.pop(0))
+            cmdargs = list(ctline.groups())
             proto = cmdargs.pop(0)
             if proto not in ('tcp', 'udp'):
                continue
-            add_nat_conntrack_entry_in_kernel(*cmdargs)
+            entries.append(cmdargs)
+
+    restored, failed, unacked = restore_nat_conntrack_entries(entries)
+    if unacked:
+        # Fall back to the conntrack utility for the entries ctnetlink didn't ack
+        logger.warning("Restoring {} NAT entries with conntrack utility".format(len(unacked)))
+        for cmdargs in unacked:
+            if add_nat_conntrack_entry_in_kernel(*cmdargs):
+                restored += 1
+            else:
+                failed += 1
+
+    logger.info("Restored {} NAT entries, {} failed".format(restored, failed))
 
 def main():
     logger.info("restore_nat_entries service is started")
@@ -0,0 +1,276 @@
+import os
+import sys
+import errno
+import types
+import socket
+import struct
+import logging
+import logging.handlers
+import tempfile
+
+import mock
+
+NAT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, NAT_DIR)
+
+# swsscommon is only in the docker, as is /dev/log
+swsscommon = types.ModuleType('swsscommon')
+swsscommon.swsscommon = types.ModuleType('swsscommon.swsscommon')
+with mock.patch.dict(sys.modules, {'swsscommon': swsscommon, 'swsscommon.swsscommon': swsscommon.swsscommon}), \
+        mock.patch.object(logging.handlers, 'SysLogHandler', lambda address: logging.NullHandler()):
+    import restore_nat_entries
+
+build_nat_conntrack_msg = restore_nat_entries.build_nat_conntrack_msg
+nla = restore_nat_entries.nla
+ConntrackNetlinkRestorer = restore_nat_entries.ConntrackNetlinkRestorer
+
+NLMSG_HDR = '=IHHII'
+
+# conntrack -L output saved in nat_entries.dump
+DUMP = [
+    'tcp      6 431999 ESTABLISHED src=10.0.0.{0} dst=20.0.0.1 sport={1} dport=80 '
+    'src=20.0.0.1 dst=65.55.42.1 sport=80 dport={2} [ASSURED] mark=0 use=1',
+    'udp      17 431999 src=10.0.0.{0} dst=20.0.0.2 sport={1} dport=53 '
+    'src=20.0.0.2 dst=65.55.42.1 sport=53 dport={2} [ASSURED] mark=0 use=1',
+    'icmp     1 29 src=10.0.0.{0} dst=20.0.0.3 type=8 code=0 id={1} '
+    'src=20.0.0.3 dst=65.55.42.1 type=0 code=0 id={2} mark=0 use=1',
+]
+
+
+def parse_attrs(data):
+    """
+    Attributes of a netlink payload by type, nested ones parsed too
+    """
+    attrs = {}
+    offset = 0
+    while offset < len(data):
+        length, attr_type = struct.unpack_from('=HH', data, offset)
+        assert length >= 4
+        payload = data[offset + 4:offset + length]
+        if attr_type & restore_nat_entries.NLA_F_NESTED:
+            payload = parse_attrs(payload)
+        attrs[attr_type & ~restore_nat_entries.NLA_F_NESTED] = payload
+        offset += (length + 3) & ~3
+    assert offset == len(data)
+    return attrs
+
+
+def parse_msg(data):
+    msg_len, msg_type, flags, seq, _ = struct.unpack_from(NLMSG_HDR, data)
+    family, version, res_id = struct.unpack_from('=BBH', data, 16)
+    assert (family, version, res_id) == (socket.AF_INET, restore_nat_entries.NFNETLINK_V0, 0)
+    return msg_len, msg_type, flags, seq, parse_attrs(data[20:msg_len])
+
+
+def make_ack(seq, error=0):
+    return struct.pack(NLMSG_HDR, 36, restore_nat_entries.NLMSG_ERROR, 0, seq, 0) + \
+           struct.pack('=i', -error) + struct.pack(NLMSG_HDR, 16, 0, 0, seq, 0)
+
+
+def make_entry(index, proto='6'):
+    return [proto, '10.0.0.1', '20.0.0.1', str(1000 + index), '80',
+            '20.0.0.1', '65.55.42.1', '80', str(3000 + index)]
+
+
+class FakeNetlinkSocket(object):
+    """
+    ctnetlink acking the requests sent, at most 'per_recv' acks per datagram.
+    Requests whose original source port is in 'errors' fail with that errno, and
+    receiving fails after 'acks' acks.
+    """
+    def __init__(self, errors=None, acks=None, per_recv=3):
+        self.errors = errors or {}
+        self.acks = acks
+        self.per_recv = per_recv
+        self.requests = []
+        self.queue = []
+        self.acked = 0
+        self.closed = False
+
+    def send(self, data):
+        offset = 0
+        while offset < len(data):
+            msg_len, _, _, seq, attrs = parse_msg(data[offset:])
+            sport = struct.unpack('!H', attrs[restore_nat_entries.CTA_TUPLE_ORIG][
+                restore_nat_entries.CTA_TUPLE_PROTO][restore_nat_entries.CTA_PROTO_SRC_PORT])[0]
+            self.requests.append(sport)
+            self.queue.append(make_ack(seq, self.errors.get(sport, 0)))
+            offset += msg_len
+        return len(data)
+
+    def recv(self, size):
+        count = self.per_recv
+        if self.acks is not None:
+            if self.acked >= self.acks:
+                raise socket.error(errno.ENOBUFS, os.strerror(errno.ENOBUFS))
+            count = min(count, self.acks - self.acked)
+        acks, self.queue = self.queue[:count], self.queue[count:]
+        self.acked += len(acks)
+        return b''.join(acks)
+
+    def close(self):
+        self.closed = True
+
+
+class TestBuildMsg(object):
+
+    def test_nla_padding(self):
+        assert nla(1, b'\x01') == struct.pack('=HH', 5, 1) + b'\x01\0\0\0'
+        assert nla(2, b'\x01\x02\x03\x04') == struct.pack('=HH', 8, 2) + b'\x01\x02\x03\x04'
+
+    def test_tcp(self):
+        msg = build_nat_conntrack_msg(7, '6', '10.0.0.1', '20.0.0.1', '1000', '80',
+                                      '20.0.0.1', '65.55.42.1', '80', '3000')
+        msg_len, msg_type, flags, seq, attrs = parse_msg(msg)
+        assert msg_len == len(msg)
+        assert msg_type == (restore_nat_entries.NFNL_SUBSYS_CTNETLINK << 8) | restore_nat_entries.IPCTNL_MSG_CT_NEW
+        assert flags == (restore_nat_entries.NLM_F_REQUEST | restore_nat_entries.NLM_F_ACK |
+                         restore_nat_entries.NLM_F_CREATE | restore_nat_entries.NLM_F_EXCL)
+        assert seq == 7
+
+        # the reply tuple is the inverse of the original one
+        def tuple_of(attr):
+            ip = attr[restore_nat_entries.CTA_TUPLE_IP]
+            proto = attr[restore_nat_entries.CTA_TUPLE_PROTO]
+            return (socket.inet_ntoa(ip[restore_nat_entries.CTA_IP_V4_SRC]),
+                    socket.inet_ntoa(ip[restore_nat_entries.CTA_IP_V4_DST]),
+                    struct.unpack('B', proto[restore_nat_entries.CTA_PROTO_NUM])[0],
+                    struct.unpack('!H', proto[restore_nat_entries.CTA_PROTO_SRC_PORT])[0],
+                    struct.unpack('!H', proto[restore_nat_entries.CTA_PROTO_DST_PORT])[0])
+        assert tuple_of(attrs[restore_nat_entries.CTA_TUPLE_ORIG]) == ('10.0.0.1', '20.0.0.1', 6, 1000, 80)
+        assert tuple_of(attrs[restore_nat_entries.CTA_TUPLE_REPLY]) == ('20.0.0.1', '10.0.0.1', 6, 80, 1000)
+
+        # the source is translated to the destination of the reply in the dump
+        def nat_of(attr):
+            ports = attr[restore_nat_entries.CTA_NAT_PROTO]
+            return (socket.inet_ntoa(attr[restore_nat_entries.CTA_NAT_V4_MINIP]),
+                    socket.inet_ntoa(attr[restore_nat_entries.CTA_NAT_V4_MAXIP]),
+                    struct.unpack('!H', ports[restore_nat_entries.CTA_PROTONAT_PORT_MIN])[0],
+                    struct.unpack('!H', ports[restore_nat_entries.CTA_PROTONAT_PORT_MAX])[0])
+        assert nat_of(attrs[restore_nat_entries.CTA_NAT_SRC]) == ('65.55.42.1', '65.55.42.1', 3000, 3000)
+        assert nat_of(attrs[restore_nat_entries.CTA_NAT_DST]) == ('20.0.0.1', '20.0.0.1', 80, 80)
+
+        assert struct.unpack('!I', attrs[restore_nat_entries.CTA_TIMEOUT])[0] == 432000
+        assert struct.unpack('!I', attrs[restore_nat_entries.CTA_STATUS])[0] == restore_nat_entries.IPS_ASSURED
+        tcp = attrs[restore_nat_entries.CTA_PROTOINFO][restore_nat_entries.CTA_PROTOINFO_TCP]
+        assert struct.unpack('B', tcp[restore_nat_entries.CTA_PROTOINFO_TCP_STATE])[0] == \
+            restore_nat_entries.TCP_CONNTRACK_ESTABLISHED
+
+    def test_udp(self):
+        msg = build_nat_conntrack_msg(1, *make_entry(0, '17'))
+        attrs = parse_msg(msg)[4]
+        assert restore_nat_entries.CTA_PROTOINFO not in attrs
+        proto = attrs[restore_nat_entries.CTA_TUPLE_ORIG][restore_nat_entries.CTA_TUPLE_PROTO]
+        assert struct.unpack('B', proto[restore_nat_entries.CTA_PROTO_NUM])[0] == 17
+
+
+class TestRestore(object):
+
+    def setup_method(self, method):
+        self.patches = [mock.patch.object(restore_nat_entries, 'NETLINK_BATCH_SIZE', 4),
+                        mock.patch.object(restore_nat_entries, 'logger')]
+        for patch in self.patches:
+            patch.start()
+
+    def teardown_method(self, method):
+        for patch in reversed(self.patches):
+            patch.stop()
+
+    def test_parse_acks(self):
+        restorer = ConntrackNetlinkRestorer(FakeNetlinkSocket())
+        restorer.pending = dict((seq, make_entry(seq)) for seq in (1, 2, 3, 4))
+        # unknown seq, not an error message
+        other = struct.pack(NLMSG_HDR, 20, 0x100, 0, 1, 0) + b'\0' * 4
+        restorer.parse_acks(make_ack(1) + make_ack(9) + other + make_ack(2, errno.EEXIST) + make_ack(3))
+        assert sorted(restorer.pending) == [4]
+        assert (restorer.restored, restorer.failed) == (2, 1)
+        assert 'File exists' in restore_nat_entries.logger.error.call_args[0][0]
+
+        # a message of no length ends the datagram
+        restorer.parse_acks(struct.pack(NLMSG_HDR, 0, 0, 0, 0, 0) + make_ack(4))
+        assert sorted(restorer.pending) == [4]
+
+    def test_restore(self):
+        sock = FakeNetlinkSocket(errors={1003: errno.EEXIST, 1008: errno.EINVAL})
+        entries = [make_entry(i) for i in range(10)]
+        restorer = ConntrackNetlinkRestorer(sock)
+        assert restorer.restore(entries) == (8, 2, [])
+        assert sock.requests == list(range(1000, 1010))
+        assert restorer.pending == {}
+
+    def test_socket_failure(self):
+        # the acks of the first batch and one of the second are received
+        sock = FakeNetlinkSocket(acks=5)
+        entries = [make_entry(i) for i in range(10)]
+        restored, failed, unacked = ConntrackNetlinkRestorer(sock).restore(entries)
+        assert (restored, failed) == (5, 0)
+        assert unacked == entries[5:]
+        assert sock.requests == list(range(1000, 1008))
+
+    def test_worker(self):
+        sock = FakeNetlinkSocket()
+        with mock.patch.object(restore_nat_entries, 'ConntrackNetlinkRestorer',
+                               lambda: ConntrackNetlinkRestorer(sock)):
+            assert restore_nat_entries.restore_nat_conntrack_entries([make_entry(0)]) == (1, 0, [])
+        assert sock.closed
+
+        entries = [make_entry(0)]
+        with mock.patch.object(restore_nat_entries.socket, 'socket',
+                               side_effect=socket.error(errno.EPROTONOSUPPORT, 'no ctnetlink')):
+            assert restore_nat_entries.restore_nat_conntrack_entries(entries) == (0, 0, entries)
+
+
+class TestRestoreDump(object):
+
+    def setup_method(self, method):
+        fd, self.filename = tempfile.mkstemp()
+        with os.fdopen(fd, 'w') as f:
+            for i in range(5):
+                for line in DUMP:
+                    f.write(line.format(i + 1, 1000 + i, 3000 + i) + '\n')
+        self.commands = []
+        self.patches = [mock.patch.object(restore_nat_entries, 'NETLINK_BATCH_SIZE', 4),
+                        mock.patch.object(restore_nat_entries, 'logger'),
+                        mock.patch.object(restore_nat_entries.subprocess, 'call', self.call)]
+        for patch in self.patches:
+            patch.start()
+
+    def teardown_method(self, method):
+        for patch in reversed(self.patches):
+            patch.stop()
+        os.remove(self.filename)
+
+    def call(self, cmd, shell):
+        self.commands.append(cmd)
+        # conntrack fails for the entries of port 1002
+        return 1 if ' --sport 1002 ' in cmd else 0
+
+    def restore(self, sock):
+        with mock.patch.object(restore_nat_entries, 'ConntrackNetlinkRestorer',
+                               lambda: ConntrackNetlinkRestorer(sock)):
+            restore_nat_entries.restore_update_kernel_nat_entries(self.filename)
+        return restore_nat_entries.logger.info.call_args[0][0]
+
+    def test_netlink(self):
+        sock = FakeNetlinkSocket(errors={1004: errno.EEXIST})
+        # icmp entries aren't restored
+        assert self.restore(sock) == 'Restored 8 NAT entries, 2 failed'
+        assert sock.requests == [1000, 1000, 1001, 1001, 1002, 1002, 1003, 1003, 1004, 1004]
+        assert self.commands == []
+
+    def test_fallback_unacked(self):
+        # the first batch is acked, conntrack restores the others
+        sock = FakeNetlinkSocket(acks=4)
+        assert self.restore(sock) == 'Restored 8 NAT entries, 2 failed'
+        assert len(self.commands) == 6
+        assert [cmd.split(' --sport ')[1].split()[0] for cmd in self.commands] == \
+            ['1002', '1002', '1003', '1003', '1004', '1004']
+        assert ' --state ESTABLISHED ' in self.commands[0]
+        assert ' --state ' not in self.commands[1]
+
+    def test_fallback_no_socket(self):
+        with mock.patch.object(restore_nat_entries.socket, 'socket',
+                               side_effect=socket.error(errno.EPROTONOSUPPORT, 'no ctnetlink')):
+            restore_nat_entries.restore_update_kernel_nat_entries(self.filename)
+        assert restore_nat_entries.logger.info.call_args[0][0] == 'Restored 8 NAT entries, 2 failed'
+        assert len(self.commands) == 10
@@ -1,18 +1,22 @@
 #!/usr/bin/env python
 
 import os
+import io
+import fcntl
 import time
 import tarfile
 import socket
+import threading
 import yaml
 import json
 import syslog
+from concurrent.futures import ThreadPoolExecutor
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from azure.storage.file import FileService
 
 global CORE_FILE_PATH, RC_FILE
-global hostname, sonicversion, asicname, acctname, acctkey, sharename, cwd
+global hostname, sonicversion, asicname, acctname, acctkey, sharename
 global INIT_CWD
 global log_level
 global this_file
@@ -32,16 +36,22 @@ asicname = ""
 acctname = ""
 acctkey = ""
 sharename = ""
-cwd = []
 
 HOURS_4 = (4 * 60 * 60)
 PAUSE_ON_FAIL = (60 * 60)
 WAIT_FILE_WRITE1 = (10 * 60)
 WAIT_FILE_WRITE2= (5 * 60)
 POLL_SLEEP = (60 * 60)
-MAX_RETRIES = 5
+# Failed uploads are retried until the core is gone, the pause doubling from
+# RETRY_BACKOFF_BASE up to PAUSE_ON_FAIL
+RETRY_BACKOFF_BASE = 60
 UPLOAD_PREFIX = "UPLOADED_"
 
+# Cores are compressed on the fly and uploaded in ranges of UPLOAD_CHUNK_SIZE,
+# which is the largest range accepted by Azure file service.
+UPLOAD_CHUNK_SIZE = (4 * 1024 * 1024)
+MAX_UPLOAD_WORKERS = 2
+
 log_level = syslog.LOG_DEBUG
 
 def log_msg(lvl, fname, m):
@@ -64,10 +74,6 @@ def log_debug(m):
     log_msg(syslog.LOG_DEBUG, this_file, m)
 
 
-def make_new_dir(p):
-    os.system("rm -rf " + p)
-    os.system("mkdir -p " + p)
-
 def parse_a_json(data, prefix, val):
     for i in data:
         if type(data[i]) == dict:
@@ -102,11 +108,110 @@ class config:
         info["devicename"] = devicename
 
         lpath = self.get_data(("metadata_files_in_archive", "core_info"))
-        f = open(lpath, "w+")
-        f.write(json.dumps(info, indent=4))
-        f.close()
 
-        return lpath
+        return lpath, json.dumps(info, indent=4)
+
+
+class AzureFileTarget:
+    """ Uploads to an Azure file share. The size of a file is unknown until
+        the compressed stream ends, so the file is created with an upper bound
+        of its size, written range by range and truncated at the end.
+    """
+
+    def __init__(self, account_name, account_key, share_name):
+        self.svc = FileService(account_name=account_name, account_key=account_key)
+        self.share_name = share_name
+
+    def create_dirs(self, dir_elems):
+        e = []
+        while len(e) != len(dir_elems):
+            e.append(dir_elems[len(e)])
+            self.svc.create_directory(self.share_name, "/".join(e))
+
+    def create_file(self, dirname, fname, max_size):
+        self.svc.create_file(self.share_name, dirname, fname, max_size)
+
+    def write_range(self, dirname, fname, offset, data):
+        self.svc.update_range(self.share_name, dirname, fname, data,
+                start_range=offset, end_range=offset + len(data) - 1)
+
+    def close_file(self, dirname, fname, size):
+        self.svc.resize_file(self.share_name, dirname, fname, size)
+
+
+class LocalDirTarget:
+    """ Stand-in upload target writing into a local directory """
+
+    def __init__(self, root):
+        self.root = root
+
+    def create_dirs(self, dir_elems):
+        path = os.path.join(self.root, *dir_elems)
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def create_file(self, dirname, fname, max_size):
+        open(os.path.join(self.root, dirname, fname), "wb").close()
+
+    def write_range(self, dirname, fname, offset, data):
+        with open(os.path.join(self.root, dirname, fname), "r+b") as f:
+            f.seek(offset)
+            f.write(data)
+
+    def close_file(self, dirname, fname, size):
+        with open(os.path.join(self.root, dirname, fname), "r+b") as f:
+            f.truncate(size)
+
+
+class ChunkedUploadWriter(io.RawIOBase):
+    """ Write-only stream which uploads the data written to it in chunks """
+
+    def __init__(self, target, dirname, fname, max_size):
+        self.target = target
+        self.dirname = dirname
+        self.fname = fname
+        self.offset = 0
+        self.buf = bytearray()
+        self.target.create_file(dirname, fname, max_size)
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buf.extend(data)
+        while len(self.buf) >= UPLOAD_CHUNK_SIZE:
+            self._flush_chunk(UPLOAD_CHUNK_SIZE)
+        return len(data)
+
+    def _flush_chunk(self, size):
+        chunk = bytes(self.buf[:size])
+        del self.buf[:size]
+        self.target.write_range(self.dirname, self.fname, self.offset, chunk)
+        self.offset += len(chunk)
+
+    def close(self):
+        if not self.closed:
+            if self.buf:
+                self._flush_chunk(len(self.buf))
+            self.target.close_file(self.dirname, self.fname, self.offset)
+        io.RawIOBase.close(self)
+
+
+def get_archive_max_size(paths, extra_size):
+    """ Upper bound of the size of a gzip compressed tar of the given files:
+        a header and padding block per file, the end of archive blocks and the
+        overhead of deflate stored blocks when data does not compress.
+    """
+    size = extra_size
+    for p in paths:
+        size += os.stat(p).st_size + (2 * tarfile.BLOCKSIZE)
+    size += tarfile.RECORDSIZE
+    return size + (size // 16384 + 1) * 5 + 1024
+
+
+def get_retry_pause(retry):
+    """ Pause before the given retry of an upload, 1 for the first """
+    return min(PAUSE_ON_FAIL, RETRY_BACKOFF_BASE * (2 ** min(retry - 1, 16)))
 
 
 class Watcher:
@@ -121,6 +226,8 @@ class Watcher:
         try:
             while True:
                 time.sleep(POLL_SLEEP)
+                # cores whose processing failed, e.g. written too slowly
+                Handler.scan()
         except:
             self.observer.stop()
             log_err("Error in watcher")
@@ -135,10 +242,15 @@ def set_env(lst):
 
 class Handler(FileSystemEventHandler):
 
+    executor = ThreadPoolExecutor(max_workers=MAX_UPLOAD_WORKERS)
+    in_flight = set()
+    lock = threading.Lock()
+    target = None
+
     @staticmethod
     def init():
         global hostname, sonicversion, asicname, acctname, acctkey, sharename
-        global cwd, cfg
+        global cfg
 
         cfg = config()
 
@@ -169,12 +281,11 @@ class Handler(FileSystemEventHandler):
         if not asicname:
             raise Exception("Failed to read asic_type from /etc/sonic/sonic_version.yml")
 
-        cwd = cfg.get_data(("local_work", "core_upload")).split("/")
-        if not len(cwd) > 2:
-            raise Exception("Invalid path for core_upload. Expect a min of two elements in path")
-
         os.chdir(INIT_CWD)
 
+        if Handler.target is None:
+            Handler.target = AzureFileTarget(acctname, acctkey, sharename)
+
     @staticmethod
     def on_any_event(event):
         if event.is_directory:
@@ -183,8 +294,32 @@ class Handler(FileSystemEventHandler):
         elif event.event_type == 'created':
             # Take any action here when a file is first created.
             log_debug("Received create event - " +  event.src_path)
-            Handler.wait_for_file_write_complete(event.src_path)
-            Handler.handle_file(event.src_path)
+            Handler.submit(event.src_path, True)
+
+    @staticmethod
+    def submit(path, wait_for_write):
+        # Cores are processed by the worker pool so that the watchdog thread
+        # is never blocked by a large core being written or uploaded.
+        with Handler.lock:
+            if path in Handler.in_flight:
+                return
+            Handler.in_flight.add(path)
+        Handler.executor.submit(Handler.process_file, path, wait_for_write)
+
+    @staticmethod
+    def process_file(path, wait_for_write):
+        try:
+            if wait_for_write:
+                Handler.wait_for_file_write_complete(path)
+            i = 0
+            while os.path.exists(path) and not Handler.upload_locked(path):
+                i += 1
+                time.sleep(get_retry_pause(i))
+        except Exception as ex:
+            log_err("core uploader failed: (" + path + ") err: (" + str(ex) + ")")
+        finally:
+            with Handler.lock:
+                Handler.in_flight.discard(path)
 
 
     @staticmethod
@@ -209,61 +344,73 @@ class Handler(FileSystemEventHandler):
 
 
     @staticmethod
-    def handle_file(path):
-        lpath = "/".join(cwd)
-        make_new_dir(lpath)
-        os.chdir(lpath)
-
-        # Create a new archive with core & more.
-        metafiles = cfg.get_dict()["metadata_files_in_archive"]
+    def upload_locked(path):
+        # Hold a shared lock on the core while it is uploaded, so that
+        # core_cleanup.py does not delete it from under the upload. It is
+        # released between the attempts.
+        try:
+            core = open(path, "rb")
+        except IOError:
+            # deleted meanwhile
+            return True
+        with core:
+            fcntl.flock(core.fileno(), fcntl.LOCK_SH)
+            return Handler.handle_file(path)
 
+    @staticmethod
+    def handle_file(path):
         fname = os.path.basename(path)
         tarf_name = fname + ".tar.gz"
 
-        cfg.get_core_info(path, hostname)
-        
-        tar = tarfile.open(tarf_name, "w:gz")
+        if not Handler.upload_file(tarf_name, path):
+            return False
+
+        log_debug("File uploaded - " +  path)
+        return True
+
+    @staticmethod
+    def stream_archive(writer, path):
+        # Create a new archive with core & more, compressed while it is uploaded.
+        metafiles = cfg.get_dict()["metadata_files_in_archive"]
+        info_name, info_data = cfg.get_core_info(path, hostname)
+
+        tar = tarfile.open(fileobj=writer, mode="w|gz")
         for e in metafiles:
+            if metafiles[e] == info_name:
+                continue
             tar.add(metafiles[e])
+        info = tarfile.TarInfo(info_name)
+        info.size = len(info_data)
+        info.mtime = time.time()
+        tar.addfile(info, io.BytesIO(info_data.encode()))
         tar.add(path)
         tar.close()
-        log_debug("Tar file for upload created: " + tarf_name)
-
-        Handler.upload_file(tarf_name, tarf_name, path)
-
-        log_debug("File uploaded - " +  path)
-        os.chdir(INIT_CWD)
 
     @staticmethod
-    def upload_file(fname, fpath, coref):
+    def upload_file(fname, coref):
+        """ Uploads the archive of a core once, returns False if it failed """
         daemonname = fname.split(".")[0]
-        i = 0
-        fail_msg = ""
-        
-        while True:
-            try:
-                svc = FileService(account_name=acctname, account_key=acctkey)
-
-                l = [sonicversion, asicname, daemonname, hostname]
-                e = []
-                while len(e) != len(l):
-                    e.append(l[len(e)])
-                    svc.create_directory(sharename, "/".join(e))
-
-                log_debug("Remote dir created: " + "/".join(e))
-
-                svc.create_file_from_path(sharename, "/".join(l), fname, fpath)
-                log_debug("Remote file created: name{} path{}".format(fname, fpath))
-                newcoref = os.path.dirname(coref) + "/" + UPLOAD_PREFIX + os.path.basename(coref)
-                os.rename(coref, newcoref)
-                break
-
-            except Exception as ex:
-                log_err("core uploader failed: Failed during upload (" + coref + ") err: ("+ str(ex) +") retry:" + str(i))
-                if not os.path.exists(fpath):
-                    break
-                i += 1
-                time.sleep(PAUSE_ON_FAIL)
+        metafiles = cfg.get_dict()["metadata_files_in_archive"]
+        archived = [coref] + [metafiles[e] for e in metafiles if os.path.exists(metafiles[e])]
+
+        try:
+            l = [sonicversion, asicname, daemonname, hostname]
+            Handler.target.create_dirs(l)
+            log_debug("Remote dir created: " + "/".join(l))
+
+            writer = ChunkedUploadWriter(Handler.target, "/".join(l), fname,
+                    get_archive_max_size(archived, tarfile.BLOCKSIZE * 4))
+            Handler.stream_archive(writer, coref)
+            writer.close()
+            log_debug("Remote file created: name{} size{}".format(fname, writer.offset))
+
+            newcoref = os.path.dirname(coref) + "/" + UPLOAD_PREFIX + os.path.basename(coref)
+            os.rename(coref, newcoref)
+            return True
+
+        except Exception as ex:
+            log_err("core uploader failed: Failed during upload (" + coref + ") err: ("+ str(ex) +")")
+            return False
 
 
     @staticmethod
@@ -271,7 +418,7 @@ class Handler(FileSystemEventHandler):
         for e in os.listdir(CORE_FILE_PATH):
             fl = CORE_FILE_PATH + e
             if os.path.isfile(fl) and not e.startswith(UPLOAD_PREFIX):
-                Handler.handle_file(fl)
+                Handler.submit(fl, False)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,228 @@
+import os
+import sys
+import json
+import fcntl
+import random
+import shutil
+import tarfile
+import tempfile
+import types
+
+import mock
+
+UPLOADER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, UPLOADER_DIR)
+
+
+def stub_module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+class ThreadPoolExecutor(object):
+    """
+    Runs the jobs submitted at once, in the caller
+    """
+    def __init__(self, max_workers):
+        pass
+
+    def submit(self, func, *args):
+        func(*args)
+
+
+# The upload path only needs the stream and the target, not the watchdog,
+# Azure and yaml packages of the image
+watchdog = stub_module('watchdog')
+azure = stub_module('azure')
+azure_storage = stub_module('azure.storage')
+with mock.patch.dict(sys.modules, {
+        'watchdog': watchdog,
+        'watchdog.observers': stub_module('watchdog.observers', Observer=object),
+        'watchdog.events': stub_module('watchdog.events', FileSystemEventHandler=object),
+        'azure': azure,
+        'azure.storage': azure_storage,
+        'azure.storage.file': stub_module('azure.storage.file', FileService=object),
+        'yaml': stub_module('yaml'),
+        'concurrent': stub_module('concurrent'),
+        'concurrent.futures': stub_module('concurrent.futures', ThreadPoolExecutor=ThreadPoolExecutor)}):
+    import core_uploader
+
+ChunkedUploadWriter = core_uploader.ChunkedUploadWriter
+LocalDirTarget = core_uploader.LocalDirTarget
+Handler = core_uploader.Handler
+
+CHUNK_SIZE = 64 * 1024
+REMOTE_DIR = ['201911.1', 'broadcom', 'orchagent', 'switch1']
+
+
+class Config(object):
+    """
+    core_analyzer.rc.json with metadata files in the work directory
+    """
+    def __init__(self, root):
+        self.metafiles = {}
+        for name in ('version', 'syslog'):
+            path = os.path.join(root, name)
+            with open(path, 'w') as f:
+                f.write(name * 100)
+            self.metafiles[name] = path
+        self.metafiles['core_info'] = 'core_info.json'
+
+    def get_dict(self):
+        return {'metadata_files_in_archive': self.metafiles}
+
+    def get_core_info(self, corepath, devicename):
+        return 'core_info.json', json.dumps({'corefname': os.path.basename(corepath)})
+
+
+class RecordingTarget(LocalDirTarget):
+    """
+    LocalDirTarget keeping the ranges written, failing the first failures
+    uploads
+    """
+    def __init__(self, root, failures=0):
+        LocalDirTarget.__init__(self, root)
+        self.failures = failures
+        self.ranges = []
+        self.max_size = None
+        self.size = None
+
+    def create_dirs(self, dir_elems):
+        if self.failures:
+            self.failures -= 1
+            raise IOError('share unreachable')
+        LocalDirTarget.create_dirs(self, dir_elems)
+
+    def create_file(self, dirname, fname, max_size):
+        self.max_size = max_size
+        self.ranges = []
+        LocalDirTarget.create_file(self, dirname, fname, max_size)
+
+    def write_range(self, dirname, fname, offset, data):
+        self.ranges.append((offset, len(data)))
+        LocalDirTarget.write_range(self, dirname, fname, offset, data)
+
+    def close_file(self, dirname, fname, size):
+        self.size = size
+        LocalDirTarget.close_file(self, dirname, fname, size)
+
+
+class TestUpload(object):
+
+    def setup_method(self, method):
+        self.root = tempfile.mkdtemp()
+        self.cores = os.path.join(self.root, 'core')
+        self.share = os.path.join(self.root, 'share')
+        os.makedirs(self.cores)
+        os.makedirs(self.share)
+        self.core = os.path.join(self.cores, 'orchagent.1571000000.12.core.gz')
+        # half random, half compressible
+        rand = random.Random(0)
+        self.core_data = bytes(bytearray(rand.getrandbits(8) for _ in range(200 * 1024))) + b'\0' * (200 * 1024)
+        with open(self.core, 'wb') as f:
+            f.write(self.core_data)
+
+        self.target = RecordingTarget(self.share)
+        self.sleeps = []
+        self.patches = [
+            mock.patch.object(core_uploader, 'UPLOAD_CHUNK_SIZE', CHUNK_SIZE),
+            mock.patch.object(core_uploader, 'CORE_FILE_PATH', self.cores + '/'),
+            mock.patch.object(core_uploader, 'cfg', Config(self.root), create=True),
+            mock.patch.object(core_uploader, 'sonicversion', REMOTE_DIR[0]),
+            mock.patch.object(core_uploader, 'asicname', REMOTE_DIR[1]),
+            mock.patch.object(core_uploader, 'hostname', REMOTE_DIR[3]),
+            mock.patch.object(core_uploader, 'log_level', 0),
+            mock.patch.object(core_uploader.time, 'sleep', self.sleep),
+            mock.patch.object(Handler, 'target', self.target),
+            mock.patch.object(Handler, 'executor', ThreadPoolExecutor(1)),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def teardown_method(self, method):
+        for patch in reversed(self.patches):
+            patch.stop()
+        shutil.rmtree(self.root)
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        # the core isn't locked while waiting
+        with open(self.core, 'rb') as core:
+            fcntl.flock(core.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def remote_path(self):
+        return os.path.join(self.share, *(REMOTE_DIR + [os.path.basename(self.core) + '.tar.gz']))
+
+    def check_archive(self, path):
+        with tarfile.open(path, 'r:gz') as tar:
+            names = tar.getnames()
+            assert names[-1] == self.core.lstrip('/')
+            assert tar.extractfile(names[-1]).read() == self.core_data
+            info = json.loads(tar.extractfile('core_info.json').read().decode())
+            assert info['corefname'] == os.path.basename(self.core)
+        return names
+
+    def test_stream(self):
+        os.makedirs(os.path.join(self.share, 'dir'))
+        writer = ChunkedUploadWriter(self.target, 'dir', 'core.tar.gz', 10 * 1024 * 1024)
+        Handler.stream_archive(writer, self.core)
+        writer.close()
+
+        path = os.path.join(self.share, 'dir', 'core.tar.gz')
+        assert os.path.getsize(path) == writer.offset == self.target.size
+        # contiguous ranges, all full but the last
+        offset = 0
+        for start, size in self.target.ranges:
+            assert start == offset
+            offset += size
+        assert offset == writer.offset
+        assert all(size == CHUNK_SIZE for start, size in self.target.ranges[:-1])
+        assert len(self.target.ranges) > 1
+        self.check_archive(path)
+
+    def test_upload(self):
+        Handler.submit(self.core, False)
+
+        path = self.remote_path()
+        assert os.path.getsize(path) == self.target.size <= self.target.max_size
+        names = self.check_archive(path)
+        assert len(names) == 4
+        assert not os.path.exists(self.core)
+        assert os.path.exists(os.path.join(self.cores, 'UPLOADED_' + os.path.basename(self.core)))
+        assert self.sleeps == []
+        assert Handler.in_flight == set()
+
+    def test_retry_until_uploaded(self):
+        # an outage longer than the retries before
+        self.target.failures = 12
+        Handler.submit(self.core, False)
+
+        assert self.sleeps == [60, 120, 240, 480, 960, 1920] + [3600] * 6
+        self.check_archive(self.remote_path())
+        assert not os.path.exists(self.core)
+
+    def test_core_deleted(self):
+        self.target.failures = 100
+        def sleep(seconds):
+            self.sleeps.append(seconds)
+            if len(self.sleeps) == 3:
+                os.remove(self.core)
+        with mock.patch.object(core_uploader.time, 'sleep', sleep):
+            Handler.submit(self.core, False)
+        assert len(self.sleeps) == 3
+        assert Handler.in_flight == set()
+
+    def test_scan(self):
+        uploaded = os.path.join(self.cores, 'UPLOADED_syncd.1571000000.1.core.gz')
+        open(uploaded, 'w').close()
+        submitted = []
+        with mock.patch.object(Handler, 'submit', staticmethod(lambda path, wait: submitted.append((path, wait)))):
+            Handler.scan()
+        assert submitted == [(self.core, False)]
+
+
+def test_retry_pause():
+    pauses = [core_uploader.get_retry_pause(retry) for retry in range(1, 9)]
+    assert pauses == [60, 120, 240, 480, 960, 1920, 3600, 3600]
+    assert core_uploader.get_retry_pause(1000) == core_uploader.PAUSE_ON_FAIL
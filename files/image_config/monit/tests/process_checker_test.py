@@ -0,0 +1,125 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import mock
+
+MONIT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# process_checker is a script without the .py extension
+if sys.version_info[0] >= 3:
+    from importlib.machinery import SourceFileLoader
+    process_checker = SourceFileLoader('process_checker', os.path.join(MONIT_DIR, 'process_checker')).load_module()
+else:
+    import imp
+    process_checker = imp.load_source('process_checker', os.path.join(MONIT_DIR, 'process_checker'))
+
+
+class FakeProc(object):
+    """
+    Fake /proc with the stat, cmdline, exe and ns/net entries process_checker reads
+    """
+    def __init__(self):
+        self.root = tempfile.mkdtemp()
+
+    def set_process(self, pid, comm, cmdline, exe, state='S', start_time=1000):
+        pid_dir = os.path.join(self.root, str(pid))
+        if not os.path.isdir(pid_dir):
+            os.makedirs(pid_dir)
+        fields = [state, '1'] + ['0'] * 17 + [str(start_time)] + ['0'] * 10
+        with open(os.path.join(pid_dir, 'stat'), 'w') as f:
+            f.write('{} ({}) {}\n'.format(pid, comm, ' '.join(fields)))
+        with open(os.path.join(pid_dir, 'cmdline'), 'w') as f:
+            f.write('\x00'.join(cmdline.split(' ')) + '\x00')
+        if not os.path.isdir(os.path.join(pid_dir, 'ns')):
+            os.makedirs(os.path.join(pid_dir, 'ns'))
+            open(os.path.join(pid_dir, 'ns', 'net'), 'w').close()
+        exe_path = os.path.join(pid_dir, 'exe')
+        if os.path.lexists(exe_path):
+            os.unlink(exe_path)
+        os.symlink(exe, exe_path)
+
+    def cleanup(self):
+        shutil.rmtree(self.root)
+
+
+class TestProcessTable(object):
+    def setup_method(self, method):
+        self.proc = FakeProc()
+
+    def teardown_method(self, method):
+        self.proc.cleanup()
+
+    def scan(self, cmdline_cache):
+        table = process_checker.ProcessTable(self.proc.root, cmdline_cache)
+        processes = table.scan()
+        return table, dict((pid, cmdline) for pid, _, cmdline in processes)
+
+    def test_cmdline_cached(self):
+        self.proc.set_process(100, 'bgpd', '/usr/lib/frr/bgpd -A 127.0.0.1', '/usr/lib/frr/bgpd')
+        self.proc.set_process(101, 'zebra', '/usr/lib/frr/zebra -A 127.0.0.1', '/usr/lib/frr/zebra')
+
+        table, processes = self.scan(None)
+        assert processes[100] == '/usr/lib/frr/bgpd -A 127.0.0.1'
+        assert table.cmdline_reads == 2
+
+        table, processes = self.scan(table.cmdline_cache)
+        assert processes[101] == '/usr/lib/frr/zebra -A 127.0.0.1'
+        assert table.cmdline_reads == 0
+
+    def test_cmdline_changed_by_exec(self):
+        # Child of supervisord between fork() and exec()
+        self.proc.set_process(200, 'supervisord', '/usr/bin/python /usr/bin/supervisord', '/usr/bin/python2.7')
+        table, processes = self.scan(None)
+        assert processes[200] == '/usr/bin/python /usr/bin/supervisord'
+
+        # Same pid and start time after exec()
+        self.proc.set_process(200, 'orchagent', '/usr/bin/orchagent -d /var/log/swss', '/usr/bin/orchagent')
+        table, processes = self.scan(table.cmdline_cache)
+        assert processes[200] == '/usr/bin/orchagent -d /var/log/swss'
+        assert table.cmdline_reads == 1
+
+    def test_cmdline_changed_by_exec_of_same_interpreter(self):
+        self.proc.set_process(300, 'supervisord', '/usr/bin/python /usr/bin/supervisord', '/usr/bin/python2.7')
+        table, processes = self.scan(None)
+
+        self.proc.set_process(300, 'python', '/usr/bin/python /usr/bin/lldpmgrd', '/usr/bin/python2.7')
+        table, processes = self.scan(table.cmdline_cache)
+        assert processes[300] == '/usr/bin/python /usr/bin/lldpmgrd'
+
+    def test_cache_of_previous_version(self):
+        self.proc.set_process(400, 'bgpd', '/usr/lib/frr/bgpd -A 127.0.0.1', '/usr/lib/frr/bgpd')
+        table, processes = self.scan({'400': ['1000', '/usr/bin/python /usr/bin/supervisord']})
+        assert processes[400] == '/usr/lib/frr/bgpd -A 127.0.0.1'
+
+
+class TestCheckProcesses(object):
+    def setup_method(self, method):
+        self.proc = FakeProc()
+        self.cache_dir = tempfile.mkdtemp()
+        self.patches = [
+            mock.patch.object(process_checker, 'CMDLINE_CACHE_FILE', os.path.join(self.cache_dir, 'cmdline.json')),
+            mock.patch.object(process_checker, 'CACHE_DIR', self.cache_dir),
+            mock.patch.object(process_checker.multi_asic, 'NAMESPACE_PATH_GLOB', os.path.join(self.cache_dir, 'netns', '*')),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def teardown_method(self, method):
+        for patch in reversed(self.patches):
+            patch.stop()
+        self.proc.cleanup()
+        shutil.rmtree(self.cache_dir)
+
+    def test_process_started_after_previous_cycle(self):
+        feature_table = {'swss': {'state': 'enabled'}}
+        checks = [('swss', '/usr/bin/orchagent')]
+
+        self.proc.set_process(500, 'supervisord', '/usr/bin/python /usr/bin/supervisord', '/usr/bin/python2.7')
+        results = process_checker.check_processes(checks, self.proc.root, feature_table)
+        assert results[checks[0]] == "'/usr/bin/orchagent' is not running in host"
+
+        self.proc.set_process(500, 'orchagent', '/usr/bin/orchagent -d /var/log/swss', '/usr/bin/orchagent')
+        results = process_checker.check_processes(checks, self.proc.root, feature_table)
+        assert results[checks[0]] == ''
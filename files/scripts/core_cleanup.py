@@ -1,8 +1,12 @@
 #!/usr/bin/env python
 
+import argparse
+import errno
+import fcntl
+import heapq
 import os
-from collections import defaultdict
-from datetime import datetime
+import threading
+import time
 
 from sonic_py_common.logger import Logger
 
@@ -10,33 +14,245 @@ SYSLOG_IDENTIFIER = 'core_cleanup.py'
 CORE_FILE_DIR = '/var/core/'
 MAX_CORE_FILES = 4
 
+# Quotas on all the cores together: total size in MB and age in days
+MAX_CORE_TOTAL_SIZE = 2048
+MAX_CORE_AGE = 30
+
+# Prefix added by core_uploader to cores which have been uploaded
+UPLOAD_PREFIX = 'UPLOADED_'
+
+# Interval at which the age quota is enforced in watch mode
+AGE_CHECK_INTERVAL = (60 * 60)
+
+logger = Logger(SYSLOG_IDENTIFIER)
+
+
+class CoreFile(object):
+    def __init__(self, name, process, timestamp, size):
+        self.name = name
+        self.process = process
+        self.timestamp = timestamp
+        self.size = size
+
+
+class CoreRetention(object):
+    """
+    Index of the core files of CORE_FILE_DIR. Cores are kept in a min-heap per
+    process and in a global one, ordered by the timestamp of their name, so the
+    oldest cores are found without sorting the directory. Heaps are cleaned
+    lazily: entries which are no longer in self.cores are skipped when popped.
+    """
+    def __init__(self, core_dir=CORE_FILE_DIR, max_files=MAX_CORE_FILES, max_total_size=0, max_age=0):
+        self.core_dir = core_dir
+        self.max_files = max_files
+        self.max_total_size = max_total_size
+        self.max_age = max_age
+
+        self.cores = {}
+        self.total_size = 0
+        self.count_by_process = {}
+        self.heap_by_process = {}
+        self.global_heap = []
+
+    @staticmethod
+    def parse_name(name, mtime):
+        # Cores are named <process>.<timestamp>.<pid>.core.gz
+        fields = (name[len(UPLOAD_PREFIX):] if name.startswith(UPLOAD_PREFIX) else name).split('.')
+        try:
+            timestamp = int(fields[1])
+        except (IndexError, ValueError):
+            timestamp = int(mtime)
+        return fields[0], timestamp
+
+    def add(self, name):
+        try:
+            st = os.stat(os.path.join(self.core_dir, name))
+        except OSError:
+            self.remove(name)
+            return
+
+        core = self.cores.get(name)
+        if core is not None:
+            self.total_size += st.st_size - core.size
+            core.size = st.st_size
+            return
+
+        process, timestamp = self.parse_name(name, st.st_mtime)
+        core = CoreFile(name, process, timestamp, st.st_size)
+        self.cores[name] = core
+        self.total_size += core.size
+        self.count_by_process[process] = self.count_by_process.get(process, 0) + 1
+        entry = (core.timestamp, name)
+        heapq.heappush(self.heap_by_process.setdefault(process, []), entry)
+        heapq.heappush(self.global_heap, entry)
+
+    def remove(self, name):
+        core = self.cores.pop(name, None)
+        if core is None:
+            return
+        self.total_size -= core.size
+        self.count_by_process[core.process] -= 1
+
+        # Drop the stale entries once they outnumber the indexed cores
+        if len(self.global_heap) > 2 * len(self.cores) + 16:
+            self.global_heap = [(c.timestamp, c.name) for c in self.cores.values()]
+            heapq.heapify(self.global_heap)
+            self.heap_by_process = {}
+            for c in self.cores.values():
+                self.heap_by_process.setdefault(c.process, []).append((c.timestamp, c.name))
+            for heap in self.heap_by_process.values():
+                heapq.heapify(heap)
+
+    def scan(self):
+        for name in os.listdir(self.core_dir):
+            if os.path.isfile(os.path.join(self.core_dir, name)):
+                self.add(name)
+
+    def delete_core(self, name):
+        """
+        Delete a core unless core_uploader holds a lock on it while uploading it.
+        """
+        path = os.path.join(self.core_dir, name)
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            self.remove(name)
+            return True
+
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except (IOError, OSError) as e:
+            os.close(fd)
+            if e.errno in (errno.EAGAIN, errno.EACCES):
+                logger.log_info('Keeping {} which is being uploaded'.format(name))
+                return False
+            raise
+
+        try:
+            logger.log_info('Deleting {}'.format(name))
+            os.remove(path)
+        except OSError:
+            logger.log_error('Unexpected error occured trying to delete {}'.format(name))
+            return False
+        finally:
+            os.close(fd)
+
+        self.remove(name)
+        return True
+
+    def _pop_oldest(self, heap, candidates):
+        """
+        Delete the oldest deletable core of a heap for which candidates() is true.
+        Cores which are locked are pushed back once a deletable one is found.
+        """
+        kept = []
+        deleted = False
+        while heap and candidates():
+            timestamp, name = heapq.heappop(heap)
+            if name not in self.cores or self.cores[name].timestamp != timestamp:
+                continue
+            if self.delete_core(name):
+                deleted = True
+                break
+            kept.append((timestamp, name))
+        for entry in kept:
+            heapq.heappush(heap, entry)
+        return deleted
+
+    def enforce(self, now=None):
+        if now is None:
+            now = time.time()
+
+        if self.max_files:
+            for process in list(self.heap_by_process):
+                def too_many_files():
+                    return self.count_by_process.get(process, 0) > self.max_files
+                while too_many_files() and self._pop_oldest(self.heap_by_process[process], too_many_files):
+                    pass
+
+        if self.max_age:
+            def too_old():
+                return self.global_heap and self.global_heap[0][0] < now - self.max_age
+            while too_old() and self._pop_oldest(self.global_heap, too_old):
+                pass
+
+        if self.max_total_size:
+            def too_large():
+                return self.total_size > self.max_total_size
+            while too_large() and self._pop_oldest(self.global_heap, too_large):
+                pass
+
+
+def watch(retention):
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+
+    lock = threading.Lock()
+
+    def handle_event(event):
+        if event.event_type in ('created', 'modified'):
+            retention.add(os.path.basename(event.src_path))
+        elif event.event_type == 'deleted':
+            retention.remove(os.path.basename(event.src_path))
+        elif event.event_type == 'moved':
+            retention.remove(os.path.basename(event.src_path))
+            if os.path.dirname(event.dest_path) == os.path.dirname(event.src_path):
+                retention.add(os.path.basename(event.dest_path))
+        retention.enforce()
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.is_directory:
+                return
+            with lock:
+                handle_event(event)
+
+    observer = Observer()
+    observer.schedule(Handler(), retention.core_dir)
+    observer.start()
+
+    # Index the cores which landed before the observer was started
+    with lock:
+        retention.scan()
+        retention.enforce()
+
+    try:
+        while True:
+            time.sleep(AGE_CHECK_INTERVAL)
+            with lock:
+                retention.enforce()
+    finally:
+        observer.stop()
+        observer.join()
+
+
 def main():
-    logger = Logger(SYSLOG_IDENTIFIER)
+    parser = argparse.ArgumentParser(description='Clean up core files in {}'.format(CORE_FILE_DIR))
+    parser.add_argument('--watch', action='store_true', help='keep running and enforce quotas as cores land')
+    parser.add_argument('--max-files', type=int, default=MAX_CORE_FILES, help='maximum number of cores per process')
+    parser.add_argument('--max-total-size', type=int, default=MAX_CORE_TOTAL_SIZE,
+                        help='maximum total size of cores in MB, 0 for no limit')
+    parser.add_argument('--max-age', type=int, default=MAX_CORE_AGE, help='maximum age of cores in days, 0 for no limit')
+    args = parser.parse_args()
+
     logger.set_min_log_priority_info()
 
     if os.getuid() != 0:
         logger.log_error('Root required to clean up core files')
         return
 
-    logger.log_info('Cleaning up core files')
-    core_files = [f for f in os.listdir(CORE_FILE_DIR) if os.path.isfile(os.path.join(CORE_FILE_DIR, f))]
-
-    core_files_by_process = defaultdict(list)
-    for f in core_files:
-        process = f.split('.')[0]
-        curr_files = core_files_by_process[process]
-        curr_files.append(f)
-
-        if len(curr_files) > MAX_CORE_FILES:
-            curr_files.sort(reverse = True, key = lambda x: datetime.utcfromtimestamp(int(x.split('.')[1])))
-            oldest_core = curr_files[MAX_CORE_FILES]
-            logger.log_info('Deleting {}'.format(oldest_core))
-            try:
-                os.remove(os.path.join(CORE_FILE_DIR, oldest_core))
-            except:
-                logger.log_error('Unexpected error occured trying to delete {}'.format(oldest_core))
-            core_files_by_process[process] = curr_files[0:MAX_CORE_FILES]
+    retention = CoreRetention(max_files=args.max_files,
+                              max_total_size=args.max_total_size * 1024 * 1024,
+                              max_age=args.max_age * 24 * 60 * 60)
+
+    if args.watch:
+        logger.log_info('Watching core files')
+        watch(retention)
+        return
 
+    logger.log_info('Cleaning up core files')
+    retention.scan()
+    retention.enforce()
     logger.log_info('Finished cleaning up core files')
 
 if __name__ == '__main__':
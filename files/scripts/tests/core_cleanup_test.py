@@ -0,0 +1,150 @@
+import os
+import sys
+import fcntl
+import shutil
+import tempfile
+
+import mock
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+import core_cleanup
+from core_cleanup import CoreRetention
+
+NOW = 1600000000
+DAY = 24 * 60 * 60
+
+
+class TestCoreRetention(object):
+
+    def setup_method(self, method):
+        self.core_dir = tempfile.mkdtemp()
+        self.patches = [mock.patch.object(core_cleanup, 'logger')]
+        for patch in self.patches:
+            patch.start()
+
+    def teardown_method(self, method):
+        for patch in reversed(self.patches):
+            patch.stop()
+        shutil.rmtree(self.core_dir)
+
+    def make_core(self, process, timestamp, size=1024, prefix=''):
+        name = '{}{}.{}.{}.core.gz'.format(prefix, process, timestamp, 100 + timestamp % 100)
+        with open(os.path.join(self.core_dir, name), 'wb') as f:
+            f.write(b'\0' * size)
+        return name
+
+    def cores(self):
+        return sorted(os.listdir(self.core_dir))
+
+    def retention(self, **quotas):
+        retention = CoreRetention(self.core_dir, **quotas)
+        retention.scan()
+        return retention
+
+    def test_max_files(self):
+        # in the order the cores landed, not the order of their names
+        orchagent = [self.make_core('orchagent', NOW - i) for i in (3, 40, 1, 20, 2)]
+        syncd = [self.make_core('syncd', NOW - i) for i in (5, 50)]
+        uploaded = self.make_core('orchagent', NOW - 30, prefix=core_cleanup.UPLOAD_PREFIX)
+
+        retention = self.retention(max_files=3)
+        assert retention.count_by_process == {'orchagent': 6, 'syncd': 2}
+        retention.enforce(NOW)
+
+        # the 3 oldest orchagent cores, uploaded or not
+        assert self.cores() == sorted([orchagent[0], orchagent[2], orchagent[4]] + syncd)
+        assert uploaded not in retention.cores
+        assert retention.count_by_process == {'orchagent': 3, 'syncd': 2}
+        assert retention.total_size == 5 * 1024
+
+    def test_max_total_size(self):
+        names = [self.make_core('orchagent', NOW - 10, 300),
+                 self.make_core('syncd', NOW - 30, 200),
+                 self.make_core('bgpd', NOW - 20, 400),
+                 self.make_core('syncd', NOW - 5, 100)]
+        retention = self.retention(max_files=0, max_total_size=600)
+        retention.enforce(NOW)
+
+        # oldest first across processes: syncd then bgpd
+        assert self.cores() == sorted([names[0], names[3]])
+        assert retention.total_size == 400
+
+    def test_max_age(self):
+        old = self.make_core('orchagent', NOW - 31 * DAY)
+        recent = self.make_core('orchagent', NOW - 29 * DAY)
+        retention = self.retention(max_files=0, max_age=30 * DAY)
+        retention.enforce(NOW)
+        assert self.cores() == [recent]
+        assert list(retention.cores) == [recent]
+
+    def test_unnamed(self):
+        # a name without a timestamp is ordered by its mtime
+        name = 'core.txt'
+        with open(os.path.join(self.core_dir, name), 'w') as f:
+            f.write('core')
+        os.utime(os.path.join(self.core_dir, name), (NOW - 100, NOW - 100))
+        assert CoreRetention.parse_name(name, NOW - 100) == ('core', NOW - 100)
+        assert CoreRetention.parse_name('UPLOADED_syncd.123.4.core.gz', NOW) == ('syncd', 123)
+
+        retention = self.retention(max_files=0, max_age=50)
+        retention.enforce(NOW)
+        assert self.cores() == []
+
+    def test_vanished(self):
+        names = [self.make_core('orchagent', NOW - i) for i in (4, 3, 2, 1)]
+        retention = self.retention(max_files=2)
+
+        # deleted behind the back of the index: skipped without an error
+        os.remove(os.path.join(self.core_dir, names[0]))
+        retention.enforce(NOW)
+        assert self.cores() == names[2:]
+        assert sorted(retention.cores) == names[2:]
+        assert retention.count_by_process == {'orchagent': 2}
+        assert retention.total_size == 2 * 1024
+
+        # removed from the index: left in the heaps until popped
+        retention.remove(names[2])
+        assert (NOW - 2, names[2]) in retention.global_heap
+        assert retention.count_by_process == {'orchagent': 1}
+        retention.add(names[2])
+        assert retention.count_by_process == {'orchagent': 2}
+
+    def test_stale_entries_dropped(self):
+        retention = CoreRetention(self.core_dir)
+        names = [self.make_core('orchagent', NOW - i) for i in range(40)]
+        for name in names:
+            retention.add(name)
+        for name in names[:-1]:
+            retention.remove(name)
+        # the heaps were rebuilt from the index instead of growing
+        assert len(retention.global_heap) <= 2 * len(retention.cores) + 16
+        assert len(retention.heap_by_process['orchagent']) <= 2 * len(retention.cores) + 16
+        assert retention.total_size == 1024
+
+    def test_resized(self):
+        name = self.make_core('orchagent', NOW, 100)
+        retention = self.retention()
+        with open(os.path.join(self.core_dir, name), 'ab') as f:
+            f.write(b'\0' * 50)
+        retention.add(name)
+        assert retention.total_size == 150
+        assert len(retention.global_heap) == 1
+
+    def test_locked(self):
+        names = [self.make_core('orchagent', NOW - i) for i in (4, 3, 2, 1)]
+        retention = self.retention(max_files=2)
+
+        # the oldest is being uploaded: the next ones go instead
+        with open(os.path.join(self.core_dir, names[0]), 'rb') as core:
+            fcntl.flock(core.fileno(), fcntl.LOCK_SH)
+            retention.enforce(NOW)
+            assert self.cores() == [names[0], names[3]]
+            assert (NOW - 4, names[0]) in retention.heap_by_process['orchagent']
+
+        # kept in the heap and deleted once the upload is done
+        retention.max_files = 1
+        retention.enforce(NOW)
+        assert self.cores() == [names[3]]
+        assert list(retention.cores) == [names[3]]
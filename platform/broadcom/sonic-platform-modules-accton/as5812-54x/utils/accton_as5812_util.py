@@ -37,6 +37,7 @@ import re
 import time
 import pickle
 from collections import namedtuple
+from sysfs_snapshot import take_snapshot, format_snapshot
 
 PROJECT_NAME = 'as5812_54x'
 version = '0.2.0'
@@ -633,16 +634,26 @@ def get_value(input):
     digit = re.findall('\d+', input)
     return int(digit[0])
 
-def print_1_device_traversal(i, j, k):
-    ret, log = log_os_system("cat "+k, 0)
-    func = k.split("/")[-1].strip()
-    func = re.sub(j+'_','',func,1)
-    func = re.sub(i.lower()+'_','',func,1)
-    if ret==0:
-        return func+"="+log+" "
-    else:
-        return func+"="+"X"+" "
- 
+def snapshot_devices():
+    """
+    ALL_DEVICE with the sfp attributes read from the CPLD of their port
+    """
+    devices = dict(ALL_DEVICE)
+    devices['sfp'] = {}
+    for j in ALL_DEVICE['sfp']:
+        port_index = int(filter(str.isdigit,  j))
+        devices['sfp'][j] = []
+        for k in ALL_DEVICE['sfp'][j]:
+            if k.find('tx_disable')!= -1:
+                ret, k = get_path_sfp_tx_dis(port_index)
+            elif k.find('present')!= -1:
+                ret, k = get_path_sfp_presence(port_index)
+            else:
+                continue
+            if ret:
+                devices['sfp'][j].append(k)
+    return devices
+
 def device_traversal():
     if system_ready()==False:
         print("System's not ready.")
@@ -651,38 +662,8 @@ def device_traversal():
 
     if len(ALL_DEVICE)==0:
         devices_info()
-    for i in sorted(ALL_DEVICE.keys()):
-        print("============================================")
-        print(i.upper()+": ")
-        print("============================================")
-
-        for j in sorted(ALL_DEVICE[i].keys(), key=get_value):
-            print "   "+j+":",
-            if i == 'sfp':
-                port_index = int(filter(str.isdigit,  j))
-                for k in (ALL_DEVICE[i][j]):
-                    if k.find('tx_disable')!= -1:
-                        ret, k = get_path_sfp_tx_dis(port_index)
-                        if ret == False:
-                            continue
-                        log = print_1_device_traversal(i, j, k)
-                        print log, 
-                    if k.find('present')!= -1:
-                        ret, k = get_path_sfp_presence(port_index)
-                        if ret == False:
-                            continue
-                        log = print_1_device_traversal(i, j, k)
-                        print log, 
-                     
-            else:
-                for k in (ALL_DEVICE[i][j]):
-                    log = print_1_device_traversal(i, j, k)
-                    print log, 
-            print
-            print("----------------------------------------------------------------")
-
-
-        print
+    for line in format_snapshot(take_snapshot(snapshot_devices())):
+        print line
     return
 
 def device_exist():
@@ -37,6 +37,7 @@ import logging
 import re
 import time
 from collections import namedtuple
+from sysfs_snapshot import take_snapshot, format_snapshot
 
 
 
@@ -556,27 +557,8 @@ def device_traversal():
         
     if len(ALL_DEVICE)==0:
         devices_info()
-    for i in sorted(ALL_DEVICE.keys()):
-        print("============================================")        
-        print(i.upper()+": ")
-        print("============================================")
-         
-        for j in sorted(ALL_DEVICE[i].keys(), key=get_value):    
-            print "   "+j+":",
-            for k in (ALL_DEVICE[i][j]):
-                ret, log = log_os_system("cat "+k, 0)
-                func = k.split("/")[-1].strip()
-                func = re.sub(j+'_','',func,1)
-                func = re.sub(i.lower()+'_','',func,1)                 
-                if ret==0:
-                    print func+"="+log+" ",                  
-                else:
-                    print func+"="+"X"+" ",
-            print                    
-            print("----------------------------------------------------------------")
-                                              
-     
-        print
+    for line in format_snapshot(take_snapshot(ALL_DEVICE)):
+        print line
     return
             
 def device_exist():
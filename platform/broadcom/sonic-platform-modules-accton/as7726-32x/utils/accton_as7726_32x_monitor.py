@@ -37,6 +37,7 @@ try:
     from tabulate import tabulate
     from as7726_32x.fanutil import FanUtil
     from as7726_32x.thermalutil import ThermalUtil
+    from control_loop import ControlLoop, SysfsSensor, Watch
 except ImportError as e:
     raise ImportError('%s - required module not found' % str(e))
 
@@ -65,6 +66,33 @@ global log_level
 #  (Thermal sensor_LM75_4A + Thermal sensor_LM75_CPU) /2 > 67C : Shut down system
 #  One Fan fail:  Change Fan speed to 100%(0x0E)
 #  sensor_LM75_CPU == sensor_LM75_4B
+
+LEVEL_FAN_DEF=0
+LEVEL_FAN_MID=1       
+LEVEL_FAN_MAX=2
+LEVEL_TEMP_HIGH=3
+LEVEL_TEMP_CRITICAL=4  
+
+fan_policy_f2b = {
+   LEVEL_FAN_DEF:       [38,  0x4, 0,     38000],
+   LEVEL_FAN_MID:       [63,  0x6, 38000, 46000],
+   LEVEL_FAN_MAX:       [100, 0xE, 46000, 58000],
+   LEVEL_TEMP_HIGH:     [100, 0xE, 58000, 66000],
+   LEVEL_TEMP_CRITICAL: [100, 0xE, 58000, 200000],
+}
+fan_policy_b2f = {
+   LEVEL_FAN_DEF:       [38,  0x4, 0,     34000],
+   LEVEL_FAN_MID:       [63,  0x8, 34000, 44000],
+   LEVEL_FAN_MAX:       [100, 0xE, 44000, 59000],
+   LEVEL_TEMP_HIGH:     [100, 0xE, 59000, 67000],
+   LEVEL_TEMP_CRITICAL: [100, 0xE, 59000, 200000],
+}
+
+# Sensors are read every SAMPLE_INTERVAL seconds, and the lm75 every FAST_INTERVAL
+# seconds while their average is within THRESHOLD_MARGIN of a policy threshold
+SAMPLE_INTERVAL = 5
+FAST_INTERVAL = 1
+THRESHOLD_MARGIN = 2000
  
      
 class switch(object):
@@ -126,6 +154,38 @@ class device_monitor(object):
         logging.getLogger('').addHandler(sys_handler)
 
         #logging.debug('SET. logfile:%s / loglevel:%d', log_file, log_level)
+
+        fan = FanUtil()
+        fan_dir=fan.get_fan_dir(1)            
+        logging.debug('fan_dir=%s', fan_dir)
+        if fan_dir == 1:
+            self.fan_policy = fan_policy_f2b
+        else:
+            self.fan_policy = fan_policy_b2f
+
+    def get_sensors(self):
+        """
+        The sensors used by manage_fans, named as in the values it gets
+        """
+        thermal = ThermalUtil()
+        fan = FanUtil()
+        sensors = []
+        for name, thermal_num in (('lm75_4a', thermal.THERMAL_NUM_3_IDX),
+                                  ('lm75_4b', thermal.THERMAL_NUM_4_IDX)):
+            sensors.append(SysfsSensor(name, thermal.get_thermal_to_device_path(thermal_num),
+                                       SAMPLE_INTERVAL, FAST_INTERVAL))
+        for i in range (fan.FAN_NUM_1_IDX, fan.FAN_NUM_ON_MAIN_BROAD+1):
+            sensors.append(SysfsSensor('fan%d_fault' % i,
+                                       fan.get_fan_to_device_path(i, fan.FAN_NODE_FAULT_IDX_OF_MAP),
+                                       SAMPLE_INTERVAL))
+        return sensors
+
+    def get_watches(self):
+        """
+        manage_fans compares the average of the lm75 with the policy levels
+        """
+        thresholds = sorted(set(level[3] for level in self.fan_policy.values()))
+        return [Watch(['lm75_4a', 'lm75_4b'], thresholds, THRESHOLD_MARGIN)]
           
     def get_state_from_fan_policy(self, temp, policy):
         state=0
@@ -143,113 +203,53 @@ class device_monitor(object):
         return state
     
 
-    def manage_fans(self):
+    def manage_fans(self, values):
        
         global fan_policy_state
         global fan_fail
-        global test_temp
-        global test_temp_list        
         global alarm_state
-        global temp_test_data
-        
-        LEVEL_FAN_DEF=0
-        LEVEL_FAN_MID=1       
-        LEVEL_FAN_MAX=2
-        LEVEL_TEMP_HIGH=3
-        LEVEL_TEMP_CRITICAL=4  
-        
-        
-        fan_policy_f2b = {
-           LEVEL_FAN_DEF:       [38,  0x4, 0,     38000],
-           LEVEL_FAN_MID:       [63,  0x6, 38000, 46000],
-           LEVEL_FAN_MAX:       [100, 0xE, 46000, 58000],
-           LEVEL_TEMP_HIGH:     [100, 0xE, 58000, 66000],
-           LEVEL_TEMP_CRITICAL: [100, 0xE, 58000, 200000],
-        }
-        fan_policy_b2f = {
-           LEVEL_FAN_DEF:       [38,  0x4, 0,     34000],
-           LEVEL_FAN_MID:       [63,  0x8, 34000, 44000],
-           LEVEL_FAN_MAX:       [100, 0xE, 44000, 59000],
-           LEVEL_TEMP_HIGH:     [100, 0xE, 59000, 67000],
-           LEVEL_TEMP_CRITICAL: [100, 0xE, 59000, 200000],
-        }
-        
-        fan_policy = fan_policy_f2b
         
-        thermal = ThermalUtil()
-        fan = FanUtil()
-        fan_dir=fan.get_fan_dir(1)            
-        if fan_dir == 1:
-            fan_dri=1 #something wrong, set fan_dir to default val
-        else:
-            fan_policy = fan_policy_b2f
-        
-        ori_pwm=fan.get_fan_duty_cycle()
-        new_pwm=0  
-        logging.debug('fan_dir=%d, ori_pwm=%d', fan_dir, ori_pwm)
-        logging.debug('test_temp=%d', test_temp)
+        fan_policy = self.fan_policy
         if test_temp==0: 
-            temp1 = thermal._get_thermal_val(1)
-            temp2 = thermal._get_thermal_val(2)
-            temp3 = thermal._get_thermal_val(3)
-            temp4 = thermal._get_thermal_val(4)
-            temp5 = thermal._get_thermal_val(5)            
+            temp3 = values['lm75_4a']
+            temp4 = values['lm75_4b']
         else:
-            temp1 = test_temp_list[0]
-            temp2 = test_temp_list[1]
             temp3 = test_temp_list[2]
             temp4 = test_temp_list[3]
-            temp5 = test_temp_list[4]            
-            fan_fail=0
        
-        if temp3==0:
+        if not temp3:
             temp_get=50000  # if one detect sensor is fail or zero, assign temp=50000, let fan to 75% 
-            logging.debug('lm75_49 detect fail, so set temp_get=50000, let fan to 75%')
-        elif temp4==0:        
+            logging.debug('lm75_4a detect fail, so set temp_get=50000, let fan to 75%')
+        elif not temp4:        
             temp_get=50000  # if one detect sensor is fail or zero, assign temp=50000, let fan to 75% 
             logging.debug('lm75_4b detect fail, so set temp_get=50000, let fan to 75%')
         else:    
             temp_get= (temp3 + temp4)/2  # Use (sensor_LM75_4a + sensor_LM75_4b) /2 
         ori_state=fan_policy_state
         
-        #temp_test_data=temp_test_data+1000
-        #temp_get = temp_get + temp_test_data
-        #print "Unit test:temp_get=%d"%temp_get
-        
         fan_policy_state=self.get_state_from_fan_policy(temp_get, fan_policy)
-        #print "temp3=%d"%temp3
-        #print "temp4=%d"%temp4
-        #print "temp_get=%d"%temp_get
                         
-        logging.debug('lm75_48=%d, lm75_49=%d, lm75_4a=%d, lm_4b=%d, lm_4b=%d', temp1,temp2,temp3,temp4,temp5)
+        logging.debug('lm75_4a=%s, lm75_4b=%s', temp3, temp4)
         logging.debug('ori_state=%d, fan_policy_state=%d', ori_state, fan_policy_state)
         new_pwm = fan_policy[fan_policy_state][0]
-        if fan_fail==0:
-            logging.debug('new_fan_cycle=%d', new_pwm)
-        
-        if fan_fail==0:
-            if new_pwm!=ori_pwm:
-                fan.set_fan_duty_cycle(new_pwm)
-                logging.info('Set fan speed from %d to %d', ori_pwm, new_pwm)
         
         #Check Fan status
-        for i in range (fan.FAN_NUM_1_IDX, fan.FAN_NUM_ON_MAIN_BROAD+1):
-            if fan.get_fan_status(i)==0:
-                new_pwm=100
+        fan_fail=0
+        for i in range (FanUtil.FAN_NUM_1_IDX, FanUtil.FAN_NUM_ON_MAIN_BROAD+1):
+            fault = values['fan%d_fault' % i]
+            if fault is not None and fault > 0:
                 logging.debug('fan_%d fail, set pwm to 100',i)                
                 if test_temp==0:
                     fan_fail=1
-                    fan.set_fan_duty_cycle(new_pwm)
                     break
-            else:
-                fan_fail=0
+
+        if fan_fail==0:
+            logging.debug('new_fan_cycle=%d', new_pwm)
+        else:
+            new_pwm=100
         
-        #if fan_policy_state == ori_state:            
-        #    return True 
-        #else:
         new_state = fan_policy_state
         
-        #logging.warning('Temperature high alarm testing')       
         if ori_state==LEVEL_FAN_DEF:            
            if new_state==LEVEL_TEMP_HIGH:
                if alarm_state==0:
@@ -297,7 +297,7 @@ class device_monitor(object):
             if new_state <= LEVEL_FAN_MAX:
                 logging.warning('Alarm for temperature critical is cleared')
       
-        return True
+        return new_pwm
 
 def main(argv):
     log_file = '%s.log' % FUNCTION_NAME
@@ -335,10 +335,11 @@ def main(argv):
     fan.set_fan_duty_cycle(38)
     print "set default fan speed to 37.5%"
     monitor = device_monitor(log_file, log_level)
+    loop = ControlLoop(monitor.get_sensors(), monitor.manage_fans,
+                       fan.set_fan_duty_cycle, duty=38,
+                       watches=monitor.get_watches())
     # Loop forever, doing something useful hopefully:
-    while True:
-        monitor.manage_fans()
-        time.sleep(5)
+    loop.run()
 
 if __name__ == '__main__':
     main(sys.argv[1:])
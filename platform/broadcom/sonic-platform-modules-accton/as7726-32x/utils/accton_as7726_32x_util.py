@@ -22,10 +22,14 @@ options:
     -h | --help     : this help message
     -d | --debug    : run with debug mode
     -f | --force    : ignore error during installation or clean
+    -n | --dry-run  : install against an emulated sysfs and show the writes
 command:
     install     : install drivers and generate related sysfs nodes
     clean       : uninstall drivers and remove related sysfs nodes
     show        : show all systen status
+    dump [file] : save all systen status as JSON, to stdout without file
+    diff old [new]  : show the status which changed since the dump in old,
+                  or between the dumps in old and new
     sff         : dump SFP eeprom
     set         : change board setting with fan|led|sfp
 """
@@ -37,14 +41,18 @@ import logging
 import re
 import time
 from collections import namedtuple
+from i2c_bringup import I2cBringup, Mux, Device, dry_run
+from sysfs_snapshot import take_snapshot, save_snapshot, load_snapshot, \
+                           diff_snapshots, format_diff, format_snapshot
 
 PROJECT_NAME = 'as7726_32x'
 version = '0.0.1'
 verbose = False
 DEBUG = False
+DRY_RUN = False
 args = []
 ALL_DEVICE = {}
-DEVICE_NO = {'led':5, 'fan1':1, 'fan2':1,'fan3':1,'fan4':1,'fan5':1,'thermal':3, 'psu':2, 'sfp':54}
+DEVICE_NO = {'led':5, 'fan':6, 'fan1':1, 'fan2':1,'fan3':1,'fan4':1,'fan5':1,'thermal':3, 'psu':2, 'sfp':54}
 
 
 led_prefix ='/sys/devices/platform/as7716_32x_led/leds/accton_'+PROJECT_NAME+'_led::'
@@ -88,40 +96,40 @@ sfp_map = [21, 22, 23, 24, 26, 25, 28, 27,
              37, 38, 39, 40, 41, 42, 43, 44,
              15, 16]
 
-mknod =[
-'echo pca9548 0x77 > /sys/bus/i2c/devices/i2c-0/new_device',
-'echo pca9548 0x76 > /sys/bus/i2c/devices/i2c-1/new_device',
-'echo pca9548 0x72 > /sys/bus/i2c/devices/i2c-1/new_device',
-'echo pca9548 0x73 > /sys/bus/i2c/devices/i2c-1/new_device',
-'echo pca9548 0x74 > /sys/bus/i2c/devices/i2c-1/new_device',
-'echo pca9548 0x75 > /sys/bus/i2c/devices/i2c-1/new_device',
-'echo pca9548 0x71 > /sys/bus/i2c/devices/i2c-2/new_device',
+i2c_devices = [
+Mux('pca9548', 0x77, 0),
+Mux('pca9548', 0x76, 1),
+Mux('pca9548', 0x72, 1),
+Mux('pca9548', 0x73, 1),
+Mux('pca9548', 0x74, 1),
+Mux('pca9548', 0x75, 1),
+Mux('pca9548', 0x71, 2),
 
-'echo as7726_32x_cpld1 0x60 > /sys/bus/i2c/devices/i2c-11/new_device',
-'echo as7726_32x_cpld2 0x62 > /sys/bus/i2c/devices/i2c-12/new_device',
-'echo as7726_32x_cpld3 0x64 > /sys/bus/i2c/devices/i2c-13/new_device',
+Device('as7726_32x_cpld1', 0x60, 11),
+Device('as7726_32x_cpld2', 0x62, 12),
+Device('as7726_32x_cpld3', 0x64, 13),
 
-'echo as7726_32x_fan 0x66 > /sys/bus/i2c/devices/i2c-54/new_device',
+Device('as7726_32x_fan', 0x66, 54),
 
 
-'echo lm75 0x4c > /sys/bus/i2c/devices/i2c-54/new_device',
-'echo lm75 0x48 > /sys/bus/i2c/devices/i2c-55/new_device',
-'echo lm75 0x49 > /sys/bus/i2c/devices/i2c-55/new_device',
-'echo lm75 0x4a > /sys/bus/i2c/devices/i2c-55/new_device',
-'echo lm75 0x4b > /sys/bus/i2c/devices/i2c-55/new_device',
+Device('lm75', 0x4c, 54),
+Device('lm75', 0x48, 55),
+Device('lm75', 0x49, 55),
+Device('lm75', 0x4a, 55),
+Device('lm75', 0x4b, 55),
 
 
 # PSU-1
-'echo as7726_32x_psu1 0x53 > /sys/bus/i2c/devices/i2c-50/new_device',
-'echo ym2651 0x5b > /sys/bus/i2c/devices/i2c-50/new_device',
+Device('as7726_32x_psu1', 0x53, 50),
+Device('ym2651', 0x5b, 50),
 
 # PSU-2
-'echo as7726_32x_psu2 0x50> /sys/bus/i2c/devices/i2c-49/new_device',
-'echo ym2651 0x58 > /sys/bus/i2c/devices/i2c-49/new_device',
+Device('as7726_32x_psu2', 0x50, 49),
+Device('ym2651', 0x58, 49),
 
 #EERPOM
-'echo 24c02 0x56 > /sys/bus/i2c/devices/i2c-0/new_device',
-]
+Device('24c02', 0x56, 0),
+] + [Device('optoe1', 0x50, bus, port_name='port'+str(i)) for i, bus in enumerate(sfp_map)]
 
 
 
@@ -137,15 +145,17 @@ if DEBUG == True:
 
 def main():
     global DEBUG
+    global DRY_RUN
     global args
     global FORCE
 
     if len(sys.argv)<2:
         show_help()
 
-    options, args = getopt.getopt(sys.argv[1:], 'hdf', ['help',
+    options, args = getopt.getopt(sys.argv[1:], 'hdfn', ['help',
                                                        'debug',
                                                        'force',
+                                                       'dry-run',
                                                           ])
     if DEBUG == True:
         print options
@@ -160,6 +170,8 @@ def main():
             logging.basicConfig(level=logging.INFO)
         elif opt in ('-f', '--force'):
             FORCE = 1
+        elif opt in ('-n', '--dry-run'):
+            DRY_RUN = True
         else:
             logging.info('no option')
     for arg in args:
@@ -169,6 +181,15 @@ def main():
            do_uninstall()
         elif arg == 'show':
            device_traversal()
+        elif arg == 'dump':
+            device_dump(args[1] if len(args) > 1 else None)
+            return
+        elif arg == 'diff':
+            if len(args) < 2:
+                show_help()
+            else:
+                device_diff(args[1], args[2] if len(args) > 2 else None)
+            return
         elif arg == 'sff':
             if len(args)!=2:
                 show_eeprom_help()
@@ -306,62 +327,11 @@ def driver_uninstall():
 
 def device_install():
     global FORCE
-
-    for i in range(0,len(mknod)):
-        #for pca954x need times to built new i2c buses
-        if mknod[i].find('pca954') != -1:
-            time.sleep(2)
-        
-        status, output = log_os_system(mknod[i], 1)        
-        if status:
-            print output
-            if FORCE == 0:
-                return status
-    
-    for i in range(0,len(sfp_map)):
-        status, output =log_os_system("echo optoe1 0x50 > /sys/bus/i2c/devices/i2c-"+str(sfp_map[i])+"/new_device", 1)
-        if status:
-            print output
-            if FORCE == 0:
-                return status
-        status, output =log_os_system("echo port"+str(i)+" > /sys/bus/i2c/devices/"+str(sfp_map[i])+"-0050/port_name", 1)
-        if status:
-            print output
-            if FORCE == 0:
-                return status
-    return
+    return I2cBringup(i2c_devices, force=FORCE).install()
 
 def device_uninstall():
     global FORCE
-
-    status, output =log_os_system("ls /sys/bus/i2c/devices/0-0070", 0)
-    if status==0:
-        I2C_ORDER=1
-    else:
-    	I2C_ORDER=0
-
-    for i in range(0,len(sfp_map)):
-        target = "/sys/bus/i2c/devices/i2c-"+str(sfp_map[i])+"/delete_device"
-        status, output =log_os_system("echo 0x50 > "+ target, 1)
-        if status:
-            print output
-            if FORCE == 0:
-                return status
-                
-    nodelist = mknod
-
-    for i in range(len(nodelist)):
-        target = nodelist[-(i+1)]
-        temp = target.split()
-        del temp[1]
-        temp[-1] = temp[-1].replace('new_device', 'delete_device')
-        status, output = log_os_system(" ".join(temp), 1)
-        if status:
-            print output
-            if FORCE == 0:
-                return status
-
-    return
+    return I2cBringup(i2c_devices, force=FORCE).uninstall()
 
 def system_ready():
     if driver_inserted() == False:        
@@ -372,6 +342,9 @@ def system_ready():
     return True
 
 def do_install():
+    if DRY_RUN:
+        return dry_run(i2c_devices)
+
     if driver_inserted() == False:
         status = driver_install()
         if status:
@@ -567,27 +540,36 @@ def device_traversal():
 
     if len(ALL_DEVICE)==0:
         devices_info()
-    for i in sorted(ALL_DEVICE.keys()):
-        print("============================================")
-        print(i.upper()+": ")
-        print("============================================")
-
-        for j in sorted(ALL_DEVICE[i].keys(), key=get_value):
-            print "   "+j+":",
-            for k in (ALL_DEVICE[i][j]):
-                ret, log = log_os_system("cat "+k, 0)
-                func = k.split("/")[-1].strip()
-                func = re.sub(j+'_','',func,1)
-                func = re.sub(i.lower()+'_','',func,1)
-                if ret==0:
-                    print func+"="+log+" ",
-                else:
-                    print func+"="+"X"+" ",
-            print
-            print("----------------------------------------------------------------")
+    for line in format_snapshot(take_snapshot(ALL_DEVICE)):
+        print line
+    return
+
+def device_dump(filename):
+    if system_ready()==False:
+        print("System's not ready.")
+        print("Please install first!")
+        return
+
+    if len(ALL_DEVICE)==0:
+        devices_info()
+    save_snapshot(take_snapshot(ALL_DEVICE), filename)
+    return
 
+def device_diff(old_filename, new_filename):
+    old = load_snapshot(old_filename)
+    if new_filename is not None:
+        new = load_snapshot(new_filename)
+    else:
+        if system_ready()==False:
+            print("System's not ready.")
+            print("Please install first!")
+            return
+        if len(ALL_DEVICE)==0:
+            devices_info()
+        new = take_snapshot(ALL_DEVICE)
 
-        print
+    for line in format_diff(diff_snapshots(old, new)):
+        print line
     return
 
 def device_exist():
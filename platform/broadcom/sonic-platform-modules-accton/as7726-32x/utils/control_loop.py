@@ -0,0 +1 @@
+../../common/utils/control_loop.py
\ No newline at end of file
@@ -0,0 +1 @@
+../../common/utils/i2c_bringup.py
\ No newline at end of file
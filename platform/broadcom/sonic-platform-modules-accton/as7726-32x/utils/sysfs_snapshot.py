@@ -0,0 +1 @@
+../../common/utils/sysfs_snapshot.py
\ No newline at end of file
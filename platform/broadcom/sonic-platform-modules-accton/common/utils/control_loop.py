@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2017 Accton Technology Corporation
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Fan control loop for the platform monitors.
+
+Each sensor is read on its own schedule: every interval seconds, or every
+fast_interval seconds while a value the policy compares with thresholds,
+e.g. the average of two sensors, is within margin of one of them. The loop
+sleeps until the next sensor is due, evaluates the policy when a reading
+comes in and applies the fan duty only when the policy target changes.
+
+The clock and the sensor paths can be replaced, so a loop can run against
+a directory of files with SimClock, e.g. to measure how long it takes to
+react to a temperature step:
+
+    clock = SimClock()
+    loop = ControlLoop([SysfsSensor('temp1', path1), SysfsSensor('temp2', path2)],
+                       policy, set_duty, clock,
+                       watches=[Watch(['temp1', 'temp2'], [46000], 2000)])
+    clock.call_at(100, write_temp, path1, 50000)
+    loop.run(until=200)
+"""
+
+import os
+import time
+import heapq
+import logging
+
+SYSFS_READ_SIZE = 4096
+
+
+class Clock(object):
+    """
+    Wall clock
+    """
+
+    def time(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class SimClock(Clock):
+    """
+    Simulated clock: sleep() returns at once after moving the time forward
+    and running the callbacks scheduled in between
+    """
+
+    def __init__(self, start=0.0):
+        self.now = start
+        self.events = []
+        self.seq = 0
+
+    def time(self):
+        return self.now
+
+    def call_at(self, when, func, *args):
+        self.seq += 1
+        heapq.heappush(self.events, (when, self.seq, func, args))
+
+    def sleep(self, seconds):
+        end = self.now + max(seconds, 0)
+        while self.events and self.events[0][0] <= end:
+            when, _, func, args = heapq.heappop(self.events)
+            self.now = max(self.now, when)
+            func(*args)
+        self.now = end
+
+
+class SysfsSensor(object):
+    """
+    An integer read from a sysfs file, which is kept open between reads
+    """
+
+    def __init__(self, name, path, interval=5.0, fast_interval=1.0):
+        self.name = name
+        self.path = path
+        self.interval = interval
+        self.fast_interval = fast_interval
+        self.value = None
+        self.sample_time = None
+        self.next_time = 0
+        self.fd = None
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def read(self):
+        """
+        Returns the value of the file, or None if it can't be read
+        """
+        try:
+            if self.fd is None:
+                self.fd = os.open(self.path, os.O_RDONLY)
+            os.lseek(self.fd, 0, os.SEEK_SET)
+            content = os.read(self.fd, SYSFS_READ_SIZE)
+            return int(content.strip())
+        except (IOError, OSError, ValueError) as e:
+            logging.debug('Unable to read %s: %s', self.path, str(e))
+            self.close()
+            return None
+
+    def sample(self, now):
+        self.value = self.read()
+        self.sample_time = now
+        self.next_time = now + self.interval
+
+    def sample_fast(self):
+        """
+        Brings the next read forward to fast_interval after the last one
+        """
+        if self.sample_time is not None:
+            self.next_time = min(self.next_time, self.sample_time + self.fast_interval)
+
+
+def average(readings):
+    return sum(readings) / float(len(readings))
+
+
+class Watch(object):
+    """
+    A value of the sensors names, combined by combine (their average by
+    default), which the policy compares with thresholds. Its sensors are
+    read every fast_interval while it is within margin of a threshold.
+    """
+
+    def __init__(self, names, thresholds, margin, combine=average):
+        self.names = names
+        self.thresholds = thresholds
+        self.margin = margin
+        self.combine = combine
+
+    def value(self, values):
+        readings = [values.get(name) for name in self.names]
+        if None in readings:
+            return None
+        return self.combine(readings)
+
+    def is_near_threshold(self, values):
+        value = self.value(values)
+        if value is None:
+            return False
+        for threshold in self.thresholds:
+            if abs(value - threshold) <= self.margin:
+                return True
+        return False
+
+
+class ControlLoop(object):
+    """
+    policy(values) gets a dict of sensor name to last value (None if the
+    sensor can't be read) and returns the fan duty to apply, or None to
+    leave it; apply(duty) is called when the duty changes. The sensors of
+    watches near one of their thresholds are read every fast_interval.
+    """
+
+    def __init__(self, sensors, policy, apply, clock=None, duty=None, watches=()):
+        self.sensors = sensors
+        self.policy = policy
+        self.apply = apply
+        self.clock = clock or Clock()
+        self.duty = duty
+        self.watches = watches
+
+    def values(self):
+        return dict((sensor.name, sensor.value) for sensor in self.sensors)
+
+    def step(self):
+        """
+        Samples the sensors which are due and runs the policy if any was;
+        returns the time the next sensor is due
+        """
+        now = self.clock.time()
+        due = [sensor for sensor in self.sensors if sensor.next_time <= now]
+        for sensor in due:
+            sensor.sample(now)
+
+        if due:
+            values = self.values()
+            for watch in self.watches:
+                if watch.is_near_threshold(values):
+                    for sensor in self.sensors:
+                        if sensor.name in watch.names:
+                            sensor.sample_fast()
+
+            duty = self.policy(values)
+            if duty is not None and duty != self.duty:
+                logging.info('Set fan duty from %s to %d', self.duty, duty)
+                self.apply(duty)
+                self.duty = duty
+
+        return min(sensor.next_time for sensor in self.sensors)
+
+    def run(self, until=None):
+        while until is None or self.clock.time() < until:
+            next_time = self.step()
+            if until is not None:
+                next_time = min(next_time, until)
+            self.clock.sleep(max(next_time - self.clock.time(), 0))
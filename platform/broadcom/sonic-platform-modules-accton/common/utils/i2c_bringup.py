@@ -0,0 +1,380 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2016 Accton Networks, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Bring up the I2C devices of a platform from a declarative list.
+
+Muxes are instantiated one by one in the declared order, since the kernel
+numbers the buses they create in creation order, and the next one is only
+written once all the channels of the previous one are there. The other
+devices are then instantiated in parallel, one worker per parent bus.
+
+Usage from a platform util:
+
+    i2c_devices = [
+        Mux('pca9548', 0x77, 0),
+        Device('as7726_32x_cpld1', 0x60, 11),
+        Device('optoe1', 0x50, 21, port_name='port0'),
+    ]
+    status = I2cBringup(i2c_devices).install()
+
+With FakeSysfs, the same list runs against a temporary directory which
+emulates the kernel side, to check ordering and timing on any Linux box.
+"""
+
+import os
+import re
+import time
+import shutil
+import select
+import logging
+import tempfile
+import threading
+import ctypes
+import ctypes.util
+from multiprocessing.pool import ThreadPool
+
+I2C_DEVICES = 'sys/bus/i2c/devices'
+MAX_WORKERS = 8
+WAIT_TIMEOUT = 5.0
+# sysfs doesn't notify every entry the kernel creates, so waits also poll
+POLL_INTERVAL = 0.05
+
+MUX_CHANNELS = {'pca9540': 2, 'pca9542': 2, 'pca9543': 2, 'pca9544': 4,
+                'pca9545': 4, 'pca9546': 4, 'pca9547': 8, 'pca9548': 8}
+
+IN_CREATE = 0x00000100
+IN_MOVED_TO = 0x00000080
+
+
+class Device(object):
+    """
+    An I2C device created with new_device on an existing bus
+    """
+
+    def __init__(self, driver, addr, bus, port_name=None, optional=False):
+        self.driver = driver
+        self.addr = addr
+        self.bus = bus
+        self.port_name = port_name
+        self.optional = optional
+
+    @property
+    def name(self):
+        return '{}-{:04x}'.format(self.bus, self.addr)
+
+    def __repr__(self):
+        return '{} 0x{:02x} on i2c-{}'.format(self.driver, self.addr, self.bus)
+
+
+class Mux(Device):
+    """
+    An I2C mux, which adds one bus per channel
+    """
+
+    def __init__(self, driver, addr, bus, channels=None, optional=False):
+        Device.__init__(self, driver, addr, bus, optional=optional)
+        self.channels = channels or MUX_CHANNELS.get(driver, 8)
+
+
+class Sysfs(object):
+    """
+    Access to sysfs under root
+    """
+
+    _libc = None
+
+    def __init__(self, root='/'):
+        self.root = root
+
+    def path(self, *names):
+        return os.path.join(self.root, I2C_DEVICES, *names)
+
+    def write(self, path, value):
+        with open(path, 'w') as f:
+            f.write(value)
+
+    def _watch(self, directory):
+        """
+        Returns an inotify fd which reports entries created in directory,
+        or None if it can't be watched
+        """
+        if Sysfs._libc is None:
+            try:
+                Sysfs._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            except OSError:
+                Sysfs._libc = False
+        if not Sysfs._libc or not os.path.isdir(directory):
+            return None
+
+        fd = Sysfs._libc.inotify_init1(os.O_NONBLOCK | getattr(os, 'O_CLOEXEC', 0))
+        if fd < 0:
+            return None
+        if Sysfs._libc.inotify_add_watch(fd, directory.encode(), IN_CREATE | IN_MOVED_TO) < 0:
+            os.close(fd)
+            return None
+        return fd
+
+    def wait(self, path, timeout=WAIT_TIMEOUT):
+        """
+        Wait until path exists; returns False on timeout
+        """
+        if os.path.exists(path):
+            return True
+
+        deadline = time.time() + timeout
+        fd = self._watch(os.path.dirname(path))
+        try:
+            while not os.path.exists(path):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                if fd is None:
+                    time.sleep(min(remaining, POLL_INTERVAL))
+                    continue
+                readable, _, _ = select.select([fd], [], [], min(remaining, POLL_INTERVAL))
+                if readable:
+                    try:
+                        os.read(fd, 4096)
+                    except OSError:
+                        pass
+            return True
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+
+class FakeSysfs(Sysfs):
+    """
+    Sysfs of the I2C core emulated in a temporary directory. A write to
+    new_device adds the device directory, and the buses of a mux, after
+    delay seconds; delete_device removes them right away, as the kernel
+    does. Every write is recorded in log as (seconds since start, path, value).
+    """
+
+    def __init__(self, buses=(0,), delay=0.01, root=None):
+        Sysfs.__init__(self, root or tempfile.mkdtemp(prefix='sysfs'))
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.log = []
+        self.start = time.time()
+        self.next_bus = max(buses) + 1
+        self.devices = {}
+        self.timers = []
+        for bus in buses:
+            self._add_bus(bus)
+
+    def _add_bus(self, bus):
+        bus_dir = self.path('i2c-{}'.format(bus))
+        os.makedirs(bus_dir)
+        for name in ('new_device', 'delete_device'):
+            open(os.path.join(bus_dir, name), 'w').close()
+
+    def _add_device(self, name, driver, child_buses):
+        with self.lock:
+            if self.devices.get(name) != child_buses:
+                return
+            device_dir = self.path(name)
+            os.mkdir(device_dir)
+            with open(os.path.join(device_dir, 'name'), 'w') as f:
+                f.write(driver + '\n')
+            if driver.startswith('optoe'):
+                open(os.path.join(device_dir, 'port_name'), 'w').close()
+            for channel, child in enumerate(child_buses):
+                self._add_bus(child)
+                os.symlink('../i2c-{}'.format(child),
+                           os.path.join(device_dir, 'channel-{}'.format(channel)))
+
+    def write(self, path, value):
+        with self.lock:
+            relpath = os.path.relpath(path, self.path())
+            self.log.append((time.time() - self.start, relpath, value))
+
+            match = re.match(r'i2c-(\d+)/(new|delete)_device$', relpath)
+            if not match:
+                Sysfs.write(self, path, value)
+                return
+
+            bus = int(match.group(1))
+            fields = value.split()
+            if match.group(2) == 'delete':
+                name = '{}-{:04x}'.format(bus, int(fields[0], 0))
+                if name not in self.devices:
+                    raise IOError(2, 'No such file or directory', path)
+                for child in self.devices.pop(name):
+                    shutil.rmtree(self.path('i2c-{}'.format(child)), ignore_errors=True)
+                shutil.rmtree(self.path(name), ignore_errors=True)
+                return
+
+            driver = fields[0]
+            name = '{}-{:04x}'.format(bus, int(fields[1], 0))
+            if name in self.devices:
+                raise IOError(16, 'Device or resource busy', path)
+            channels = MUX_CHANNELS.get(driver, 0)
+            child_buses = list(range(self.next_bus, self.next_bus + channels))
+            self.next_bus += channels
+            self.devices[name] = child_buses
+
+            timer = threading.Timer(self.delay, self._add_device, (name, driver, child_buses))
+            timer.daemon = True
+            self.timers.append(timer)
+            timer.start()
+
+    def written(self):
+        """
+        Returns the writes done so far as a list of (path, value)
+        """
+        with self.lock:
+            return [(path, value) for _, path, value in self.log]
+
+    def cleanup(self):
+        for timer in self.timers:
+            timer.cancel()
+            timer.join()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+class I2cBringup(object):
+    """
+    Instantiates and removes the devices of a platform.
+    install() and uninstall() return 0 on success, or the number of
+    devices which failed otherwise.
+    """
+
+    def __init__(self, devices, sysfs=None, force=False, timeout=WAIT_TIMEOUT):
+        self.devices = devices
+        self.sysfs = sysfs or Sysfs()
+        self.force = force
+        self.timeout = timeout
+        self.elapsed = 0
+
+    def _failed(self, device, reason):
+        if device.optional:
+            logging.info('Skipped optional %s: %s', device, reason)
+            return 0
+        logging.info('Failed %s: %s', device, reason)
+        print('Failed :{}: {}'.format(device, reason))
+        return 1
+
+    def _add(self, device):
+        sysfs = self.sysfs
+        if not sysfs.wait(sysfs.path('i2c-{}'.format(device.bus)), self.timeout):
+            return self._failed(device, 'bus not found')
+
+        logging.info('Add %s', device)
+        try:
+            sysfs.write(sysfs.path('i2c-{}'.format(device.bus), 'new_device'),
+                        '{} 0x{:02x}'.format(device.driver, device.addr))
+        except (IOError, OSError) as e:
+            return self._failed(device, str(e))
+
+        if isinstance(device, Mux):
+            last_channel = sysfs.path(device.name, 'channel-{}'.format(device.channels - 1))
+            if not sysfs.wait(last_channel, self.timeout):
+                return self._failed(device, 'channels not created')
+
+        if device.port_name is not None:
+            port_name = sysfs.path(device.name, 'port_name')
+            if not sysfs.wait(port_name, self.timeout):
+                return self._failed(device, 'port_name not found')
+            try:
+                sysfs.write(port_name, device.port_name)
+            except (IOError, OSError) as e:
+                return self._failed(device, str(e))
+        return 0
+
+    def _remove(self, device):
+        logging.info('Remove %s', device)
+        try:
+            self.sysfs.write(self.sysfs.path('i2c-{}'.format(device.bus), 'delete_device'),
+                             '0x{:02x}'.format(device.addr))
+        except (IOError, OSError) as e:
+            return self._failed(device, str(e))
+        return 0
+
+    def _for_each_bus(self, func, devices):
+        """
+        Call func on the devices, sequentially on a bus and in parallel across buses
+        """
+        buses = []
+        by_bus = {}
+        for device in devices:
+            if device.bus not in by_bus:
+                by_bus[device.bus] = []
+                buses.append(device.bus)
+            by_bus[device.bus].append(device)
+        if not buses:
+            return 0
+
+        def run(bus):
+            return sum(func(device) for device in by_bus[bus])
+
+        pool = ThreadPool(min(MAX_WORKERS, len(buses)))
+        try:
+            return sum(pool.map(run, buses))
+        finally:
+            pool.close()
+            pool.join()
+
+    def install(self):
+        start = time.time()
+        failed = 0
+        for device in self.devices:
+            if isinstance(device, Mux):
+                failed += self._add(device)
+                if failed and not self.force:
+                    return failed
+
+        leaves = [device for device in self.devices if not isinstance(device, Mux)]
+        failed += self._for_each_bus(self._add, leaves)
+        self.elapsed = time.time() - start
+        return failed
+
+    def uninstall(self):
+        start = time.time()
+        leaves = [device for device in reversed(self.devices) if not isinstance(device, Mux)]
+        failed = self._for_each_bus(self._remove, leaves)
+        if failed and not self.force:
+            return failed
+
+        for device in reversed(self.devices):
+            if isinstance(device, Mux):
+                failed += self._remove(device)
+                if failed and not self.force:
+                    return failed
+        self.elapsed = time.time() - start
+        return failed
+
+
+def dry_run(devices, buses=(0,), delay=0.01):
+    """
+    Install and remove devices against a FakeSysfs and print the writes
+    with their time, returns the status of the install
+    """
+    sysfs = FakeSysfs(buses, delay)
+    try:
+        bringup = I2cBringup(devices, sysfs)
+        status = bringup.install()
+        for elapsed, path, value in sysfs.log:
+            print('{:8.3f}  {:<40} {}'.format(elapsed, path, value))
+        print('install: status {}, {:.3f}s'.format(status, bringup.elapsed))
+        if status == 0:
+            status = bringup.uninstall()
+            print('uninstall: status {}, {:.3f}s'.format(status, bringup.elapsed))
+        return status
+    finally:
+        sysfs.cleanup()
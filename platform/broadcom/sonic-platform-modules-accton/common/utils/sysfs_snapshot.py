@@ -0,0 +1,377 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2016 Accton Networks, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Snapshot of the platform attributes of a platform util.
+
+The attributes listed in ALL_DEVICE of a util (group -> node -> list of
+sysfs paths) are read in parallel into one document, with the time each
+read took. It can be saved as JSON and compared with another snapshot:
+
+    snapshot = take_snapshot(ALL_DEVICE)
+    save_snapshot(snapshot, '/tmp/before.json')
+    ...
+    changes = diff_snapshots(load_snapshot('/tmp/before.json'),
+                             take_snapshot(ALL_DEVICE))
+    for line in format_diff(changes):
+        print(line)
+
+With FakeSysfsTree, the same runs against a generated tree of any size
+whose reads take a given time, e.g. to measure the dump time of 32 ports
+against reading each attribute with cat as the utils did:
+
+    python sysfs_snapshot.py --bench 32
+
+The reads of an I2C adapter are serialized by its driver, so the threads
+only overlap the reads of different adapters. Where all the buses are the
+channels of muxes on one adapter, a snapshot saves the cat processes only.
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import time
+import random
+import shutil
+import tempfile
+import threading
+import subprocess
+
+MAX_WORKERS = 16
+SNAPSHOT_VERSION = 1
+
+
+def get_value(name):
+    """
+    Digits inside a string, e.g. 31 for "sfp31"
+    """
+    digit = re.findall(r'\d+', name)
+    return int(digit[0]) if digit else 0
+
+
+def attr_name(group, node, path):
+    """
+    Name of the attribute of a path, without the group and node prefixes,
+    as the utils show it
+    """
+    func = path.split("/")[-1].strip()
+    func = re.sub(node + '_', '', func, 1)
+    func = re.sub(group.lower() + '_', '', func, 1)
+    return func
+
+
+class SysfsReader(object):
+    """
+    Reads sysfs attributes under root
+    """
+
+    def __init__(self, root='/'):
+        self.root = root
+
+    def path(self, path):
+        return os.path.join(self.root, path.strip().lstrip('/'))
+
+    def read(self, path):
+        """
+        Returns (value, error), value None if it couldn't be read
+        """
+        path = self.path(path)
+        if glob.has_magic(path):
+            paths = sorted(glob.glob(path))
+            if not paths:
+                return None, 'No such file: ' + path
+            path = paths[0]
+        try:
+            with open(path) as f:
+                return f.read().strip(), None
+        except (IOError, OSError) as e:
+            return None, str(e)
+
+
+def take_snapshot(all_device, reader=None, workers=MAX_WORKERS):
+    """
+    Reads the attributes of all_device in parallel, returns the snapshot:
+
+        {"version": 1, "time": <epoch>, "elapsed_ms": <total>,
+         "groups": {group: {node: [{"name", "path", "value", "error",
+                                    "read_ms"}, ...]}}}
+    """
+    reader = reader or SysfsReader()
+    attrs = []
+    for group in all_device:
+        for node in all_device[group]:
+            for path in all_device[group][node]:
+                attrs.append((group, node, path))
+
+    def read(attr):
+        group, node, path = attr
+        start = time.time()
+        value, error = reader.read(path)
+        return {'name': attr_name(group, node, path), 'path': path,
+                'value': value, 'error': error,
+                'read_ms': round((time.time() - start) * 1000, 3)}
+
+    # threads of their own rather than a ThreadPool, whose close() waits
+    # for its handler thread polling every 100 ms on python 2
+    results = [None] * len(attrs)
+    pending = iter(range(len(attrs)))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                index = next(pending, None)
+            if index is None:
+                return
+            results[index] = read(attrs[index])
+
+    start = time.time()
+    threads = [threading.Thread(target=worker) for _ in range(max(1, min(workers, len(attrs))))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    groups = {}
+    for group in all_device:
+        groups[group] = {}
+        for node in all_device[group]:
+            groups[group][node] = []
+    for (group, node, path), result in zip(attrs, results):
+        groups[group][node].append(result)
+
+    return {'version': SNAPSHOT_VERSION, 'time': start,
+            'elapsed_ms': round((time.time() - start) * 1000, 3),
+            'groups': groups}
+
+
+def save_snapshot(snapshot, filename=None):
+    """
+    Writes snapshot as JSON to filename, stdout if None
+    """
+    if filename is None:
+        json.dump(snapshot, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+        return
+    with open(filename, 'w') as f:
+        json.dump(snapshot, f, indent=2, sort_keys=True)
+
+
+def load_snapshot(filename):
+    with open(filename) as f:
+        snapshot = json.load(f)
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        raise ValueError('Unsupported snapshot version {0} in {1}'.format(
+            snapshot.get('version'), filename))
+    return snapshot
+
+
+def _values(snapshot):
+    values = {}
+    for group, nodes in snapshot['groups'].items():
+        for node, attrs in nodes.items():
+            for attr in attrs:
+                values[(group, node, attr['path'])] = (attr['name'], attr['value'])
+    return values
+
+
+def diff_snapshots(old, new):
+    """
+    Returns the attributes which differ between two snapshots, sorted, as
+    (group, node, name, old value, new value) with None for a value which
+    couldn't be read or an attribute missing from a snapshot
+    """
+    old_values = _values(old)
+    new_values = _values(new)
+    changes = []
+    for key in set(old_values) | set(new_values):
+        name, old_value = old_values.get(key, (None, None))
+        new_name, new_value = new_values.get(key, (name, None))
+        if old_value != new_value or (key in old_values) != (key in new_values):
+            changes.append((key[0], key[1], name or new_name, old_value, new_value))
+    changes.sort(key=lambda change: (change[0], get_value(change[1]), change[1], change[2]))
+    return changes
+
+
+def format_diff(changes):
+    lines = []
+    for group, node, name, old_value, new_value in changes:
+        lines.append('{0}/{1} {2}: {3} -> {4}'.format(
+            group, node, name,
+            'X' if old_value is None else old_value,
+            'X' if new_value is None else new_value))
+    return lines
+
+
+def format_snapshot(snapshot):
+    """
+    Lines of the snapshot as the "show" command of the utils prints them
+    """
+    lines = []
+    groups = snapshot['groups']
+    for group in sorted(groups.keys()):
+        lines.append("============================================")
+        lines.append(group.upper() + ": ")
+        lines.append("============================================")
+        for node in sorted(groups[group].keys(), key=get_value):
+            fields = []
+            for attr in groups[group][node]:
+                value = attr['value']
+                fields.append(attr['name'] + "=" + ("X" if value is None else value) + " ")
+            lines.append(" ".join(["   " + node + ":"] + fields))
+            lines.append("----------------------------------------------------------------")
+        lines.append("")
+    return lines
+
+
+def i2c_bus(path):
+    """
+    Bus of the I2C device of a path, e.g. 17 for
+    /sys/bus/i2c/devices/17-0050/module_present, None if it isn't one
+    """
+    match = re.search(r'/i2c/devices/(\d+)-', path)
+    return int(match.group(1)) if match else None
+
+
+def i2c_root(path):
+    """
+    Adapter of the I2C device of a path when all the buses are channels of
+    muxes on one adapter
+    """
+    return None if i2c_bus(path) is None else 0
+
+
+class FakeSysfsTree(SysfsReader):
+    """
+    Sysfs attributes of all_device generated in a temporary directory, each
+    read taking latency seconds as an I2C access does. The reads of a same
+    adapter, adapter(path), wait for each other; None for the attributes
+    not on I2C. set() changes the value of an attribute.
+    """
+
+    def __init__(self, all_device, latency=0.002, root=None, adapter=i2c_bus):
+        SysfsReader.__init__(self, root or tempfile.mkdtemp(prefix='sysfs'))
+        self.latency = latency
+        self.adapter = adapter
+        self.adapter_locks = {}
+        self.lock = threading.Lock()
+        rand = random.Random(0)
+        for group in all_device:
+            for node in all_device[group]:
+                for path in all_device[group][node]:
+                    self.set(path, str(rand.randint(0, 30000)))
+
+    def set(self, path, value):
+        path = self.path(path).replace('*', '0')
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write(value + '\n')
+
+    def adapter_lock(self, path):
+        adapter = self.adapter(path)
+        if adapter is None:
+            return None
+        with self.lock:
+            return self.adapter_locks.setdefault(adapter, threading.Lock())
+
+    def read(self, path):
+        lock = self.adapter_lock(path)
+        if lock is None:
+            time.sleep(self.latency)
+        else:
+            with lock:
+                time.sleep(self.latency)
+        return SysfsReader.read(self, path)
+
+    def cleanup(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def make_all_device(num_ports):
+    """
+    ALL_DEVICE of a platform with num_ports transceivers, 6 fans, 5
+    thermal sensors and 2 PSUs, laid out as the utils do
+    """
+    i2c_prefix = '/sys/bus/i2c/devices/'
+    all_device = {'fan': {}, 'thermal': {}, 'psu': {}, 'sfp': {}}
+    for i in range(6):
+        all_device['fan']['fan' + str(i + 1)] = [
+            i2c_prefix + '54-0066/fan' + str(i + 1) + '_' + attr
+            for attr in ['present', 'front_speed_rpm', 'rear_speed_rpm']]
+    for i in range(5):
+        all_device['thermal']['thermal' + str(i + 1)] = [
+            i2c_prefix + '55-004' + str(i) + '/hwmon/hwmon*/temp1_input']
+    for i in range(2):
+        all_device['psu']['psu' + str(i + 1)] = [
+            i2c_prefix + str(49 + i) + '-0050/' + attr
+            for attr in ['psu_present', 'psu_power_good']]
+    for i in range(num_ports):
+        all_device['sfp']['sfp' + str(i + 1)] = [
+            i2c_prefix + str(i + 17) + '-0050/' + attr
+            for attr in ['module_present', 'module_tx_disable']]
+    return all_device
+
+
+def bench(port_counts, latency):
+    """
+    Prints the time to read all the attributes with one cat each, of which
+    the reads themselves, against a snapshot with one adapter per bus and
+    with all the buses behind muxes of one adapter
+    """
+    for num_ports in port_counts:
+        all_device = make_all_device(num_ports)
+        tree = FakeSysfsTree(all_device, latency)
+        devnull = open(os.devnull, 'w')
+        try:
+            # one cat per attribute, in sequence, as the utils did
+            count = 0
+            start = time.time()
+            for group in all_device:
+                for node in all_device[group]:
+                    for path in all_device[group][node]:
+                        time.sleep(latency)
+                        subprocess.call('cat ' + tree.path(path).replace('*', '0'), shell=True,
+                                        stdout=devnull, stderr=subprocess.STDOUT)
+                        count += 1
+            cat_elapsed = time.time() - start
+
+            per_bus = take_snapshot(all_device, tree)
+            tree.adapter = i2c_root
+            one_adapter = take_snapshot(all_device, tree)
+            print('{0:>4} ports, {1:>4} attributes: cat {2:7.1f} ms ({3:7.1f} ms of reads), '
+                  'snapshot {4:7.1f} ms with an adapter per bus, {5:7.1f} ms with one adapter'.format(
+                      num_ports, count, cat_elapsed * 1000, count * latency * 1000,
+                      per_bus['elapsed_ms'], one_adapter['elapsed_ms']))
+        finally:
+            devnull.close()
+            tree.cleanup()
+
+
+def main(argv):
+    if argv[:1] != ['--bench']:
+        print(__doc__)
+        return 1
+    port_counts = [int(arg) for arg in argv[1:]] or [32, 64]
+    bench(port_counts, 0.002)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,114 @@
+import os
+import sys
+
+test_path = os.path.dirname(os.path.abspath(__file__))
+utils_path = os.path.join(os.path.dirname(test_path), 'common', 'utils')
+sys.path.insert(0, utils_path)
+
+from control_loop import ControlLoop, SysfsSensor, SimClock, Watch
+
+# Levels of fan_policy_f2b of as7726-32x
+THRESHOLDS = [38000, 46000, 58000, 66000, 200000]
+
+
+def write(path, value):
+    with open(path, 'w') as f:
+        f.write('{}\n'.format(value))
+
+
+class Lm75Loop(object):
+    """
+    The lm75 pair of as7726-32x in a directory, with a policy which gives the
+    index of the level of their average, and the duties applied over time
+    """
+
+    def __init__(self, tmpdir, temp_4a, temp_4b):
+        self.clock = SimClock()
+        self.paths = {}
+        for name, temp in (('lm75_4a', temp_4a), ('lm75_4b', temp_4b)):
+            self.paths[name] = str(tmpdir.join(name))
+            write(self.paths[name], temp)
+        self.reads = []
+        self.applied = []
+        self.sensors = [SysfsSensor(name, self.paths[name], 5, 1) for name in sorted(self.paths)]
+        for sensor in self.sensors:
+            sensor.read = self.counting_read(sensor, sensor.read)
+        self.loop = ControlLoop(self.sensors, self.policy, self.apply, self.clock,
+                                watches=[Watch(['lm75_4a', 'lm75_4b'], THRESHOLDS, 2000)])
+
+    def counting_read(self, sensor, read):
+        def wrapper():
+            self.reads.append((self.clock.time(), sensor.name))
+            return read()
+        return wrapper
+
+    def policy(self, values):
+        if values['lm75_4a'] is None or values['lm75_4b'] is None:
+            return 100
+        temp = (values['lm75_4a'] + values['lm75_4b']) / 2
+        return len([threshold for threshold in THRESHOLDS if temp > threshold])
+
+    def apply(self, duty):
+        self.applied.append((self.clock.time(), duty))
+
+    def step_at(self, when, name, temp):
+        self.clock.call_at(when, write, self.paths[name], temp)
+
+    def latency(self, step_time, duty):
+        for when, applied in self.applied:
+            if applied == duty and when >= step_time:
+                return when - step_time
+        return None
+
+
+def test_step_response_far_from_threshold(tmpdir):
+    sim = Lm75Loop(tmpdir, 30000, 32000)
+    sim.step_at(100.5, 'lm75_4a', 60000)
+    sim.loop.run(until=200)
+
+    assert sim.applied == [(0, 0), (105, 1)]
+    assert sim.latency(100.5, 1) <= 5
+
+
+def test_step_response_near_threshold_of_average(tmpdir):
+    # Neither lm75 is within the margin of a level, their average (45C) is
+    sim = Lm75Loop(tmpdir, 41000, 49000)
+    sim.step_at(100.5, 'lm75_4b', 52000)
+    sim.loop.run(until=200)
+
+    assert sim.applied == [(0, 1), (101, 2)]
+    assert sim.latency(100.5, 2) <= 1
+
+
+def test_fast_sampling_follows_average(tmpdir):
+    sim = Lm75Loop(tmpdir, 41000, 49000)
+    sim.loop.run(until=10)
+    assert [when for when, name in sim.reads if name == 'lm75_4a'] == list(range(10))
+
+    # Average now 41C: 4b at 40C, close to the 38C level, is not a reason
+    # to read every second
+    sim.step_at(10.5, 'lm75_4a', 42000)
+    sim.step_at(10.5, 'lm75_4b', 40000)
+    sim.loop.run(until=40)
+    times = [when for when, name in sim.reads if name == 'lm75_4a' and when > 10]
+    assert times == [11, 16, 21, 26, 31, 36]
+
+
+def test_duty_written_on_change_only(tmpdir):
+    sim = Lm75Loop(tmpdir, 44000, 45000)
+    for i in range(20):
+        sim.step_at(i * 10 + 0.5, 'lm75_4a', 44000 + (i % 2) * 500)
+    sim.loop.run(until=200)
+
+    assert sim.applied == [(0, 1)]
+    assert len(sim.reads) > 100
+
+
+def test_unreadable_sensor(tmpdir):
+    sim = Lm75Loop(tmpdir, 30000, 32000)
+    sim.step_at(20.5, 'lm75_4b', '')
+    sim.step_at(40.5, 'lm75_4b', 32000)
+    sim.loop.run(until=60)
+
+    assert sim.applied == [(0, 0), (25, 100), (45, 0)]
+    assert sim.sensors[1].value == 32000
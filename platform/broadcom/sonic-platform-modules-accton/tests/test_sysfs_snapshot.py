@@ -0,0 +1,213 @@
+import os
+import sys
+import json
+import time
+
+test_path = os.path.dirname(os.path.abspath(__file__))
+utils_path = os.path.join(os.path.dirname(test_path), 'common', 'utils')
+sys.path.insert(0, utils_path)
+
+from sysfs_snapshot import take_snapshot, save_snapshot, load_snapshot, diff_snapshots, \
+                           format_diff, format_snapshot, FakeSysfsTree, make_all_device, \
+                           i2c_bus, i2c_root
+
+I2C = '/sys/bus/i2c/devices/'
+
+ALL_DEVICE = {
+    'fan': {'fan1': [I2C + '54-0066/fan1_present', I2C + '54-0066/fan1_front_speed_rpm'],
+            'fan2': [I2C + '54-0066/fan2_present', I2C + '54-0066/fan2_front_speed_rpm']},
+    'thermal': {'thermal1': [I2C + '55-0048/hwmon/hwmon*/temp1_input']},
+    'psu': {'psu1': [I2C + '49-0050/psu_present', I2C + '49-0050/psu_power_good']},
+    'sfp': {'sfp10': [I2C + '26-0050/sfp_is_present'],
+            'sfp2': [I2C + '18-0050/sfp_is_present'],
+            'sfp1': [I2C + '17-0050/sfp_is_present']},
+}
+
+VALUES = {
+    I2C + '54-0066/fan1_present': '1',
+    I2C + '54-0066/fan1_front_speed_rpm': '12600',
+    I2C + '54-0066/fan2_present': '1',
+    I2C + '54-0066/fan2_front_speed_rpm': '15300',
+    I2C + '55-0048/hwmon/hwmon*/temp1_input': '25333',
+    I2C + '49-0050/psu_present': '1',
+    I2C + '17-0050/sfp_is_present': '1',
+    I2C + '18-0050/sfp_is_present': '0',
+    I2C + '26-0050/sfp_is_present': '1',
+}
+
+BAR = "============================================"
+DASH = "----------------------------------------------------------------"
+
+# Lines "show" printed with a cat per attribute, psu_power_good unreadable
+SHOW = [
+    BAR, "FAN: ", BAR,
+    "   fan1: present=1  front_speed_rpm=12600 ", DASH,
+    "   fan2: present=1  front_speed_rpm=15300 ", DASH,
+    "",
+    BAR, "PSU: ", BAR,
+    "   psu1: present=1  power_good=X ", DASH,
+    "",
+    BAR, "SFP: ", BAR,
+    "   sfp1: is_present=1 ", DASH,
+    "   sfp2: is_present=0 ", DASH,
+    "   sfp10: is_present=1 ", DASH,
+    "",
+    BAR, "THERMAL: ", BAR,
+    "   thermal1: temp1_input=25333 ", DASH,
+    "",
+]
+
+
+class TestSnapshot(object):
+
+    def setup_method(self, method):
+        self.tree = FakeSysfsTree(ALL_DEVICE, latency=0)
+        for path, value in VALUES.items():
+            self.tree.set(path, value)
+        self.remove(I2C + '49-0050/psu_power_good')
+
+    def teardown_method(self, method):
+        self.tree.cleanup()
+
+    def remove(self, path):
+        os.remove(self.tree.path(path))
+
+    def test_take_snapshot(self):
+        snapshot = take_snapshot(ALL_DEVICE, self.tree)
+        assert snapshot['version'] == 1
+        assert sorted(snapshot['groups']) == ['fan', 'psu', 'sfp', 'thermal']
+        assert sorted(snapshot['groups']['sfp']) == ['sfp1', 'sfp10', 'sfp2']
+
+        fan1 = snapshot['groups']['fan']['fan1']
+        assert [(attr['name'], attr['path'], attr['value'], attr['error']) for attr in fan1] == [
+            ('present', I2C + '54-0066/fan1_present', '1', None),
+            ('front_speed_rpm', I2C + '54-0066/fan1_front_speed_rpm', '12600', None)]
+        assert all(attr['read_ms'] >= 0 for attr in fan1)
+
+        # glob resolved
+        thermal1 = snapshot['groups']['thermal']['thermal1'][0]
+        assert (thermal1['name'], thermal1['value']) == ('temp1_input', '25333')
+
+        power_good = snapshot['groups']['psu']['psu1'][1]
+        assert power_good['name'] == 'power_good'
+        assert power_good['value'] is None and 'No such file' in power_good['error']
+
+    def test_glob_missing(self):
+        os.rename(self.tree.path(I2C + '55-0048/hwmon/hwmon0'),
+                  self.tree.path(I2C + '55-0048/hwmon/other'))
+        snapshot = take_snapshot(ALL_DEVICE, self.tree)
+        thermal1 = snapshot['groups']['thermal']['thermal1'][0]
+        assert thermal1['value'] is None
+        assert thermal1['error'].startswith('No such file: ')
+
+    def test_parallel(self):
+        # 10 reads of 10 ms, at most 4 on a bus: 100 ms in sequence
+        tree = FakeSysfsTree(ALL_DEVICE, latency=0.01)
+        try:
+            snapshot = take_snapshot(ALL_DEVICE, tree)
+            assert snapshot['elapsed_ms'] < 80
+            assert all(attr['read_ms'] >= 10 for nodes in snapshot['groups'].values()
+                       for attrs in nodes.values() for attr in attrs)
+        finally:
+            tree.cleanup()
+
+    def test_adapter_serialized(self):
+        # the reads of one adapter wait for each other
+        tree = FakeSysfsTree(ALL_DEVICE, latency=0.01, adapter=i2c_root)
+        try:
+            start = time.time()
+            take_snapshot(ALL_DEVICE, tree)
+            assert time.time() - start >= 0.1
+        finally:
+            tree.cleanup()
+
+    def test_i2c_bus(self):
+        assert i2c_bus(I2C + '17-0050/module_present') == 17
+        assert i2c_bus(I2C + '55-0048/hwmon/hwmon*/temp1_input') == 55
+        assert i2c_bus('/sys/devices/platform/as7726_32x_led/leds/x/brightness') is None
+        assert i2c_root(I2C + '17-0050/module_present') == 0
+        assert i2c_root('/sys/devices/platform/as7726_32x_fan/fan1_present') is None
+
+    def test_diff_unchanged(self):
+        before = take_snapshot(ALL_DEVICE, self.tree)
+        assert diff_snapshots(before, take_snapshot(ALL_DEVICE, self.tree)) == []
+
+    def test_diff_changed(self):
+        before = take_snapshot(ALL_DEVICE, self.tree)
+        self.tree.set(I2C + '18-0050/sfp_is_present', '1')
+        self.tree.set(I2C + '54-0066/fan2_front_speed_rpm', '9000')
+        changes = diff_snapshots(before, take_snapshot(ALL_DEVICE, self.tree))
+        assert changes == [('fan', 'fan2', 'front_speed_rpm', '15300', '9000'),
+                           ('sfp', 'sfp2', 'is_present', '0', '1')]
+        assert format_diff(changes) == ['fan/fan2 front_speed_rpm: 15300 -> 9000',
+                                        'sfp/sfp2 is_present: 0 -> 1']
+
+    def test_diff_unreadable(self):
+        before = take_snapshot(ALL_DEVICE, self.tree)
+        self.remove(I2C + '26-0050/sfp_is_present')
+        self.tree.set(I2C + '49-0050/psu_power_good', '1')
+        changes = diff_snapshots(before, take_snapshot(ALL_DEVICE, self.tree))
+        assert changes == [('psu', 'psu1', 'power_good', None, '1'),
+                           ('sfp', 'sfp10', 'is_present', '1', None)]
+        assert format_diff(changes) == ['psu/psu1 power_good: X -> 1',
+                                        'sfp/sfp10 is_present: 1 -> X']
+
+    def test_diff_missing(self):
+        all_device = dict(ALL_DEVICE)
+        all_device['sfp'] = dict(ALL_DEVICE['sfp'])
+        del all_device['sfp']['sfp2']
+        all_device['led'] = {'led1': ['/sys/class/leds/diag/brightness']}
+        self.tree.set('/sys/class/leds/diag/brightness', '2')
+
+        before = take_snapshot(ALL_DEVICE, self.tree)
+        after = take_snapshot(all_device, self.tree)
+        assert diff_snapshots(before, after) == [('led', 'led1', 'brightness', None, '2'),
+                                                 ('sfp', 'sfp2', 'is_present', '0', None)]
+        assert diff_snapshots(after, before) == [('led', 'led1', 'brightness', '2', None),
+                                                 ('sfp', 'sfp2', 'is_present', None, '0')]
+
+    def test_diff_missing_unreadable(self):
+        # an attribute which couldn't be read still differs from none at all
+        all_device = {'psu': {'psu1': ALL_DEVICE['psu']['psu1'][:1]}}
+        before = take_snapshot({'psu': ALL_DEVICE['psu']}, self.tree)
+        after = take_snapshot(all_device, self.tree)
+        assert diff_snapshots(before, after) == [('psu', 'psu1', 'power_good', None, None)]
+
+    def test_save_load(self, tmpdir):
+        filename = str(tmpdir.join('snapshot.json'))
+        snapshot = take_snapshot(ALL_DEVICE, self.tree)
+        save_snapshot(snapshot, filename)
+        loaded = load_snapshot(filename)
+        assert loaded == json.loads(json.dumps(snapshot))
+        assert diff_snapshots(loaded, snapshot) == []
+
+        loaded['version'] = 2
+        with open(filename, 'w') as f:
+            json.dump(loaded, f)
+        try:
+            load_snapshot(filename)
+        except ValueError:
+            pass
+        else:
+            assert False
+
+    def test_format_snapshot(self):
+        assert format_snapshot(take_snapshot(ALL_DEVICE, self.tree)) == SHOW
+
+    def test_format_loaded(self, tmpdir):
+        filename = str(tmpdir.join('snapshot.json'))
+        save_snapshot(take_snapshot(ALL_DEVICE, self.tree), filename)
+        assert format_snapshot(load_snapshot(filename)) == SHOW
+
+
+def test_make_all_device():
+    all_device = make_all_device(32)
+    assert len(all_device['sfp']) == 32
+    assert sum(len(attrs) for nodes in all_device.values() for attrs in nodes.values()) == 91
+    tree = FakeSysfsTree(all_device, latency=0)
+    try:
+        snapshot = take_snapshot(all_device, tree)
+        assert all(attr['error'] is None for nodes in snapshot['groups'].values()
+                   for attrs in nodes.values() for attr in attrs)
+    finally:
+        tree.cleanup()
@@ -0,0 +1,161 @@
+import os
+import sys
+import imp
+import stat
+import time
+import types
+import shutil
+import tempfile
+
+import mock
+
+test_path = os.path.dirname(os.path.abspath(__file__))
+device_path = os.path.join(test_path, '..', '..', '..', '..', 'device',
+                           'celestica', 'x86_64-cel_silverstone-r0')
+sys.path.insert(0, os.path.join(device_path, 'sonic_platform'))
+
+import helper
+from ipmi import IpmiCache, FakeIpmiDevice
+
+psu_base = types.ModuleType('sonic_psu.psu_base')
+psu_base.PsuBase = object
+sonic_psu = types.ModuleType('sonic_psu')
+sonic_psu.psu_base = psu_base
+with mock.patch.dict(sys.modules, {'sonic_psu': sonic_psu, 'sonic_psu.psu_base': psu_base}):
+    psuutil = imp.load_source('psuutil', os.path.join(device_path, 'plugins', 'psuutil.py'))
+
+NUM_FAN_TRAY = 7
+FAN1_FRU_ID = 6
+LATENCY = 0.01
+
+# responses of the BMC: netfn 0x3a air flow, fan presence and LED, netfn
+# 0x4 sensor readings of the fans and the PSUs
+RESPONSES = {
+    (0x3a, 0x0a, (0,)): [0x00, 0x01],
+    (0x3a, 0x06, (0x03, 0)): [0x00, 0x00],
+    (0x3a, 0x08, (0x04,)): [0x00, 0x01],
+    (0x04, 0x2d, (0x0d,)): [0x00, 0x9a, 0xc0, 0x00],
+    (0x04, 0x2d, (0x2f,)): [0x00, 0x00, 0xc0, 0x01, 0x80],
+    (0x04, 0x2d, (0x39,)): [0x00, 0x00, 0xc0, 0x0b, 0x80],
+}
+
+FRU = """Board Mfg Date        : Mon Jan  1 00:00:00 2018
+ Board Mfg             : Celestica
+ Board Product         : Fan Board {0}
+ Board Serial          : R1241F{0:04d}
+ Board Part Number     : R1241-F9001-01
+"""
+
+# ipmitool answering "fru print <id>", counting the processes run
+IPMITOOL = """#!/bin/sh
+echo "$@" >> {count}
+[ "$1 $2" = "fru print" ] && [ -f {root}/fru$3 ] || exit 1
+cat {root}/fru$3
+"""
+
+
+class TestIpmiCache(object):
+
+    def setup_method(self, method):
+        self.root = tempfile.mkdtemp(prefix='ipmi')
+        self.count = os.path.join(self.root, 'count')
+        ipmitool = os.path.join(self.root, 'ipmitool')
+        with open(ipmitool, 'w') as f:
+            f.write(IPMITOOL.format(count=self.count, root=self.root))
+        os.chmod(ipmitool, stat.S_IRWXU)
+        for index in range(NUM_FAN_TRAY):
+            with open(os.path.join(self.root, 'fru' + str(FAN1_FRU_ID + index)), 'w') as f:
+                f.write(FRU.format(index))
+
+        self.device = FakeIpmiDevice(RESPONSES, LATENCY)
+        self.cache = IpmiCache(self.device)
+        self.patches = [
+            mock.patch.dict(os.environ, {'PATH': self.root + os.pathsep + os.environ['PATH']}),
+            mock.patch.object(helper, '_ipmi', self.cache),
+        ]
+        for patch in self.patches:
+            patch.start()
+        self.helper = helper.APIHelper()
+
+    def teardown_method(self, method):
+        for patch in reversed(self.patches):
+            patch.stop()
+        shutil.rmtree(self.root)
+
+    def forks(self):
+        if not os.path.exists(self.count):
+            return 0
+        with open(self.count) as f:
+            return len(f.readlines())
+
+    def test_raw(self):
+        assert self.helper.ipmi_raw("0x3A", "0x0A 0x0") == (True, "01")
+        assert self.helper.ipmi_raw("0x04", "0x2D 0x0d") == (True, "9a c0 00")
+        assert self.device.requests == [(0x3a, 0x0a, (0,)), (0x04, 0x2d, (0x0d,))]
+        # invalid command
+        assert self.helper.ipmi_raw("0x3A", "0x0B 0x0") == (False, "")
+        assert self.helper.ipmi_raw("0x3A", "") == (False, "")
+        assert self.forks() == 0
+
+    def test_raw_latency(self):
+        # the time of the BMC only, no ipmitool run
+        start = time.time()
+        for _ in range(20):
+            assert self.helper.ipmi_raw("0x3A", "0x08 0x04") == (True, "01")
+        elapsed = time.time() - start
+        assert 20 * LATENCY <= elapsed < 20 * LATENCY + 0.1
+        assert len(self.device.requests) == 20
+        assert self.forks() == 0 and self.cache.forks == 0
+
+    def test_fru_forks_once(self):
+        # model and serial of all the fans, as psud asks every minute
+        for _ in range(10):
+            for index in range(NUM_FAN_TRAY):
+                status, model = self.helper.ipmi_fru_id(FAN1_FRU_ID + index, "Board Part Number")
+                assert status and model.split()[4] == "R1241-F9001-01"
+                status, serial = self.helper.ipmi_fru_id(FAN1_FRU_ID + index, "Board Serial")
+                assert status and serial.split()[3] == "R1241F{0:04d}".format(index)
+        assert self.forks() == NUM_FAN_TRAY
+        assert self.cache.forks == NUM_FAN_TRAY
+
+        status, fru = self.helper.ipmi_fru_id(FAN1_FRU_ID)
+        assert status and fru == FRU.format(0).strip()
+        assert self.forks() == NUM_FAN_TRAY
+
+    def test_fru_latency(self):
+        start = time.time()
+        self.helper.ipmi_fru_id(FAN1_FRU_ID, "Board Serial")
+        forked = time.time() - start
+
+        start = time.time()
+        for _ in range(100):
+            self.helper.ipmi_fru_id(FAN1_FRU_ID, "Board Serial")
+        cached = (time.time() - start) / 100
+
+        assert self.forks() == 1
+        assert cached * 10 < forked
+
+    def test_fru_expiry(self):
+        self.cache.fru_ttl = 0
+        for _ in range(3):
+            assert self.helper.ipmi_fru_id(FAN1_FRU_ID)[0]
+        assert self.forks() == 3
+
+    def test_fru_failure(self):
+        # not kept: asked again next time
+        assert self.helper.ipmi_fru_id(1, "Board Serial") == (False, "")
+        assert self.helper.ipmi_fru_id(1, "Board Serial") == (False, "")
+        assert self.forks() == 2
+
+    def test_psuutil(self):
+        with mock.patch.object(psuutil.imp, 'load_source') as load_source:
+            load_source.return_value.IpmiCache.return_value = self.cache
+            psu = psuutil.PsuUtil()
+        assert load_source.call_args[0][1] == psuutil.IPMI_MODULE
+        assert os.path.isfile(os.path.join(device_path, 'plugins', psuutil.IPMI_MODULE))
+
+        assert psu.get_psu_presence(1) and psu.get_psu_status(1)
+        # input lost
+        assert psu.get_psu_presence(2) and not psu.get_psu_status(2)
+        assert self.device.requests == [(0x04, 0x2d, (0x2f,))] * 2 + [(0x04, 0x2d, (0x39,))] * 2
+        assert self.forks() == 0
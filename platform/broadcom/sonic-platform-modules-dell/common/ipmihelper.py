@@ -8,7 +8,11 @@
 #
 ########################################################################
 
+import os
 import subprocess
+import tempfile
+import threading
+import time
 import re
 
 # IPMI Request Network Function Codes
@@ -23,6 +27,118 @@ Cmd_GetSensorReading = 0x2D
 # IPMI FRU Device Commands
 Cmd_ReadFRUData = 0x11
 
+# Sensor readings are read again when older than this, in seconds
+SENSOR_READING_TTL = 2
+
+
+def _run_ipmitool(args):
+    """
+    Returns the output of ipmitool with args, "" if it failed. Messages
+    on stderr, e.g. the warnings some BMCs cause on every run, are left
+    out of the output.
+    """
+    result = ""
+    command = "ipmitool {}".format(args)
+    try:
+        proc = subprocess.Popen(command.split(), stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE)
+        stdout = proc.communicate()[0]
+        proc.wait()
+        if not proc.returncode:
+            result = stdout.rstrip('\n')
+    except Exception as e:
+        pass
+
+    return result
+
+
+class IpmiSensorRegistry(object):
+    """
+    Keeps the last reading of all the sensors created, which are read
+    again together, with one ipmitool process, once they are older than
+    SENSOR_READING_TTL.
+    """
+
+    def __init__(self, ttl=SENSOR_READING_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.sensor_ids = []
+        # Sensors which failed to be read, read separately
+        self.failed_ids = set()
+        # Sensor ID -> bytes of Get Sensor Reading response
+        self.readings = {}
+        self.timestamp = 0
+
+    def register(self, sensor_id):
+        with self.lock:
+            if sensor_id not in self.sensor_ids:
+                self.sensor_ids.append(sensor_id)
+                self.timestamp = 0
+
+    def _get_reading_cmd(self, sensor_id):
+        return "raw {} {} {}".format(NetFn_SensorEvent, Cmd_GetSensorReading,
+                                     sensor_id)
+
+    def _read_one(self, sensor_id):
+        result = _run_ipmitool(self._get_reading_cmd(sensor_id))
+        try:
+            return [int(i, 16) for i in result.split()]
+        except ValueError:
+            return []
+
+    def _read_all(self):
+        """
+        Reads the sensors with one "ipmitool exec" of their Get Sensor
+        Reading commands; each response is printed on its own line, unless
+        a command fails, in which case the sensors are read one by one.
+        """
+        readings = {}
+        sensor_ids = [i for i in self.sensor_ids if i not in self.failed_ids]
+        if sensor_ids:
+            fd, path = tempfile.mkstemp(prefix="ipmihelper")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    for sensor_id in sensor_ids:
+                        f.write(self._get_reading_cmd(sensor_id) + "\n")
+                lines = _run_ipmitool("exec {}".format(path)).splitlines()
+            finally:
+                os.remove(path)
+
+            try:
+                responses = [[int(i, 16) for i in line.split()] for line in lines]
+            except ValueError:
+                responses = []
+            if len(responses) == len(sensor_ids):
+                readings.update(zip(sensor_ids, responses))
+            else:
+                for sensor_id in sensor_ids:
+                    readings[sensor_id] = self._read_one(sensor_id)
+                    if not readings[sensor_id]:
+                        self.failed_ids.add(sensor_id)
+
+        for sensor_id in self.failed_ids:
+            if sensor_id not in readings:
+                readings[sensor_id] = self._read_one(sensor_id)
+
+        return readings
+
+    def get_reading(self, sensor_id):
+        """
+        Returns the bytes of the Get Sensor Reading response of a sensor
+        """
+        with self.lock:
+            if sensor_id not in self.sensor_ids:
+                self.sensor_ids.append(sensor_id)
+                self.timestamp = 0
+            if time.time() - self.timestamp >= self.ttl:
+                self.readings = self._read_all()
+                self.timestamp = time.time()
+            return self.readings.get(sensor_id, [])
+
+
+_sensor_registry = IpmiSensorRegistry()
+
+
 class IpmiSensor(object):
 
     # Sensor Threshold types and their respective bit masks
@@ -38,6 +154,10 @@ class IpmiSensor(object):
     def __init__(self, sensor_id, is_discrete=False):
         self.id = sensor_id
         self.is_discrete = is_discrete
+        # Reading factors and thresholds, read once
+        self.factors = None
+        self.thresholds = None
+        _sensor_registry.register(sensor_id)
 
     def _get_ipmitool_raw_output(self, args):
         """
@@ -45,34 +165,38 @@ class IpmiSensor(object):
         ipmitool raw <cmd> command output.
         """
         result_bytes = list()
-        result = ""
-        command = "ipmitool raw {}".format(args)
-        try:
-            proc = subprocess.Popen(command.split(), stdout=subprocess.PIPE,
-                                    stderr=subprocess.STDOUT)
-            stdout = proc.communicate()[0]
-            proc.wait()
-            if not proc.returncode:
-                result = stdout.rstrip('\n')
-        except Exception as e:
-            pass
+        result = _run_ipmitool("raw {}".format(args))
 
         for i in result.split():
             result_bytes.append(int(i, 16))
 
         return result_bytes
 
+    def _get_reading_factors(self, raw_value):
+        """
+        Returns the reading factors of the sensor. They are read once,
+        as the sensors of the BMC are linear, their factors don't depend
+        on the reading.
+        """
+        if self.factors is None:
+            # Get Sensor Reading Factors
+            cmd_args = "{} {} {} {}".format(NetFn_SensorEvent,
+                                            Cmd_GetSensorReadingFactors,
+                                            self.id, raw_value)
+            factors = self._get_ipmitool_raw_output(cmd_args)
+            if len(factors) != 7:
+                return factors
+            self.factors = factors
+
+        return self.factors
+
     def _get_converted_sensor_reading(self, raw_value):
         """
         Returns a 2 element tuple(bool, int) in which first element
         provides the validity of the reading and the second element is
         the converted sensor reading
         """
-        # Get Sensor Reading Factors
-        cmd_args = "{} {} {} {}".format(NetFn_SensorEvent,
-                                        Cmd_GetSensorReadingFactors,
-                                        self.id, raw_value)
-        factors = self._get_ipmitool_raw_output(cmd_args)
+        factors = self._get_reading_factors(raw_value)
 
         if len(factors) != 7:
             return False, 0
@@ -104,10 +228,8 @@ class IpmiSensor(object):
             validity of the reading and the second element provides the
             sensor reading/state value.
         """
-        # Get Sensor Reading
-        cmd_args = "{} {} {}".format(NetFn_SensorEvent, Cmd_GetSensorReading,
-                                     self.id)
-        output = self._get_ipmitool_raw_output(cmd_args)
+        # Get Sensor Reading, from the last reading of all sensors
+        output = _sensor_registry.get_reading(self.id)
         if len(output) != 4:
             return False, 0
 
@@ -151,13 +273,16 @@ class IpmiSensor(object):
 
         bit_mask = self.THRESHOLD_BIT_MASK[threshold_type]
 
-        # Get Sensor Threshold
-        cmd_args = "{} {} {}".format(NetFn_SensorEvent, Cmd_GetSensorThreshold,
-                                     self.id)
-        thresholds = self._get_ipmitool_raw_output(cmd_args)
-        if len(thresholds) != 7:
-            return False, 0
+        # Get Sensor Threshold, read once
+        if self.thresholds is None:
+            cmd_args = "{} {} {}".format(NetFn_SensorEvent,
+                                         Cmd_GetSensorThreshold, self.id)
+            thresholds = self._get_ipmitool_raw_output(cmd_args)
+            if len(thresholds) != 7:
+                return False, 0
+            self.thresholds = thresholds
 
+        thresholds = list(self.thresholds)
         valid_thresholds = thresholds.pop(0)
         # Check whether particular threshold is readable
         if valid_thresholds & (1 << bit_mask):
@@ -171,19 +296,7 @@ class IpmiFru(object):
         self.id = fru_id
 
     def _get_ipmitool_fru_print(self):
-        result = ""
-        command = "ipmitool fru print {}".format(self.id)
-        try:
-            proc = subprocess.Popen(command.split(), stdout=subprocess.PIPE,
-                                    stderr=subprocess.STDOUT)
-            stdout = proc.communicate()[0]
-            proc.wait()
-            if not proc.returncode:
-                result = stdout.rstrip('\n')
-        except Exception as e:
-            pass
-
-        return result
+        return _run_ipmitool("fru print {}".format(self.id))
 
     def _get_from_fru(self, info):
         """
@@ -238,26 +351,14 @@ class IpmiFru(object):
             FRU data read.
         """
         result_bytes = list()
-        is_valid = True
-        result = ""
 
         offset_LSB = offset & 0xFF
         offset_MSB = offset & 0xFF00
-        command = "ipmitool raw {} {} {} {} {} {}".format(NetFn_Storage,
-                                                          Cmd_ReadFRUData,
-                                                          self.id, offset_LSB,
-                                                          offset_MSB, count)
-        try:
-            proc = subprocess.Popen(command.split(), stdout=subprocess.PIPE,
-                                    stderr=subprocess.STDOUT)
-            stdout = proc.communicate()[0]
-            proc.wait()
-            if not proc.returncode:
-                result = stdout.rstrip('\n')
-        except Exception as e:
-            is_valid = False
-
-        if (not result) or (not is_valid):
+        result = _run_ipmitool("raw {} {} {} {} {} {}".format(NetFn_Storage,
+                                                              Cmd_ReadFRUData,
+                                                              self.id, offset_LSB,
+                                                              offset_MSB, count))
+        if not result:
             return False, result_bytes
 
         for i in result.split():
@@ -0,0 +1,164 @@
+#! /usr/bin/python
+
+########################################################################
+# DellEMC
+#
+# Stand-in for ipmitool, answering the raw sensor commands, "exec" and
+# "fru print" used by ipmihelper.py from a simulated BMC, and counting the
+# times it is run.
+#
+# With --bench, it puts itself first in PATH as ipmitool and polls the
+# sensors of a platform as thermalctld and psud do, then prints the number
+# of ipmitool processes per poll, e.g. to compare two versions of
+# ipmihelper.py:
+#
+#   python ipmitool_standin.py --bench
+#   python ipmitool_standin.py --bench --helper /tmp/old_ipmihelper.py
+#
+########################################################################
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+# File to which every run appends a line
+COUNT_FILE_ENV = "IPMITOOL_STANDIN_COUNT"
+# If set, every run prints this warning on stderr, as ipmitool does with
+# some BMCs
+WARNING_ENV = "IPMITOOL_STANDIN_WARNING"
+
+NetFn_SensorEvent = 0x04
+Cmd_GetSensorReadingFactors = 0x23
+Cmd_GetSensorThreshold = 0x27
+Cmd_GetSensorReading = 0x2D
+
+# Sensors the BMC doesn't have, whose commands fail
+ABSENT_SENSORS = [0x70]
+
+# Sensors of the z9264f platform API
+THERMAL_SENSORS = [0x6, 0x8, 0x3, 0x7, 0x4, 0x5, 0x2, 0x1]
+PSU_SENSORS = [0x39, 0x37, 0x38, 0x3f, 0x3d, 0x3e]
+PSU_STATE_SENSORS = [0x31, 0x32]
+FAN_SENSORS = [0x24, 0x20, 0x25, 0x21, 0x26, 0x22, 0x27, 0x23, 0x2e, 0x2f]
+FAN_STATE_SENSORS = [0x51, 0x52, 0x53, 0x54, 0x64, 0x60, 0x65, 0x61, 0x66,
+                     0x62, 0x67, 0x63, 0x46, 0x47]
+
+
+def _raw(netfn, cmd, data):
+    """
+    Returns the response bytes of a request, None for a failure
+    """
+    if netfn != NetFn_SensorEvent or not data or data[0] in ABSENT_SENSORS:
+        return None
+    sensor_id = data[0]
+    if cmd == Cmd_GetSensorReading:
+        return [(sensor_id * 7) & 0x7f, 0xc0, 0x01, 0x00]
+    if cmd == Cmd_GetSensorReadingFactors:
+        # M = 2, B = 1, R_exp = 0, B_exp = 0
+        return [0x00, 0x02, 0x00, 0x01, 0x00, 0x00, 0x00]
+    if cmd == Cmd_GetSensorThreshold:
+        return [0x3f, 1, 2, 3, 100, 110, 120]
+    return None
+
+
+def _run(args, out):
+    """
+    Runs one ipmitool command, returns its exit code
+    """
+    if args[:1] == ["raw"] and len(args) >= 3:
+        response = _raw(int(args[1], 0), int(args[2], 0),
+                        [int(i, 0) for i in args[3:]])
+        if response is None:
+            sys.stderr.write("Unable to send RAW command\n")
+            return 1
+        out.write(" " + " ".join("{:02x}".format(b) for b in response) + "\n")
+        return 0
+    if args[:1] == ["exec"] and len(args) == 2:
+        rc = 0
+        with open(args[1]) as f:
+            for line in f:
+                if line.strip():
+                    rc = _run(line.split(), out) or rc
+        return rc
+    if args[:2] == ["fru", "print"]:
+        out.write(" Board Mfg             : DELL\n"
+                  " Board Product         : PWR SPLY,495W,RDNT\n"
+                  " Board Serial          : CN0000000000000000\n"
+                  " Board Part Number     : 0ABCDEA00\n")
+        return 0
+    sys.stderr.write("Unsupported command: {}\n".format(" ".join(args)))
+    return 1
+
+
+def _load_helper(path):
+    """
+    Imports ipmihelper.py from path
+    """
+    import imp
+    return imp.load_source("ipmihelper_bench", path)
+
+
+def bench(helper_path, polls=3):
+    bindir = tempfile.mkdtemp()
+    count_file = os.path.join(bindir, "count")
+    try:
+        os.symlink(os.path.abspath(__file__), os.path.join(bindir, "ipmitool"))
+        os.environ["PATH"] = bindir + os.pathsep + os.environ["PATH"]
+        os.environ[COUNT_FILE_ENV] = count_file
+
+        ipmihelper = _load_helper(helper_path)
+        thermals = [ipmihelper.IpmiSensor(i) for i in THERMAL_SENSORS]
+        others = [ipmihelper.IpmiSensor(i) for i in PSU_SENSORS + FAN_SENSORS]
+        others += [ipmihelper.IpmiSensor(i, is_discrete=True)
+                   for i in PSU_STATE_SENSORS + FAN_STATE_SENSORS]
+
+        def count():
+            if not os.path.exists(count_file):
+                return 0
+            with open(count_file) as f:
+                return len(f.readlines())
+
+        for poll in range(polls):
+            start_count = count()
+            start = time.time()
+            for sensor in thermals:
+                sensor.get_reading()
+                sensor.get_threshold("UpperNonRecoverable")
+                sensor.get_threshold("LowerNonRecoverable")
+            for sensor in others:
+                sensor.get_reading()
+            print("poll {}: {} sensors, {} ipmitool processes, {:.1f} ms".format(
+                poll + 1, len(thermals) + len(others), count() - start_count,
+                (time.time() - start) * 1000))
+            # let the readings expire
+            time.sleep(getattr(ipmihelper, "SENSOR_READING_TTL", 0))
+    finally:
+        shutil.rmtree(bindir)
+
+
+def main(argv):
+    if argv[:1] == ["--bench"]:
+        helper_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                   "ipmihelper.py")
+        if argv[1:2] == ["--helper"] and len(argv) == 3:
+            helper_path = argv[2]
+        bench(helper_path)
+        return 0
+
+    count_file = os.environ.get(COUNT_FILE_ENV)
+    if count_file:
+        with open(count_file, "a") as f:
+            f.write(" ".join(argv) + "\n")
+    warning = os.environ.get(WARNING_ENV)
+    if warning:
+        sys.stderr.write(warning + "\n")
+    # Options such as "-I open" are accepted and ignored
+    while argv[:1] and argv[0].startswith("-"):
+        argv = argv[2:]
+    return _run(argv, sys.stdout)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
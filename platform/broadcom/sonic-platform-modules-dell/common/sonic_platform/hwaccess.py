@@ -1,22 +1,79 @@
 # Helper functions to access hardware
 
+import os
 import struct
 import mmap
 import subprocess
+import threading
 
 # Read PCI device
 
+class PciRegisterBank(object):
+    """
+    32-bit registers of a PCI resource (BAR). The resource is mapped on
+    first access and stays mapped for the lifetime of the process.
+    """
+
+    def __init__(self, resource):
+        self.resource = resource
+        self.lock = threading.Lock()
+        self.mm = None
+
+    def _get_map(self):
+        if self.mm is None:
+            fd = os.open(self.resource, os.O_RDWR)
+            try:
+                self.mm = mmap.mmap(fd, 0)
+            finally:
+                os.close(fd)
+        return self.mm
+
+    def read(self, offset):
+        with self.lock:
+            return struct.unpack_from('I', self._get_map(), offset)[0]
+
+    def read_many(self, offset, count, stride=4):
+        """
+        Read count registers starting at offset, stride bytes apart
+        """
+        with self.lock:
+            mm = self._get_map()
+            return [struct.unpack_from('I', mm, offset + i * stride)[0]
+                    for i in range(count)]
+
+    def write(self, offset, value):
+        with self.lock:
+            struct.pack_into('I', self._get_map(), offset, value)
+
+    def close(self):
+        with self.lock:
+            if self.mm is not None:
+                self.mm.close()
+                self.mm = None
+
+_register_banks = {}
+_register_banks_lock = threading.Lock()
+
+def get_register_bank(resource):
+    """
+    Retrieves the PciRegisterBank of resource shared by the process
+    """
+    with _register_banks_lock:
+        bank = _register_banks.get(resource)
+        if bank is None:
+            bank = _register_banks[resource] = PciRegisterBank(resource)
+        return bank
+
 def pci_mem_read(mm, offset):
     mm.seek(offset)
     read_data_stream = mm.read(4)
     return struct.unpack('I',read_data_stream)[0]
 
 def pci_get_value(resource, offset):
-    with open(resource, 'r+b') as fd:
-        mm = mmap.mmap(fd.fileno(), 0)
-        val = pci_mem_read(mm, offset)
-        mm.close()
-    return val
+    return get_register_bank(resource).read(offset)
+
+def pci_set_value(resource, val, offset):
+    get_register_bank(resource).write(offset, val)
 
 # Read I2C device
 
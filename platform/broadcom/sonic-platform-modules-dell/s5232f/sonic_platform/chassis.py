@@ -13,6 +13,7 @@ from __future__ import division
 try:
     import sys 
     from sonic_platform_base.chassis_base import ChassisBase
+    import sonic_platform.hwaccess as hwaccess
     from sonic_platform.sfp import Sfp
     from sonic_platform.eeprom import Eeprom
     from sonic_platform.component import Component
@@ -69,9 +70,9 @@ class Chassis(ChassisBase):
         self._thermal_list = [Thermal(i) for i in range(MAX_S5232F_THERMAL)]
         self._component_list = [Component(i) for i in range(MAX_S5232F_COMPONENT)]
 
+        presence_all = self._get_presence_all()
         for port_num in range(self.PORT_START, self.PORTS_IN_BLOCK):
-            # sfp get uses zero-indexing, but port numbers start from 1
-            presence = self.get_sfp(port_num).get_presence()
+            presence = presence_all[port_num]
             self._global_port_pres_dict[port_num] = '1' if presence else '0'
 
     def __del__(self):
@@ -80,6 +81,17 @@ class Chassis(ChassisBase):
             self.epoll.close()
             self.oir_fd.close()
 
+    def _get_presence_all(self):
+        """
+        Reads the status registers of all the ports at once and returns
+        a dict of port number to presence
+        """
+        bank = hwaccess.get_register_bank(Sfp.BASE_RES_PATH)
+        status = bank.read_many(Sfp.PORT_STATUS_OFFSET, len(self._sfp_list),
+                                Sfp.PORT_STATUS_STRIDE)
+        return dict((index + 1, sfp.is_present_in_status(status[index]))
+                    for index, sfp in enumerate(self._sfp_list))
+
 # check for this event change for sfp / do we need to handle timeout/sleep
 
     def get_change_event(self, timeout=0):
@@ -96,8 +108,9 @@ class Chassis(ChassisBase):
         sleep_time = sleep_time_ms / 1000
 
         while True:
+            presence_all = self._get_presence_all()
             for port_num in range(self.PORT_START, (self.PORT_END + 1)):
-                presence = self.get_sfp(port_num).get_presence()
+                presence = presence_all[port_num]
                 if(presence and self._global_port_pres_dict[port_num] == '0'):
                     self._global_port_pres_dict[port_num] = '1'
                     port_dict[port_num] = '1'
@@ -105,6 +118,8 @@ class Chassis(ChassisBase):
                      self._global_port_pres_dict[port_num] == '1'):
                     self._global_port_pres_dict[port_num] = '0'
                     port_dict[port_num] = '0'
+                if port_num in port_dict:
+                    self.get_sfp(port_num).clear_eeprom_cache()
 
                 if(len(port_dict) > 0):
                     return True, change_dict 
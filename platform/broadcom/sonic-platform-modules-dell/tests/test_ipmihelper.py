@@ -0,0 +1,115 @@
+import os
+import sys
+import stat
+import shutil
+import tempfile
+
+import mock
+
+test_path = os.path.dirname(os.path.abspath(__file__))
+common_path = os.path.join(os.path.dirname(test_path), 'common')
+sys.path.insert(0, common_path)
+
+import ipmihelper
+import ipmitool_standin
+from ipmihelper import IpmiSensorRegistry
+
+SENSORS = ipmitool_standin.THERMAL_SENSORS + ipmitool_standin.FAN_SENSORS
+ABSENT_SENSOR = ipmitool_standin.ABSENT_SENSORS[0]
+THERMAL_SENSOR = ipmitool_standin.THERMAL_SENSORS[0]
+
+# The stand-in as ipmitool, run by the python of the tests
+IPMITOOL = """#!/bin/sh
+exec {python} {standin} "$@"
+"""
+
+
+class TestIpmiSensorRegistry(object):
+
+    def setup_method(self, method):
+        self.bindir = tempfile.mkdtemp(prefix='ipmitool')
+        self.count_file = os.path.join(self.bindir, 'count')
+        ipmitool = os.path.join(self.bindir, 'ipmitool')
+        with open(ipmitool, 'w') as f:
+            f.write(IPMITOOL.format(python=sys.executable,
+                                    standin=os.path.join(common_path, 'ipmitool_standin.py')))
+        os.chmod(ipmitool, stat.S_IRWXU)
+        self.environ = mock.patch.dict(os.environ, {
+            'PATH': self.bindir + os.pathsep + os.environ['PATH'],
+            ipmitool_standin.COUNT_FILE_ENV: self.count_file})
+        self.environ.start()
+
+    def teardown_method(self, method):
+        self.environ.stop()
+        shutil.rmtree(self.bindir)
+
+    def count(self):
+        if not os.path.exists(self.count_file):
+            return 0
+        with open(self.count_file) as f:
+            return len(f.readlines())
+
+    def poll(self, registry, sensor_ids):
+        """
+        Reads the sensors once their readings expired, returns the
+        readings and the number of ipmitool processes run
+        """
+        start_count = self.count()
+        registry.timestamp = 0
+        readings = dict((i, registry.get_reading(i)) for i in sensor_ids)
+        return readings, self.count() - start_count
+
+    def expected(self, sensor_id):
+        return ipmitool_standin._raw(ipmitool_standin.NetFn_SensorEvent,
+                                     ipmitool_standin.Cmd_GetSensorReading,
+                                     [sensor_id]) or []
+
+    def test_one_process(self):
+        registry = IpmiSensorRegistry()
+        for sensor_id in SENSORS:
+            registry.register(sensor_id)
+        for _ in range(3):
+            readings, processes = self.poll(registry, SENSORS)
+            assert processes == 1
+            assert readings == dict((i, self.expected(i)) for i in SENSORS)
+        assert registry.failed_ids == set()
+
+    def test_stderr_warning(self):
+        # printed by ipmitool on every run with some BMCs, left out of the
+        # responses
+        os.environ[ipmitool_standin.WARNING_ENV] = \
+            'Get HPM.x Capabilities request failed, compcode = c9'
+        registry = IpmiSensorRegistry()
+        for sensor_id in SENSORS:
+            registry.register(sensor_id)
+        for _ in range(3):
+            readings, processes = self.poll(registry, SENSORS)
+            assert processes == 1
+            assert readings == dict((i, self.expected(i)) for i in SENSORS)
+        assert registry.failed_ids == set()
+
+    def test_failed_sensor(self):
+        sensor_ids = SENSORS + [ABSENT_SENSOR]
+        registry = IpmiSensorRegistry()
+        for sensor_id in sensor_ids:
+            registry.register(sensor_id)
+
+        # the exec fails, then every sensor is read on its own once
+        readings, processes = self.poll(registry, sensor_ids)
+        assert processes == 1 + len(sensor_ids)
+        assert readings[ABSENT_SENSOR] == []
+        assert registry.failed_ids == set([ABSENT_SENSOR])
+
+        # the others together, the failed one on its own
+        for _ in range(2):
+            readings, processes = self.poll(registry, sensor_ids)
+            assert processes == 2
+            assert readings == dict((i, self.expected(i)) for i in sensor_ids)
+
+    def test_sensor_reading(self):
+        sensor = ipmihelper.IpmiSensor(THERMAL_SENSOR)
+        is_valid, reading = sensor.get_reading()
+        assert is_valid
+        # M = 2, B = 1
+        assert reading == self.expected(THERMAL_SENSOR)[0] * 2 + 1
+
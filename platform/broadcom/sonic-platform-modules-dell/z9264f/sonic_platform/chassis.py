@@ -13,6 +13,7 @@ try:
     import sys
     import select
     from sonic_platform_base.chassis_base import ChassisBase
+    import sonic_platform.hwaccess as hwaccess
     from sonic_platform.sfp import Sfp
     from sonic_platform.eeprom import Eeprom
     from sonic_platform.component import Component
@@ -83,8 +84,9 @@ class Chassis(ChassisBase):
             thermal = Thermal(i)
             self._thermal_list.append(thermal)
         
+        presence_all = self._get_presence_all()
         for port_num in range(self.PORT_START, (self.PORT_END + 1)):
-            presence = self.get_sfp(port_num).get_presence()
+            presence = presence_all[port_num]
             if presence:
                 self._global_port_pres_dict[port_num] = '1'
             else:
@@ -111,12 +113,23 @@ class Chassis(ChassisBase):
         retval = retval.lstrip(" ")
         return retval
 
+    def _get_presence_all(self):
+        """
+        Reads the status registers of all the ports at once and returns
+        a dict of port number to presence
+        """
+        bank = hwaccess.get_register_bank(Sfp.BASE_RES_PATH)
+        status = bank.read_many(Sfp.PORT_STATUS_OFFSET, len(self._sfp_list),
+                                Sfp.PORT_STATUS_STRIDE)
+        return dict((index + 1, sfp.is_present_in_status(status[index]))
+                    for index, sfp in enumerate(self._sfp_list))
+
     def _check_interrupts(self, port_dict):
         retval = 0
         is_port_dict_updated = False
+        presence_all = self._get_presence_all()
         for port_num in range(self.PORT_START, (self.PORT_END + 1)):
-            sfp = self.get_sfp(port_num)
-            presence = sfp.get_presence()
+            presence = presence_all[port_num]
             if(presence and (self._global_port_pres_dict[port_num] == '0')):
                 is_port_dict_updated = True
                 self._global_port_pres_dict[port_num] = '1'
@@ -125,6 +138,8 @@ class Chassis(ChassisBase):
                 is_port_dict_updated = True
                 self._global_port_pres_dict[port_num] = '0'
                 port_dict[port_num] = '0'
+            if port_num in port_dict:
+                self.get_sfp(port_num).clear_eeprom_cache()
         return retval, is_port_dict_updated
 
     def get_change_event(self, timeout=0):
@@ -0,0 +1 @@
+../../common/sonic_platform/hwaccess.py
\ No newline at end of file
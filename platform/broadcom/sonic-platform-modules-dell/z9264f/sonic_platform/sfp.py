@@ -9,10 +9,10 @@
 #############################################################################
 
 try:
-    import os
     import time
-    import struct
-    import mmap
+    import functools
+    import threading
+    import sonic_platform.hwaccess as hwaccess
     from sonic_platform_base.sfp_base import SfpBase
     from sonic_platform_base.sonic_sfp.sff8436 import sff8436InterfaceId
     from sonic_platform_base.sonic_sfp.sff8436 import sff8436Dom
@@ -40,6 +40,8 @@ SFP_STATUS_CONTROL_WIDTH = 7
 SFP_TX_DISABLE_HARD_BIT = 7
 SFP_TX_DISABLE_SOFT_BIT = 6
 
+EEPROM_PAGE_SIZE = 128
+
 qsfp_cable_length_tup = ('Length(km)', 'Length OM3(2m)', 'Length OM2(m)',
                     'Length OM1(m)', 'Length Cable Assembly(m)')
 
@@ -151,11 +153,31 @@ sff8472_parser = {
 }
 
 
+def eeprom_cached(func):
+    """
+    Serve the EEPROM reads of one call from a single read of each
+    EEPROM page touched, instead of one read per field
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if getattr(self._local, 'pages', None) is not None:
+            return func(self, *args, **kwargs)
+        self._local.pages = {}
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            self._local.pages = None
+    return wrapper
+
+
 class Sfp(SfpBase):
     """
     DELLEMC Platform-specific Sfp class
     """
     BASE_RES_PATH = "/sys/bus/pci/devices/0000:04:00.0/resource0"
+    # Per port status registers, 16 bytes apart
+    PORT_STATUS_OFFSET = 0x4004
+    PORT_STATUS_STRIDE = 16
     OIR_FD_PATH = "/sys/bus/pci/devices/0000:04:00.0/port_msi"
 
     def __init__(self, index, sfp_type, eeprom_path):
@@ -167,62 +189,46 @@ class Sfp(SfpBase):
         self.qsfpDomInfo = sff8436Dom()
         self.sfpInfo = sff8472InterfaceId()
         self.sfpDomInfo = sff8472Dom(None,1)
-
-    def pci_mem_read(self, mm, offset):
-        mm.seek(offset)
-        read_data_stream = mm.read(4)
-        reg_val = struct.unpack('I', read_data_stream)
-        mem_val = str(reg_val)[1:-2]
-        # print "reg_val read:%x"%reg_val
-        return mem_val
-
-    def pci_mem_write(self, mm, offset, data):
-        mm.seek(offset)
-        # print "data to write:%x"%data
-        mm.write(struct.pack('I', data))
+        self._local = threading.local()
+        self._transceiver_info = None
 
     def pci_set_value(self, resource, val, offset):
-        fd = os.open(resource, os.O_RDWR)
-        mm = mmap.mmap(fd, 0)
-        val = self.pci_mem_write(mm, offset, val)
-        mm.close()
-        os.close(fd)
-        return val
+        hwaccess.pci_set_value(resource, val, offset)
 
     def pci_get_value(self, resource, offset):
-        fd = os.open(resource, os.O_RDWR)
-        mm = mmap.mmap(fd, 0)
-        val = self.pci_mem_read(mm, offset)
-        mm.close()
-        os.close(fd)
-        return val
+        return hwaccess.pci_get_value(resource, offset)
 
-    def _read_eeprom_bytes(self, eeprom_path, offset, num_bytes):
-        eeprom_raw = []
+    def _read_eeprom_raw(self, eeprom_path, offset, num_bytes):
         try:
-            eeprom = open(eeprom_path, mode="rb", buffering=0)
+            with open(eeprom_path, mode="rb", buffering=0) as eeprom:
+                eeprom.seek(offset)
+                raw = eeprom.read(num_bytes)
         except IOError:
             return None
 
-        for i in range(0, num_bytes):
-            eeprom_raw.append("0x00")
-
-        try:
-            eeprom.seek(offset)
-            raw = eeprom.read(num_bytes)
-        except IOError:
-            eeprom.close()
+        if len(raw) != num_bytes:
             return None
 
-        try:
-            for n in range(0, num_bytes):
-                eeprom_raw[n] = hex(ord(raw[n]))[2:].zfill(2)
-        except BaseException:
-            eeprom.close()
-            return None
+        return ['{:02x}'.format(byte) for byte in bytearray(raw)]
+
+    def _read_eeprom_bytes(self, eeprom_path, offset, num_bytes):
+        pages = getattr(self._local, 'pages', None)
+        if pages is not None:
+            first_page = offset // EEPROM_PAGE_SIZE
+            last_page = (offset + num_bytes - 1) // EEPROM_PAGE_SIZE
+            eeprom_raw = []
+            for page in range(first_page, last_page + 1):
+                if page not in pages:
+                    pages[page] = self._read_eeprom_raw(
+                        eeprom_path, page * EEPROM_PAGE_SIZE, EEPROM_PAGE_SIZE)
+                if pages[page] is None:
+                    break
+                eeprom_raw.extend(pages[page])
+            else:
+                start = offset - first_page * EEPROM_PAGE_SIZE
+                return eeprom_raw[start:start + num_bytes]
 
-        eeprom.close()
-        return eeprom_raw
+        return self._read_eeprom_raw(eeprom_path, offset, num_bytes)
 
     def _get_eeprom_data(self, eeprom_key):
         eeprom_data = None
@@ -275,10 +281,29 @@ class Sfp(SfpBase):
 
         return eeprom_data
 
+    def clear_eeprom_cache(self):
+        """
+        Drops the transceiver info kept from the module which was plugged
+        """
+        self._transceiver_info = None
+
     def get_transceiver_info(self):
         """
-        Retrieves transceiver info of this SFP
+        Retrieves transceiver info of this SFP, which is read once per
+        plugged module
         """
+        if not self.get_presence():
+            self._transceiver_info = None
+            return self._read_transceiver_info()
+        if self._transceiver_info is None:
+            transceiver_info_dict = self._read_transceiver_info()
+            if transceiver_info_dict['type'] == 'N/A':
+                return transceiver_info_dict
+            self._transceiver_info = transceiver_info_dict
+        return dict(self._transceiver_info)
+
+    @eeprom_cached
+    def _read_transceiver_info(self):
         transceiver_info_dict = {}
         compliance_code_dict = {}
         transceiver_info_dict = dict.fromkeys(info_dict_keys, 'N/A')
@@ -376,6 +401,7 @@ class Sfp(SfpBase):
 
         return transceiver_info_dict
 
+    @eeprom_cached
     def get_transceiver_threshold_info(self):
         """
         Retrieves transceiver threshold info of this SFP
@@ -439,6 +465,7 @@ class Sfp(SfpBase):
 
         return transceiver_dom_threshold_dict
 
+    @eeprom_cached
     def get_transceiver_bulk_status(self):
         """
         Retrieves transceiver bulk status of this SFP
@@ -529,18 +556,15 @@ class Sfp(SfpBase):
         Retrieves the presence of the sfp
         Returns : True if sfp is present and false if it is absent
         """
-        # Check for invalid port_num
-
-        # Port offset starts with 0x4004
-        port_offset = 16388 + ((self.index-1) * 16)
+        port_offset = self.PORT_STATUS_OFFSET + ((self.index-1) * self.PORT_STATUS_STRIDE)
 
         status = self.pci_get_value(self.BASE_RES_PATH, port_offset)
-        reg_value = int(status)
-
-        # Absence of status throws error
-        if (reg_value == ""):
-            return False
+        return self.is_present_in_status(status)
 
+    def is_present_in_status(self, reg_value):
+        """
+        Retrieves the presence of the sfp from the value of its status register
+        """
         # Mask off 4th bit for presence
         if(self.sfp_type == 'QSFP'):
             mask = (1 << 4)
@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2018 Inventec, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Stand-in for the bcm diag shell socket of syncd, with the commands used
+# by led_proc.py: "ps", "config", "led status" and getreg/setreg of the LED
+# data ram.
+#
+# With -b it benchmarks the LED update of led_proc against it, one bcm
+# shell round trip per register access as before and batched, e.g.:
+#
+#     python bcmshell_server.py -b -n 32 -n 64
+#
+# Without -b it only serves the socket, e.g. to run led_proc against it.
+
+import os
+import re
+import sys
+import time
+import random
+import getopt
+import shutil
+import tempfile
+import threading
+try:
+    import SocketServer as socketserver
+except ImportError:
+    import socketserver
+
+PROMPT      = "drivshell>"
+SOCKET_NAME = "/var/run/sswsyncd/sswsyncd.socket"
+TICKS       = 20
+
+
+class DiagShell():
+    """
+    State of the switch behind the shell: ports, LED data ram and counters
+    """
+
+    def __init__(self, num_ports, latency=0, activity=0.2):
+        self.num_ports = num_ports
+        # time spent by the SDK on a register access
+        self.latency = latency
+        # probability that the rx/tx status of a port changes between reads
+        self.activity = activity
+        self.data_ram = {}
+        # port number -> link and speed in G of "ps", up at 100G if missing
+        self.link = {}
+        self.speed = {}
+        self.lock = threading.Lock()
+        self.random = random.Random(0)
+        self.connections = 0
+        self.lines = 0
+        self.commands = 0
+
+    def reset_counters(self):
+        with self.lock:
+            self.connections = 0
+            self.lines = 0
+            self.commands = 0
+
+    def ps(self):
+        lines = ["                 ena/    speed/ link auto    STP                  lrn  inter   max   cut   loop",
+                 "           port  link    duplex scan neg?   state   pause  discrd ops   face frame  thru?  back"]
+        for num in range(self.num_ports):
+            lines.append("       ce{0}({1:3d})  {2:<5}  4  {3}G  FD   SW  No   Forward          None   FA    CR4  9412  No".format(
+                num, num + 1, self.link.get(num, "up"), self.speed.get(num, 100)))
+        return lines
+
+    def config(self):
+        return ["portmap_{0}={1}:100".format(num + 1, num * 4 + 1) for num in range(self.num_ports)]
+
+    def led_status(self):
+        return ["{0:4d} {1:>6}  {2}:".format(num + 1, "ce{0}".format(num), num // 36) for num in range(self.num_ports)]
+
+    def getreg(self, up, index):
+        key = (up, index)
+        value = self.data_ram.get(key, 0)
+        if self.random.random() < self.activity:
+            value ^= self.random.choice((1, 2, 3))
+            self.data_ram[key] = value
+        return ["CMIC_LEDUP{0}_DATA_RAM({1})=0x{2:x}: <DATA=0x{2:x}>".format(up, index, value)]
+
+    def setreg(self, up, index, value):
+        self.data_ram[(up, index)] = int(value, 0)
+        return []
+
+    def execute(self, line):
+        output = []
+        with self.lock:
+            self.lines += 1
+            for cmd in line.split(";"):
+                cmd = cmd.strip()
+                if not cmd:
+                    continue
+                self.commands += 1
+                match = re.match(r"(get|set)reg CMIC_LEDUP(\d)_DATA_RAM\((\d+)\)\s*(\S*)$", cmd)
+                if match:
+                    if self.latency:
+                        time.sleep(self.latency)
+                    up, index = int(match.group(2)), int(match.group(3))
+                    if match.group(1) == "get":
+                        output += self.getreg(up, index)
+                    else:
+                        output += self.setreg(up, index, match.group(4))
+                elif cmd == "ps":
+                    output += self.ps()
+                elif cmd == "led status":
+                    output += self.led_status()
+                elif cmd == "config":
+                    output += self.config()
+                elif cmd != "Echo":
+                    output.append("Unknown command: {0}".format(cmd))
+        return output
+
+
+class ShellHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        shell = self.server.shell
+        with shell.lock:
+            shell.connections += 1
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            line = line.decode().rstrip("\r\n")
+            output = shell.execute(line) if line.strip() else []
+            reply = [line] + output + [PROMPT]
+            self.wfile.write("\r\n".join(reply).encode())
+            self.wfile.flush()
+
+
+class ShellServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_name, shell):
+        if os.path.exists(socket_name):
+            os.unlink(socket_name)
+        socketserver.UnixStreamServer.__init__(self, socket_name, ShellHandler)
+        self.shell = shell
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        os.unlink(self.server_address)
+
+
+def _bench_mode(led_proc, shell, socket_name, batched):
+    from sonic_sfp.bcmshell import bcmshell
+
+    led_proc.BCM_SHELL = bcmshell(keepopen=batched, socketname=socket_name)
+    led_proc.LED_ENGINE.reset()
+    led_proc.PORT_LIST = []
+    led_proc._update_port_list(0)
+    ports = led_proc.PORT_LIST
+
+    shell.reset_counters()
+    start = time.time()
+    for tick in range(TICKS):
+        if batched:
+            led_proc.update_active_ports(ports)
+        else:
+            for port in ports:
+                port.write_data_ram(led_proc._port_led_data(port, port.read_data_ram()))
+    elapsed = time.time() - start
+
+    print("{0:>4} ports {1:>8}: {2:6.1f} round trips, {3:6.1f} connections, {4:7.2f} ms per tick".format(
+          len(ports), "batched" if batched else "per port", float(shell.lines) / TICKS,
+          float(shell.connections) / TICKS, elapsed * 1000 / TICKS))
+
+
+def bench(port_counts, latency):
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import led_proc
+
+    led_proc.BOARD_TPYE = "inventec_d6254qs"
+    led_proc.BIT_RX     = 1<<0
+    led_proc.BIT_TX     = 1<<1
+    led_proc.BIT_SPEED1 = 1<<4
+    led_proc.BIT_LINK   = 1<<7
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        for num_ports in port_counts:
+            shell = DiagShell(num_ports, latency)
+            server = ShellServer(os.path.join(tmpdir, "sswsyncd.socket"), shell)
+            server.start()
+            try:
+                for batched in (False, True):
+                    _bench_mode(led_proc, shell, server.server_address, batched)
+            finally:
+                server.stop()
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def main(argv):
+    usage = "Usage: {0} [-s <socket>] [-n <ports>]... [-l <latency ms>] [-b]".format(sys.argv[0])
+    try:
+        opts, args = getopt.getopt(argv, "hbs:n:l:")
+    except getopt.GetoptError:
+        print(usage)
+        return 1
+
+    socket_name = SOCKET_NAME
+    port_counts = []
+    latency = 0
+    run_bench = False
+    for opt, arg in opts:
+        if opt == "-h":
+            print(usage)
+            return 0
+        elif opt == "-b":
+            run_bench = True
+        elif opt == "-s":
+            socket_name = arg
+        elif opt == "-n":
+            port_counts.append(int(arg))
+        elif opt == "-l":
+            latency = float(arg) / 1000
+
+    if run_bench:
+        bench(port_counts or [32, 64], latency)
+        return 0
+
+    server = ShellServer(socket_name, DiagShell(port_counts[0] if port_counts else 32, latency))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(socket_name)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -20,6 +20,7 @@ import time
 import syslog
 import re
 from sonic_sfp.bcmshell import bcmshell
+from port_state import PortStateSubscriber
 
 
 # =====================================================================
@@ -27,6 +28,8 @@ from sonic_sfp.bcmshell import bcmshell
 # =====================================================================
 # port object
 PORT_LIST               = []
+# first lane -> port object
+PORT_BY_LANE            = {}
 # object is to execute bcm shell command
 BCM_SHELL   = None
 SHELL_READY = False
@@ -35,6 +38,10 @@ STATUS_RX               = 1<<0
 STATUS_TX               = 1<<1
 # define data ram address
 PORT_DATA_OFFSET_ADDR   = 0xA0
+# bcm shell runs the commands of a line separated by ';', this is the
+# longest line sent at once
+BATCH_MAX_LEN           = 1000
+DATA_RE                 = re.compile(r"\<DATA\=(?P<data>[^>]+)\>")
 # define board type
 INV_MAGNOLIA            = "SONiC-Inventec-d6254qs"
 INV_REDWOOD             = "SONiC-Inventec-d7032-100"
@@ -71,12 +78,19 @@ class Port():
     led_index       = None
     link_status     = None
     speed           = None
+    lane            = None
+
+    def write_cmd(self, data):
+        return "setreg CMIC_LEDUP{0}_DATA_RAM({1}) {2}".format(self.write2_up, self.led_index, data)
+
+    def read_cmd(self):
+        return "getreg CMIC_LEDUP{0}_DATA_RAM({1})".format(self.led_up, self.s_addr)
 
     def write_data_ram(self, data):
-        BCM_SHELL.cmd("setreg CMIC_LEDUP{0}_DATA_RAM({1}) {2}".format(self.write2_up, self.led_index, data))
+        BCM_SHELL.cmd(self.write_cmd(data))
 
     def read_data_ram(self):
-        r_string = BCM_SHELL.run("getreg CMIC_LEDUP{0}_DATA_RAM({1})".format(self.led_up, self.s_addr))
+        r_string = BCM_SHELL.run(self.read_cmd())
         for line in r_string.split("\n"):
             re_obj = re.search(r"\<DATA\=(?P<data>.+)\>", line)
             if re_obj is not None:
@@ -84,6 +98,65 @@ class Port():
                 return int(re_obj.group("data"), 16)
 
 
+class LedEngine():
+    """
+    Reads and writes the LED data ram of many ports with one bcm shell
+    command line, and doesn't write again a value already written
+    """
+
+    def __init__(self):
+        # (led processor, data ram index) -> last value written
+        self.written = {}
+
+    def reset(self):
+        self.written = {}
+
+    def _batches(self, cmds):
+        batch = []
+        length = 0
+        for cmd in cmds:
+            if batch and length + len(cmd) > BATCH_MAX_LEN:
+                yield "; ".join(batch)
+                batch = []
+                length = 0
+            batch.append(cmd)
+            length += len(cmd) + 2
+        if batch:
+            yield "; ".join(batch)
+
+    def read(self, ports):
+        """
+        Returns the data ram value of every port, in the order of ports
+        """
+        values = []
+        for batch in self._batches([port.read_cmd() for port in ports]):
+            r_string = BCM_SHELL.run(batch)
+            values.extend(int(data, 16) for data in DATA_RE.findall(r_string))
+        if len(values) != len(ports):
+            syslog.syslog(syslog.LOG_WARNING, "Read {0} values for {1} ports, read them one by one".format(len(values), len(ports)))
+            return [port.read_data_ram() for port in ports]
+        return values
+
+    def write(self, port_data):
+        """
+        Writes the data ram of a list of (port, data), returns the number of writes done
+        """
+        cmds = []
+        written = {}
+        for port, data in port_data:
+            key = (port.write2_up, port.led_index)
+            if self.written.get(key) != data and written.get(key) != data:
+                cmds.append(port.write_cmd(data))
+                written[key] = data
+        for batch in self._batches(cmds):
+            BCM_SHELL.cmd(batch)
+        self.written.update(written)
+        return len(cmds)
+
+
+LED_ENGINE = LedEngine()
+
+
 
 # =====================================================================
 #  Function
@@ -210,8 +283,17 @@ def _lookup_led_index(p):
 def _update_port_list(only_update):
 
     global PORT_LIST
+    global PORT_BY_LANE
     number      = 0
     count       = 0
+    lanes       = {}
+
+    if not only_update:
+        content = BCM_SHELL.run("config")
+        for line in content.split("\n"):
+            re_obj = re.search(r"portmap\_(?P<bcm_id>\d+)\=(?P<lane_id>\d+)\:\d+", line)
+            if re_obj is not None:
+                lanes[int(re_obj.group("bcm_id"))] = int(re_obj.group("lane_id"))
 
     content = BCM_SHELL.run("ps")
     for line in content.split("\n"):
@@ -220,6 +302,7 @@ def _update_port_list(only_update):
             if int(re_obj.group("bcm_id")) not in EAGLE_CORE:
                 if only_update:
                     PORT_LIST[number].link_status = re_obj.group("link")
+                    PORT_LIST[number].speed = int(re_obj.group("speed"))
                 else:
                     # create port object while first time
                     port_obj = Port()
@@ -228,6 +311,7 @@ def _update_port_list(only_update):
                     port_obj.bcm_id = int(re_obj.group("bcm_id"))
                     port_obj.link_status = re_obj.group("link")
                     port_obj.speed = int(re_obj.group("speed"))
+                    port_obj.lane = lanes.get(port_obj.bcm_id)
                     PORT_LIST.append(port_obj)
                 number += 1
 
@@ -245,6 +329,8 @@ def _update_port_list(only_update):
             PORT_LIST = []
             syslog.syslog(syslog.LOG_ERR, "The amount of port is not match")
 
+        PORT_BY_LANE = dict((port.lane, port) for port in PORT_LIST if port.lane is not None)
+
 
 
 def sync_bcmsh_socket():
@@ -257,7 +343,7 @@ def sync_bcmsh_socket():
     while waitSyncd:
         time.sleep(10)
         try:
-            BCM_SHELL = bcmshell()
+            BCM_SHELL = bcmshell(keepopen=True)
             BCM_SHELL.run("Echo")
             waitSyncd = False
         except Exception, e:
@@ -266,6 +352,8 @@ def sync_bcmsh_socket():
             retryCount += 1
 
     syslog.syslog(syslog.LOG_INFO, "bcmshell socket create successfully")
+    # the data ram may have been reset with the chip
+    LED_ENGINE.reset()
 
     if SHELL_READY is False:
         SHELL_READY = True
@@ -275,65 +363,125 @@ def sync_bcmsh_socket():
 
 
 
+def _port_led_data(port, s_byte):
+
+    port_data = 0
+
+    if BOARD_TPYE == "inventec_d6254qs":
+        if s_byte&STATUS_RX:
+            port_data |= BIT_RX
+        if s_byte&STATUS_TX:
+            port_data |= BIT_TX
+        port_data |= BIT_LINK
+
+    elif BOARD_TPYE == "inventec_d7032q28b":
+        if s_byte&STATUS_RX:
+            port_data |= BIT_RX
+        if s_byte&STATUS_TX:
+            port_data |= BIT_TX
+        if port.speed == SPEED_100G:
+            port_data |= BIT_SPEED0
+            port_data |= BIT_SPEED1
+        elif port.speed == SPEED_40G:
+            port_data |= BIT_SPEED1
+        elif port.speed == SPEED_25G:
+            port_data |= BIT_SPEED0
+        else:
+            pass
+        port_data |= BIT_LINK
+
+    elif BOARD_TPYE == "inventec_d7054q28b":
+        if port.speed != SPEED_100G and port.speed != SPEED_25G:
+            port_data |= BIT_SPEED0
+
+    return port_data
+
+
+
+def update_active_ports(queue_active):
+
+    # only these boards show the rx/tx status of the data ram
+    if BOARD_TPYE in ("inventec_d6254qs", "inventec_d7032q28b"):
+        s_bytes = LED_ENGINE.read(queue_active)
+    else:
+        s_bytes = [None] * len(queue_active)
+
+    # write data to update data ram for the ports which changed
+    LED_ENGINE.write([(port, _port_led_data(port, s_byte)) for port, s_byte in zip(queue_active, s_bytes)])
+
+
+
+def _open_port_state():
+
+    try:
+        return PortStateSubscriber()
+    except Exception, e:
+        syslog.syslog(syslog.LOG_WARNING, "Port state subscription unavailable, scan the ports: {0}".format(str(e)))
+        return None
+
+
+
+def _apply_link_changes(subscriber, changes, queue_active):
+
+    port_data = []
+
+    for name, change in changes.items():
+        if "oper_status" not in change and "speed" not in change:
+            continue
+        port = PORT_BY_LANE.get(subscriber.get_lane(name))
+        if port is None:
+            continue
+
+        # PORT_TABLE has the speed in Mbps, the LED data of a port which is
+        # up is written again with it by update_active_ports
+        speed = change.get("speed")
+        if speed is not None and speed.isdigit():
+            port.speed = int(speed) / 1000
+        if "oper_status" not in change:
+            continue
+
+        port.link_status = change["oper_status"]
+        if port.link_status == "up":
+            if port not in queue_active:
+                queue_active.append(port)
+        else:
+            if port in queue_active:
+                queue_active.remove(port)
+            port_data.append((port, 0))
+
+    LED_ENGINE.write(port_data)
+
+
+
 def update_led_status():
 
     led_thread      = True  # True/False (gate to turn on/off)
     reset_sec       = 2
     count_down      = 0
-    queue_active    = []
-    port_data       = None
-    s_byte          = None
+    queue_active    = [port for port in PORT_LIST if port.link_status == "up"]
+    subscriber      = _open_port_state()
 
 
     # thread for keeping update port status in data ram
     while led_thread:
         try:
-            if count_down == 0:
+            if subscriber is not None:
+                # waits for the link changes until the next update
+                _apply_link_changes(subscriber, subscriber.get_changes(0.5), queue_active)
+                update_active_ports(queue_active)
+            elif count_down == 0:
                 queue_active = []
+                port_data = []
                 _update_port_list(1)
                 for port in PORT_LIST:
                     if port.link_status == "up":
                         queue_active.append(port)
                     else:
-                        port_data = 0
-                        port.write_data_ram(port_data)
+                        port_data.append((port, 0))
+                LED_ENGINE.write(port_data)
                 count_down = reset_sec
             else:
-                for port in queue_active:
-                    port_data = 0
-
-                    if BOARD_TPYE == "inventec_d6254qs":
-                        s_byte = port.read_data_ram()
-                        if s_byte&STATUS_RX:
-                            port_data |= BIT_RX
-                        if s_byte&STATUS_TX:
-                            port_data |= BIT_TX
-                        port_data |= BIT_LINK
-
-                    elif BOARD_TPYE == "inventec_d7032q28b":
-                        s_byte = port.read_data_ram()
-                        if s_byte&STATUS_RX:
-                            port_data |= BIT_RX
-                        if s_byte&STATUS_TX:
-                            port_data |= BIT_TX
-                        if port.speed == SPEED_100G:
-                            port_data |= BIT_SPEED0
-                            port_data |= BIT_SPEED1
-                        elif port.speed == SPEED_40G:
-                            port_data |= BIT_SPEED1
-                        elif port.speed == SPEED_25G:
-                            port_data |= BIT_SPEED0
-                        else:
-                            pass
-                        port_data |= BIT_LINK
-
-                    elif BOARD_TPYE == "inventec_d7054q28b":
-                        if port.speed != SPEED_100G and port.speed != SPEED_25G:
-                            port_data |= BIT_SPEED0
-
-                    # write data to update data ram for specific port
-                    port.write_data_ram(port_data)
-
+                update_active_ports(queue_active)
                 time.sleep(0.5)
                 count_down -= 1
 
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2018 Inventec, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Port state changes for the platform monitors.
+
+Follows the oper status and speed of the ports in PORT_TABLE of APPL_DB and the
+presence of their transceiver in TRANSCEIVER_INFO of STATE_DB, through
+redis keyspace notifications. Keys notified are read again once per call,
+so a port which flaps several times in between is reported once, and only
+if its state is different from the last one reported. The whole tables are
+read again every RECONCILE_INTERVAL seconds, and when the subscription has
+to be made again, to catch up with the notifications missed.
+
+    subscriber = PortStateSubscriber()
+    while True:
+        for name, change in subscriber.get_changes(1).items():
+            # e.g. "Ethernet0", {"oper_status": "up", "speed": "40000"} or {"presence": False}
+            lane = subscriber.get_lane(name)
+"""
+
+import time
+import syslog
+
+import swsssdk
+
+RECONCILE_INTERVAL  = 60
+PORT_TABLE          = "PORT_TABLE"
+TRANSCEIVER_TABLE   = "TRANSCEIVER_INFO"
+APPL_DB_SEPARATOR   = ":"
+STATE_DB_SEPARATOR  = "|"
+# fields of PORT_TABLE followed
+PORT_FIELDS         = ("oper_status", "speed")
+
+
+class PortStateSubscriber(object):
+
+    def __init__(self, db=None, reconcile_interval=RECONCILE_INTERVAL):
+        if db is None:
+            db = swsssdk.SonicV2Connector(host="127.0.0.1")
+            db.connect(db.APPL_DB, False)
+            db.connect(db.STATE_DB, False)
+        self.db = db
+        self.appl_db = db.get_redis_client(db.APPL_DB)
+        self.state_db = db.get_redis_client(db.STATE_DB)
+        self.appl_prefix = "__keyspace@{0}__:{1}{2}".format(db.get_dbid(db.APPL_DB), PORT_TABLE, APPL_DB_SEPARATOR)
+        self.state_prefix = "__keyspace@{0}__:{1}{2}".format(db.get_dbid(db.STATE_DB), TRANSCEIVER_TABLE, STATE_DB_SEPARATOR)
+        self.reconcile_interval = reconcile_interval
+        self.next_reconcile = 0
+        self.pubsub = None
+        # port name -> {"oper_status": ..., "speed": ..., "presence": ...} as last reported
+        self.state = {}
+        # port name -> first lane
+        self.lanes = {}
+
+    def _subscribe(self):
+        pubsub = self.appl_db.pubsub()
+        pubsub.psubscribe(self.appl_prefix + "*", self.state_prefix + "*")
+        self.pubsub = pubsub
+        # notifications may have been missed before
+        self.next_reconcile = 0
+
+    def _close(self):
+        if self.pubsub is not None:
+            try:
+                self.pubsub.close()
+            except Exception:
+                pass
+        self.pubsub = None
+
+    def _wait_for_keys(self, timeout):
+        """
+        Returns the set of (table, port name) notified within timeout
+        """
+        keys = set()
+        deadline = time.time() + timeout
+        while True:
+            remaining = deadline - time.time()
+            message = self.pubsub.get_message(timeout=max(remaining, 0))
+            if message is not None and message["type"] == "pmessage":
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                if channel.startswith(self.appl_prefix):
+                    keys.add((PORT_TABLE, channel[len(self.appl_prefix):]))
+                elif channel.startswith(self.state_prefix):
+                    keys.add((TRANSCEIVER_TABLE, channel[len(self.state_prefix):]))
+            elif remaining <= 0:
+                return keys
+
+    def _read_port(self, name):
+        entry = self.appl_db.hgetall(PORT_TABLE + APPL_DB_SEPARATOR + name)
+        entry = dict((_str(k), _str(v)) for k, v in entry.items())
+        lanes = entry.get("lanes")
+        if lanes:
+            self.lanes[name] = int(lanes.split(",")[0])
+        return entry
+
+    def _read_presence(self, name):
+        return self.state_db.exists(TRANSCEIVER_TABLE + STATE_DB_SEPARATOR + name) > 0
+
+    def _update(self, changes, name, field, value):
+        state = self.state.setdefault(name, {})
+        if field in state and state[field] == value:
+            return
+        state[field] = value
+        changes.setdefault(name, {})[field] = value
+
+    def _update_port(self, changes, name):
+        entry = self._read_port(name)
+        for field in PORT_FIELDS:
+            self._update(changes, name, field, entry.get(field))
+
+    def reconcile(self):
+        """
+        Reads the state of all ports, returns the changes
+        """
+        changes = {}
+        names = set()
+        for key in self.appl_db.keys(PORT_TABLE + APPL_DB_SEPARATOR + "*"):
+            names.add(_str(key)[len(PORT_TABLE + APPL_DB_SEPARATOR):])
+        for key in self.state_db.keys(TRANSCEIVER_TABLE + STATE_DB_SEPARATOR + "*"):
+            names.add(_str(key)[len(TRANSCEIVER_TABLE + STATE_DB_SEPARATOR):])
+        names.update(self.state.keys())
+
+        for name in names:
+            self._update_port(changes, name)
+            self._update(changes, name, "presence", self._read_presence(name))
+
+        self.next_reconcile = time.time() + self.reconcile_interval
+        return changes
+
+    def get_changes(self, timeout):
+        """
+        Waits up to timeout seconds for port state changes.
+        Returns a dict of port name -> {field: new value} with the fields
+        which changed, "oper_status", "speed" (Mbps) and "presence"
+        """
+        try:
+            if self.pubsub is None:
+                self._subscribe()
+            if time.time() >= self.next_reconcile:
+                return self.reconcile()
+
+            changes = {}
+            for table, name in self._wait_for_keys(min(timeout, self.next_reconcile - time.time())):
+                if table == PORT_TABLE:
+                    self._update_port(changes, name)
+                else:
+                    self._update(changes, name, "presence", self._read_presence(name))
+            return changes
+        except Exception, e:
+            syslog.syslog(syslog.LOG_WARNING, "Port state subscription failed: {0}".format(str(e)))
+            self._close()
+            time.sleep(timeout)
+            return {}
+
+    def get_lane(self, name):
+        """
+        Returns the first lane of a port, None if it isn't known
+        """
+        if name not in self.lanes:
+            self._read_port(name)
+        return self.lanes.get(name)
+
+
+def _str(value):
+    if isinstance(value, bytes):
+        return value.decode()
+    return value
@@ -28,6 +28,8 @@ try:
     import syslog
     from sfputil import SfpUtil
     from sonic_sfp.bcmshell import bcmshell
+    from port_state import PortStateSubscriber
+    from uevent_bus import UeventBus
     
 except ImportError as e:
     raise ImportError("%s - required module not found" % str(e))
@@ -39,6 +41,9 @@ INV_CYPRESS_PLATFORM = "SONiC-Inventec-d7054"
 INV_SEQUOIA_PLATFORM = "SONiC-Inventec-d7264"
 INV_MAPLE_PLATFORM = "SONiC-Inventec-d6556"
 INV_MAGNOLIA_PLATFORM = "SONiC-Inventec-d6254qs"
+# the eeprom of all transceivers is read again at this interval when
+# following the transceiver presence changes
+FULL_SCAN_INTERVAL = 60
 
 transceiver_type_dict = { 
                           "FCBG110SD1C03": "SR",
@@ -200,6 +205,13 @@ class TransceiverUtil(SfpUtil):
         for key,value in self.transceiver_port_mapping.iteritems():
             print "{0}---{1}".format(key, value)     
        
+    def get_port_by_lane(self, lane):
+        for index, value in self.transceiver_port_mapping.iteritems():
+            sal_config = bcm_obj.get_sal_config_list().get(value["bcm"])
+            if sal_config is not None and sal_config["lane"] == lane:
+                return index
+        return None
+
     def get_bcm_port_name(self, index):
         if self.transceiver_port_mapping.has_key(index) and bcm_obj.get_sal_config_list().has_key(self.transceiver_port_mapping[index]["bcm"]):
             return bcm_obj.get_sal_config_list()[self.transceiver_port_mapping[index]["bcm"]]["portname"]            
@@ -286,6 +298,30 @@ class TransceiverUtil(SfpUtil):
                 tx_file.write(hex(reg_value))
                 tx_file.close()
 
+
+def get_changed_transceivers(subscriber, changes):
+    """
+    Indexes of the ports of changes whose transceiver was inserted or removed
+    """
+    ports = set()
+    for name, change in changes.items():
+        if "presence" in change:
+            index = transceiver_obj.get_port_by_lane(subscriber.get_lane(name))
+            if index is not None:
+                ports.add(index)
+    return ports
+
+
+def get_uevent_port(event):
+    """
+    Index of the port of a uevent of swps, DEVPATH=.../swps/port<n>, None
+    for the other devices of the driver
+    """
+    name = os.path.basename(event['DEVPATH'])
+    if name.startswith("port") and name[4:].isdigit():
+        return int(name[4:])
+    return None
+
         
 def main():
 
@@ -346,11 +382,46 @@ def main():
     # Improve the power mode for QSFP ports
     transceiver_obj.set_power_mode_for_QSFP()
 
+    try:
+        subscriber = PortStateSubscriber()
+    except Exception, e:
+        subscriber = None
+        log_message("Port state subscription unavailable, poll the transceivers: {0}".format(str(e)) )
+    next_full_scan = 0
+
+    # Transceivers inserted or removed, from the uevents of the swps driver
+    changed_ports = set()
+    def on_transceiver_event(event):
+        index = get_uevent_port(event)
+        if index is not None:
+            changed_ports.add(index)
+    def on_transceiver_resync():
+        changed_ports.update(transceiver_obj.get_port_to_i2c_mapping().keys())
+    try:
+        bus = UeventBus()
+        bus.subscribe(on_transceiver_event, subsystem="swps", resync=on_transceiver_resync)
+    except Exception, e:
+        bus = None
+        log_message("Uevents unavailable: {0}".format(str(e)) )
+
     while 1 :
         try:
             if bcm_obj.get_platform() == INV_SEQUOIA_PLATFORM:
                 bcm_obj.parsing_port_list()  
-            for index in transceiver_obj.get_port_to_i2c_mapping().keys():
+            if (subscriber is None and bus is None) or time.time() >= next_full_scan:
+                port_list = transceiver_obj.get_port_to_i2c_mapping().keys()
+                next_full_scan = time.time() + FULL_SCAN_INTERVAL
+            else:
+                # waits for the transceivers inserted or removed
+                if bus is not None:
+                    bus.poll(1)
+                # not all the swps drivers send uevents
+                if subscriber is not None:
+                    changes = subscriber.get_changes(0 if bus is not None else 1)
+                    changed_ports.update(get_changed_transceivers(subscriber, changes))
+                port_list = list(changed_ports)
+                changed_ports.clear()
+            for index in port_list:
                 info = transceiver_obj.get_eeprom_dict_info(index)
                 value = transceiver_obj.get_eeprom_partNum_from_parser_eeprom_dict(info)
                 if transceiver_obj.get_transceiver_port_mapping().has_key(index) is not False and transceiver_obj.get_transceiver_port_mapping()[index]["pn"] <> value:
@@ -361,7 +432,8 @@ def main():
             # transceiver_obj.show_transceiver_port_mapping()       
         except Exception, e:
             log_message("Exception. The warning is {0}".format(str(e)) )            
-        time.sleep(1)
+        if subscriber is None and bus is None:
+            time.sleep(1)
 
     syslog.closelog()
     del transceiver_obj
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+#
+# Copyright (C) 2018 Inventec, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Kernel uevents for the platform monitors.
+
+Receives the uevents of the kernel on a netlink socket and dispatches them
+to the handlers subscribed for their subsystem, once each: events already
+seen are recognized by their sequence number. The uevents of the platform
+drivers are:
+
+    thermaltrip of inv_pthread      SUBSYSTEM=platform_status ACTION=remove
+                                    DEVPATH=/kernel/platform_status/fan
+    transceiver of swps             SUBSYSTEM=swps ACTION=add|remove
+                                    DEVPATH=.../swps/port<n>, IF_TYPE,
+                                    IF_SPEED and IF_LANE
+
+    bus = UeventBus()
+    bus.subscribe(handler, subsystem="swps", resync=full_scan)
+    while True:
+        bus.poll(1)
+
+When the socket overflows, events are lost, and the resync functions of
+the subscribers are called for them to read the state again.
+"""
+
+import errno
+import select
+import socket
+import syslog
+from collections import OrderedDict
+
+NETLINK_KOBJECT_UEVENT  = 15
+# Multicast group of the kernel, udev sends its own messages on group 2
+UEVENT_KERNEL_GROUP     = 1
+# UEVENT_BUFFER_SIZE of the kernel is 2048, plus the "ACTION@DEVPATH" header
+UEVENT_RECV_SIZE        = 8192
+# Room for the bursts of events, e.g. all the transceivers at boot
+UEVENT_SOCKET_BUFFER    = 1024 * 1024
+SEQNUM_HISTORY          = 100
+
+
+def parse_uevent(data):
+    """
+    Parses a uevent datagram: "ACTION@DEVPATH" then KEY=VALUE strings, each
+    NUL terminated. Returns a dict of the KEY=VALUE pairs, None if it isn't
+    a kernel uevent.
+    """
+    fields = bytes(data).split(b'\x00')
+    if b'@' not in fields[0]:
+        # e.g. "libudev" messages
+        return None
+
+    event = {}
+    for field in fields[1:]:
+        key, sep, value = field.partition(b'=')
+        if sep:
+            event[key.decode('ascii', 'replace')] = value.decode('ascii', 'replace')
+    if 'ACTION' not in event or 'DEVPATH' not in event:
+        return None
+    return event
+
+
+class UeventBus(object):
+
+    def __init__(self, sock=None):
+        if sock is None:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UEVENT_SOCKET_BUFFER)
+            except socket.error:
+                pass
+            # port id 0: assigned by the kernel
+            sock.bind((0, UEVENT_KERNEL_GROUP))
+        sock.setblocking(False)
+        self.socket = sock
+        self.netlink = sock.family == getattr(socket, "AF_NETLINK", None)
+        self.buffer = bytearray(UEVENT_RECV_SIZE)
+        self.subscribers = []
+        # SEQNUM of the last events dispatched
+        self.seqnums = OrderedDict()
+        self.received = 0
+        self.duplicates = 0
+        self.overflows = 0
+
+    def close(self):
+        self.socket.close()
+
+    def fileno(self):
+        return self.socket.fileno()
+
+    def subscribe(self, handler, subsystem=None, action=None, resync=None):
+        """
+        Calls handler(event) for the events of subsystem and action, any if
+        None, and resync() when events may have been lost
+        """
+        self.subscribers.append((handler, subsystem, action, resync))
+
+    def _call(self, func, *args):
+        try:
+            func(*args)
+        except Exception, e:
+            syslog.syslog(syslog.LOG_WARNING, "Uevent handler failed: {0}".format(str(e)))
+
+    def dispatch(self, event):
+        seqnum = event.get('SEQNUM')
+        if seqnum is not None:
+            if seqnum in self.seqnums:
+                self.duplicates += 1
+                return
+            self.seqnums[seqnum] = None
+            if len(self.seqnums) > SEQNUM_HISTORY:
+                self.seqnums.popitem(last=False)
+
+        for handler, subsystem, action, resync in self.subscribers:
+            if subsystem is not None and event.get('SUBSYSTEM') != subsystem:
+                continue
+            if action is not None and event['ACTION'] != action:
+                continue
+            self._call(handler, event)
+
+    def resync(self):
+        self.overflows += 1
+        syslog.syslog(syslog.LOG_WARNING, "Uevent socket overflow, events were lost")
+        for handler, subsystem, action, resync in self.subscribers:
+            if resync is not None:
+                self._call(resync)
+
+    def _receive(self):
+        """
+        Returns the next datagram, None if there is none pending
+        """
+        while True:
+            try:
+                size, addr = self.socket.recvfrom_into(self.buffer, 0, socket.MSG_TRUNC)
+            except socket.error, e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return None
+                if e.errno == errno.ENOBUFS:
+                    self.resync()
+                    continue
+                raise
+            # only the kernel may send uevents
+            if self.netlink and addr[0] != 0:
+                continue
+            if size > len(self.buffer):
+                syslog.syslog(syslog.LOG_WARNING, "Uevent of {0} bytes truncated".format(size))
+                continue
+            return bytes(self.buffer[:size])
+
+    def receive(self):
+        """
+        Dispatches the events pending, returns their number
+        """
+        count = 0
+        while True:
+            data = self._receive()
+            if data is None:
+                return count
+            event = parse_uevent(data)
+            if event is not None:
+                self.received += 1
+                self.dispatch(event)
+                count += 1
+
+    def poll(self, timeout):
+        """
+        Waits up to timeout seconds for events, dispatches them and returns
+        their number
+        """
+        readable, _, _ = select.select([self.socket], [], [], timeout)
+        if not readable:
+            return 0
+        return self.receive()
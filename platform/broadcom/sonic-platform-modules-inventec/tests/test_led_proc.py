@@ -0,0 +1,157 @@
+import os
+import sys
+
+import mock
+
+test_path = os.path.dirname(os.path.abspath(__file__))
+utils_path = os.path.join(os.path.dirname(test_path), 'common', 'utils')
+sys.path.insert(0, utils_path)
+
+import led_proc
+from bcmshell_server import DiagShell
+
+
+class ShellClient(object):
+    """
+    bcmshell connected to a DiagShell, which keeps the command lines sent
+    """
+
+    def __init__(self, shell):
+        self.shell = shell
+        self.lines = []
+
+    def run(self, line):
+        self.lines.append(line)
+        return "\n".join(self.shell.execute(line))
+
+    def cmd(self, line):
+        return self.run(line)
+
+
+class TruncatingClient(ShellClient):
+    """
+    Loses the output of the last command of a line of several commands
+    """
+
+    def run(self, line):
+        output = ShellClient.run(self, line)
+        if ";" in line:
+            output = output.rsplit("\n", 1)[0]
+        return output
+
+
+class TestLedEngine(object):
+
+    def setup_method(self, method):
+        self.patches = [
+            mock.patch.object(led_proc, 'BOARD_TPYE', 'inventec_d6254qs'),
+            mock.patch.object(led_proc, 'BIT_RX', 1<<0),
+            mock.patch.object(led_proc, 'BIT_TX', 1<<1),
+            mock.patch.object(led_proc, 'BIT_LINK', 1<<7),
+            mock.patch.object(led_proc, 'PORT_LIST', []),
+            mock.patch.object(led_proc, 'PORT_BY_LANE', {}),
+            mock.patch.object(led_proc, 'LED_ENGINE', led_proc.LedEngine()),
+            mock.patch.object(led_proc, 'SHELL_READY', False),
+        ]
+        for patch in self.patches:
+            patch.start()
+        self.connect(64)
+
+    def teardown_method(self, method):
+        for patch in reversed(self.patches):
+            patch.stop()
+
+    def connect(self, num_ports, client=ShellClient):
+        self.shell = DiagShell(num_ports, activity=0)
+        self.client = client(self.shell)
+        led_proc.BCM_SHELL = self.client
+        led_proc.PORT_LIST[:] = []
+        led_proc._update_port_list(0)
+        self.ports = led_proc.PORT_LIST
+        self.shell.reset_counters()
+        del self.client.lines[:]
+
+    def data_ram(self, port):
+        return self.shell.data_ram.get((port.led_up, port.s_addr), 0)
+
+    def test_read_split_at_batch_max_len(self):
+        for i, port in enumerate(self.ports):
+            self.shell.data_ram[(port.led_up, port.s_addr)] = i % 4
+
+        values = led_proc.LED_ENGINE.read(self.ports)
+
+        assert values == [i % 4 for i in range(len(self.ports))]
+        assert self.shell.commands == len(self.ports)
+        assert len(self.client.lines) > 1
+        for line, next_line in zip(self.client.lines, self.client.lines[1:] + [None]):
+            assert len(line) <= led_proc.BATCH_MAX_LEN
+            # a line is only split when the next command doesn't fit
+            if next_line is not None:
+                assert len(line) + 2 + len(next_line.split("; ")[0]) > led_proc.BATCH_MAX_LEN
+
+    def test_write_only_changes(self):
+        engine = led_proc.LED_ENGINE
+        port_data = [(port, 0x80) for port in self.ports]
+
+        assert engine.write(port_data) == len(self.ports)
+        setregs = self.shell.commands
+        assert setregs == len(self.ports)
+        for line in self.client.lines:
+            assert len(line) <= led_proc.BATCH_MAX_LEN
+
+        assert engine.write(port_data) == 0
+        assert self.shell.commands == setregs
+
+        port_data[5] = (self.ports[5], 0x81)
+        del self.client.lines[:]
+        assert engine.write(port_data) == 1
+        assert self.client.lines == [self.ports[5].write_cmd(0x81)]
+        assert self.shell.data_ram[(self.ports[5].write2_up, self.ports[5].led_index)] == 0x81
+
+    def test_update_active_ports(self):
+        self.shell.activity = 1
+        led_proc.update_active_ports(self.ports)
+        written = [self.shell.data_ram[(port.write2_up, port.led_index)] for port in self.ports]
+        expected = [0x80 | (self.data_ram(port) & 3) for port in self.ports]
+        assert written == expected
+
+        # The rx/tx status didn't change, nothing is written
+        self.shell.activity = 0
+        self.shell.reset_counters()
+        led_proc.update_active_ports(self.ports)
+        assert self.shell.commands == len(self.ports)
+
+    def test_read_fallback_per_port(self):
+        self.connect(64, TruncatingClient)
+        for i, port in enumerate(self.ports):
+            self.shell.data_ram[(port.led_up, port.s_addr)] = i % 3
+
+        values = led_proc.LED_ENGINE.read(self.ports)
+
+        assert values == [i % 3 for i in range(len(self.ports))]
+        single = [line for line in self.client.lines if ";" not in line]
+        assert single == [port.read_cmd() for port in self.ports]
+
+    def test_reset_on_resync(self):
+        engine = led_proc.LED_ENGINE
+        port_data = [(port, 0x80) for port in self.ports[:4]]
+        engine.write(port_data)
+
+        # syncd restarted, the data ram is cleared with the chip
+        self.shell.data_ram.clear()
+        with mock.patch.object(led_proc, 'bcmshell', mock.Mock(return_value=self.client)), \
+             mock.patch.object(led_proc.time, 'sleep'):
+            led_proc.sync_bcmsh_socket()
+
+        assert engine.write(port_data) == 4
+        for port, data in port_data:
+            assert self.shell.data_ram[(port.write2_up, port.led_index)] == data
+
+    def test_update_port_list(self):
+        # without port state subscription the ports are scanned again
+        self.shell.speed[2] = 40
+        self.shell.link[3] = "down"
+        led_proc._update_port_list(1)
+        assert [(port.link_status, port.speed) for port in self.ports[:4]] == \
+            [("up", 100), ("up", 100), ("up", 40), ("down", 100)]
+        assert self.client.lines == ["ps"]
@@ -0,0 +1,292 @@
+import os
+import sys
+import time
+import types
+import shutil
+import tempfile
+import subprocess
+from distutils.spawn import find_executable
+
+import mock
+import pytest
+
+try:
+    import redis
+except ImportError:
+    redis = None
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+test_path = os.path.dirname(os.path.abspath(__file__))
+utils_path = os.path.join(os.path.dirname(test_path), 'common', 'utils')
+sys.path.insert(0, utils_path)
+
+import led_proc
+from port_state import PortStateSubscriber
+from bcmshell_server import DiagShell
+
+NUM_PORTS = 32
+REDIS_SERVER = find_executable('redis-server')
+
+
+class SfpUtil(object):
+    """
+    sfputil of the platform plugins, which transceiver_monitor extends
+    """
+    port_to_i2c_mapping = dict((index, 10 + index) for index in range(NUM_PORTS))
+
+
+sfputil = types.ModuleType('sfputil')
+sfputil.SfpUtil = SfpUtil
+with mock.patch.dict(sys.modules, {'sfputil': sfputil}):
+    import transceiver_monitor
+
+
+class RedisServer(object):
+    """
+    redis-server on a unix socket, sending keyspace notifications as the
+    database of SONiC does
+    """
+    notifies = True
+
+    def __init__(self):
+        self.dir = tempfile.mkdtemp()
+        self.socket = os.path.join(self.dir, 'redis.sock')
+        with open(os.devnull, 'w') as devnull:
+            self.process = subprocess.Popen([REDIS_SERVER, '--port', '0', '--unixsocket', self.socket,
+                                             '--dir', self.dir, '--save', '', '--appendonly', 'no',
+                                             '--notify-keyspace-events', 'AKE'],
+                                            stdout=devnull, stderr=devnull)
+        deadline = time.time() + 5
+        while True:
+            try:
+                self.client(0).ping()
+                return
+            except redis.ConnectionError:
+                if time.time() > deadline or self.process.poll() is not None:
+                    self.stop()
+                    raise
+                time.sleep(0.01)
+
+    def client(self, db):
+        return redis.StrictRedis(unix_socket_path=self.socket, db=db)
+
+    def flush(self):
+        self.client(0).flushall()
+
+    def stop(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+            self.process.wait()
+        shutil.rmtree(self.dir)
+
+
+class FakeRedisServer(object):
+    """
+    fakeredis server, whose keyspace notifications are published by the test
+    """
+    notifies = False
+
+    def __init__(self):
+        self.server = fakeredis.FakeServer()
+
+    def client(self, db):
+        return fakeredis.FakeStrictRedis(server=self.server, db=db)
+
+    def flush(self):
+        self.client(0).flushall()
+
+    def stop(self):
+        pass
+
+
+def start_redis():
+    if REDIS_SERVER is not None and redis is not None:
+        return RedisServer()
+    if fakeredis is not None:
+        return FakeRedisServer()
+    pytest.skip("neither redis-server nor fakeredis is available")
+
+
+class SonicV2Connector(object):
+    """
+    Databases of redis in a test server
+    """
+    APPL_DB = 'APPL_DB'
+    STATE_DB = 'STATE_DB'
+    DB_IDS = {'APPL_DB': 0, 'STATE_DB': 6}
+
+    def __init__(self, server):
+        self.server = server
+
+    def get_dbid(self, db_name):
+        return self.DB_IDS[db_name]
+
+    def get_redis_client(self, db_name):
+        return self.server.client(self.DB_IDS[db_name])
+
+
+class ShellClient(object):
+    """
+    bcmshell connected to a DiagShell, which keeps the command lines sent
+    """
+
+    def __init__(self, shell):
+        self.shell = shell
+        self.lines = []
+
+    def run(self, line):
+        self.lines.append(line)
+        return "\n".join(self.shell.execute(line))
+
+    def cmd(self, line):
+        return self.run(line)
+
+
+class TestFlapStorm(object):
+
+    @classmethod
+    def setup_class(cls):
+        cls.server = start_redis()
+
+    @classmethod
+    def teardown_class(cls):
+        cls.server.stop()
+
+    def setup_method(self, method):
+        self.server.flush()
+        self.db = SonicV2Connector(self.server)
+        self.appl_db = self.db.get_redis_client(self.db.APPL_DB)
+        self.state_db = self.db.get_redis_client(self.db.STATE_DB)
+        for index in range(NUM_PORTS):
+            name = 'Ethernet{0}'.format(index * 4)
+            lanes = ','.join(str(index * 4 + lane + 1) for lane in range(4))
+            self.set_port(name, lanes=lanes, oper_status='up', speed='100000')
+            self.set_presence(name, True)
+
+        self.shell = DiagShell(NUM_PORTS, activity=0)
+        self.client = ShellClient(self.shell)
+        self.patches = [
+            mock.patch.object(led_proc, 'BOARD_TPYE', 'inventec_d7032q28b'),
+            mock.patch.object(led_proc, 'BIT_RX', 1<<0),
+            mock.patch.object(led_proc, 'BIT_TX', 1<<1),
+            mock.patch.object(led_proc, 'BIT_SPEED0', 1<<3),
+            mock.patch.object(led_proc, 'BIT_SPEED1', 1<<4),
+            mock.patch.object(led_proc, 'BIT_FAULT', 1<<6),
+            mock.patch.object(led_proc, 'BIT_LINK', 1<<7),
+            mock.patch.object(led_proc, 'EAGLE_CORE', [66, 100]),
+            mock.patch.object(led_proc, 'BCM_SHELL', self.client),
+            mock.patch.object(led_proc, 'PORT_LIST', []),
+            mock.patch.object(led_proc, 'PORT_BY_LANE', {}),
+            mock.patch.object(led_proc, 'LED_ENGINE', led_proc.LedEngine()),
+            mock.patch.object(transceiver_monitor.BCMUtil, 'port_to_bcm_mapping', {}),
+            mock.patch.object(transceiver_monitor.BCMUtil, 'sal_config_list', {}),
+            mock.patch.object(transceiver_monitor.TransceiverUtil, 'transceiver_port_mapping', {}),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+        led_proc._update_port_list(0)
+        bcm_obj = transceiver_monitor.BCMUtil()
+        bcm_obj.run = self.client.run
+        bcm_obj.initial_sal_config_list()
+        bcm_obj.parsing_port_list()
+        transceiver_monitor.bcm_obj = bcm_obj
+        transceiver_monitor.transceiver_obj = transceiver_monitor.TransceiverUtil()
+        transceiver_monitor.transceiver_obj.initial_transceiver_port_mapping()
+
+    def teardown_method(self, method):
+        for patch in reversed(self.patches):
+            patch.stop()
+
+    def notify(self, client, db_name, key, event):
+        # keyspace notification as redis sends it
+        if not self.server.notifies:
+            client.publish('__keyspace@{0}__:{1}'.format(self.db.get_dbid(db_name), key), event)
+
+    def set_port(self, name, **fields):
+        key = 'PORT_TABLE:' + name
+        for field, value in fields.items():
+            self.appl_db.hset(key, field, value)
+        self.notify(self.appl_db, self.db.APPL_DB, key, 'hset')
+
+    def set_presence(self, name, present):
+        key = 'TRANSCEIVER_INFO|' + name
+        if present:
+            self.state_db.hset(key, 'type', 'QSFP28 or later')
+            self.notify(self.state_db, self.db.STATE_DB, key, 'hset')
+        else:
+            self.state_db.delete(key)
+            self.notify(self.state_db, self.db.STATE_DB, key, 'del')
+
+    def get_changes(self, subscriber):
+        changes = {}
+        while True:
+            new_changes = subscriber.get_changes(0.1)
+            if not new_changes:
+                return changes
+            for name, change in new_changes.items():
+                changes.setdefault(name, {}).update(change)
+
+    def test_flap_storm(self):
+        subscriber = PortStateSubscriber(self.db)
+        queue_active = [port for port in led_proc.PORT_LIST if port.link_status == 'up']
+
+        # Initial reconcile
+        changes = subscriber.get_changes(0.1)
+        assert len(changes) == NUM_PORTS
+        led_proc._apply_link_changes(subscriber, changes, queue_active)
+        assert transceiver_monitor.get_changed_transceivers(subscriber, changes) == set(range(NUM_PORTS))
+        assert len(queue_active) == NUM_PORTS
+        led_proc.update_active_ports(queue_active)
+        del self.client.lines[:]
+        self.shell.reset_counters()
+
+        for i in range(51):
+            self.set_port('Ethernet4', oper_status='down' if i % 2 == 0 else 'up')
+        for i in range(50):
+            self.set_port('Ethernet8', oper_status='down' if i % 2 == 0 else 'up')
+        # breakout to 40G and back, settling at 40G
+        for i in range(20):
+            self.set_port('Ethernet0', speed='100000' if i % 2 else '40000')
+        self.set_port('Ethernet0', speed='40000')
+        self.set_presence('Ethernet12', False)
+
+        changes = self.get_changes(subscriber)
+        assert changes == {'Ethernet0': {'speed': '40000'},
+                           'Ethernet4': {'oper_status': 'down'},
+                           'Ethernet12': {'presence': False}}
+
+        led_proc._apply_link_changes(subscriber, changes, queue_active)
+        led_proc.update_active_ports(queue_active)
+        port0, port1 = led_proc.PORT_LIST[0:2]
+        assert port1 not in queue_active
+        assert len(queue_active) == NUM_PORTS - 1
+        # Only the LEDs of the port which went down and of the one whose
+        # speed changed are written
+        assert sorted(line for line in self.client.lines if 'setreg' in line) == \
+            sorted([port1.write_cmd(0), port0.write_cmd(led_proc.BIT_LINK | led_proc.BIT_SPEED1)])
+        assert self.shell.data_ram[(port1.write2_up, port1.led_index)] == 0
+        assert port0.speed == 40
+
+        # Only the eeprom of the transceiver removed is read again
+        assert transceiver_monitor.get_changed_transceivers(subscriber, changes) == set([3])
+
+        # Nothing was missed
+        subscriber.next_reconcile = 0
+        assert subscriber.get_changes(0.1) == {}
+
+    def test_initial_speed(self):
+        # the speed lights the LED of a port up from the first reconcile
+        self.set_port('Ethernet8', speed='25000')
+        subscriber = PortStateSubscriber(self.db)
+        queue_active = [port for port in led_proc.PORT_LIST if port.link_status == 'up']
+        led_proc._apply_link_changes(subscriber, subscriber.get_changes(0.1), queue_active)
+        led_proc.update_active_ports(queue_active)
+
+        port0, port2 = led_proc.PORT_LIST[0], led_proc.PORT_LIST[2]
+        assert self.shell.data_ram[(port2.write2_up, port2.led_index)] == led_proc.BIT_LINK | led_proc.BIT_SPEED0
+        assert self.shell.data_ram[(port0.write2_up, port0.led_index)] == \
+            led_proc.BIT_LINK | led_proc.BIT_SPEED0 | led_proc.BIT_SPEED1
@@ -0,0 +1,216 @@
+import os
+import sys
+import errno
+import types
+import socket
+
+import mock
+
+test_path = os.path.dirname(os.path.abspath(__file__))
+utils_path = os.path.join(os.path.dirname(test_path), 'common', 'utils')
+sys.path.insert(0, utils_path)
+
+import uevent_bus
+from uevent_bus import UeventBus, UEVENT_RECV_SIZE
+
+sfputil = types.ModuleType('sfputil')
+sfputil.SfpUtil = object
+with mock.patch.dict(sys.modules, {'sfputil': sfputil}):
+    import transceiver_monitor
+
+SWPS_PORT = '/devices/virtual/swps/swps/port{0}'
+
+
+def make_uevent(action, devpath, seqnum, **fields):
+    """
+    Datagram of a kernel uevent
+    """
+    fields.update(ACTION=action, DEVPATH=devpath, SEQNUM=str(seqnum))
+    strings = ['{0}@{1}'.format(action, devpath)]
+    strings += ['{0}={1}'.format(key, value) for key, value in sorted(fields.items())]
+    return b'\x00'.join(string.encode('ascii') for string in strings) + b'\x00'
+
+
+def make_libudev(action, devpath):
+    """
+    Datagram udev sends for an event, after its own header
+    """
+    return b'libudev\x00\xfe\xed\xca\xfe' + make_uevent(action, devpath, 1, SUBSYSTEM='swps')[4:]
+
+
+class OverflowingSocket(object):
+    """
+    Socket whose next receive fails with ENOBUFS after overflow() as netlink
+    sockets do when the kernel dropped events
+    """
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.overflowed = False
+
+    def overflow(self):
+        self.overflowed = True
+
+    def recvfrom_into(self, *args):
+        if self.overflowed:
+            self.overflowed = False
+            raise socket.error(errno.ENOBUFS, os.strerror(errno.ENOBUFS))
+        return self.sock.recvfrom_into(*args)
+
+    def __getattr__(self, name):
+        return getattr(self.sock, name)
+
+
+class TestUeventBus(object):
+
+    def setup_method(self, method):
+        self.sender, receiver = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.socket = OverflowingSocket(receiver)
+        self.bus = UeventBus(self.socket)
+        self.events = []
+        self.resyncs = 0
+        self.patches = [mock.patch.object(uevent_bus.syslog, 'syslog')]
+        for patch in self.patches:
+            patch.start()
+
+    def teardown_method(self, method):
+        for patch in reversed(self.patches):
+            patch.stop()
+        self.sender.close()
+        self.bus.close()
+
+    def on_event(self, event):
+        self.events.append(event)
+
+    def on_resync(self):
+        self.resyncs += 1
+
+    def send(self, data):
+        self.sender.send(data)
+
+    def test_dispatch(self):
+        self.bus.subscribe(self.on_event, resync=self.on_resync)
+        self.send(make_uevent('add', SWPS_PORT.format(3), 1000, SUBSYSTEM='swps', IF_TYPE='SR4'))
+        assert self.bus.poll(1) == 1
+        assert self.events == [{'ACTION': 'add', 'DEVPATH': SWPS_PORT.format(3), 'SEQNUM': '1000',
+                                'SUBSYSTEM': 'swps', 'IF_TYPE': 'SR4'}]
+        # nothing pending
+        assert self.bus.poll(0) == 0
+        assert self.bus.receive() == 0
+        assert self.resyncs == 0
+
+    def test_duplicate_seqnum(self):
+        self.bus.subscribe(self.on_event)
+        for seqnum in (1000, 1001, 1000, 1002, 1001):
+            self.send(make_uevent('add', SWPS_PORT.format(seqnum - 1000), seqnum, SUBSYSTEM='swps'))
+        assert self.bus.receive() == 5
+        assert [event['SEQNUM'] for event in self.events] == ['1000', '1001', '1002']
+        assert self.bus.received == 5
+        assert self.bus.duplicates == 2
+
+    def test_seqnum_history(self):
+        self.bus.subscribe(self.on_event)
+        for seqnum in range(uevent_bus.SEQNUM_HISTORY + 1):
+            self.bus.dispatch({'ACTION': 'add', 'DEVPATH': '/x', 'SEQNUM': str(seqnum)})
+        # the first was forgotten, the last is still known
+        self.bus.dispatch({'ACTION': 'add', 'DEVPATH': '/x', 'SEQNUM': '0'})
+        self.bus.dispatch({'ACTION': 'add', 'DEVPATH': '/x', 'SEQNUM': str(uevent_bus.SEQNUM_HISTORY)})
+        assert len(self.events) == uevent_bus.SEQNUM_HISTORY + 2
+        assert self.bus.duplicates == 1
+
+    def test_libudev(self):
+        self.bus.subscribe(self.on_event)
+        self.send(make_libudev('add', SWPS_PORT.format(3)))
+        self.send(b'add@' + SWPS_PORT.format(4).encode('ascii') + b'\x00SUBSYSTEM=swps\x00')
+        self.send(make_uevent('remove', SWPS_PORT.format(5), 7, SUBSYSTEM='swps'))
+        assert self.bus.receive() == 1
+        assert [event['DEVPATH'] for event in self.events] == [SWPS_PORT.format(5)]
+        assert self.bus.received == 1
+
+    def test_oversized(self):
+        self.bus.subscribe(self.on_event)
+        padding = 'x' * UEVENT_RECV_SIZE
+        self.send(make_uevent('add', SWPS_PORT.format(1), 1, SUBSYSTEM='swps', PADDING=padding))
+        self.send(make_uevent('add', SWPS_PORT.format(2), 2, SUBSYSTEM='swps'))
+        # the truncated event is dropped, not parsed from its first bytes
+        assert self.bus.receive() == 1
+        assert [event['SEQNUM'] for event in self.events] == ['2']
+        assert uevent_bus.syslog.syslog.call_count == 1
+
+    def test_overflow(self):
+        self.bus.subscribe(self.on_event, subsystem='swps', resync=self.on_resync)
+        self.bus.subscribe(self.on_event, subsystem='platform_status')
+        self.send(make_uevent('add', SWPS_PORT.format(1), 1, SUBSYSTEM='swps'))
+        self.socket.overflow()
+        # the events still queued are dispatched after the resync
+        assert self.bus.poll(1) == 1
+        assert self.resyncs == 1
+        assert self.bus.overflows == 1
+        assert [event['SEQNUM'] for event in self.events] == ['1']
+
+        self.socket.overflow()
+        assert self.bus.receive() == 0
+        assert self.resyncs == 2
+
+    def test_failing_handler(self):
+        def fail(event):
+            raise ValueError('handler')
+        self.bus.subscribe(fail)
+        self.bus.subscribe(self.on_event)
+        self.send(make_uevent('add', SWPS_PORT.format(1), 1, SUBSYSTEM='swps'))
+        assert self.bus.receive() == 1
+        assert len(self.events) == 1
+
+    def test_filters(self):
+        received = {}
+        def handler(name):
+            return lambda event: received.setdefault(name, []).append(event['SEQNUM'])
+        self.bus.subscribe(handler('swps'), subsystem='swps')
+        self.bus.subscribe(handler('swps add'), subsystem='swps', action='add')
+        self.bus.subscribe(handler('remove'), action='remove')
+        self.bus.subscribe(handler('thermaltrip'), subsystem='platform_status', action='remove')
+        self.bus.subscribe(handler('all'))
+
+        self.send(make_uevent('add', SWPS_PORT.format(1), 1, SUBSYSTEM='swps'))
+        self.send(make_uevent('remove', SWPS_PORT.format(1), 2, SUBSYSTEM='swps'))
+        self.send(make_uevent('remove', '/kernel/platform_status/fan', 3, SUBSYSTEM='platform_status'))
+        self.send(make_uevent('change', '/devices/virtual/net/eth0', 4, SUBSYSTEM='net'))
+        # no SUBSYSTEM
+        self.send(make_uevent('add', '/module/swps', 5))
+        assert self.bus.receive() == 5
+
+        assert received == {
+            'swps': ['1', '2'],
+            'swps add': ['1'],
+            'remove': ['2', '3'],
+            'thermaltrip': ['3'],
+            'all': ['1', '2', '3', '4', '5'],
+        }
+
+    def test_transceiver_ports(self):
+        # as transceiver_monitor subscribes
+        changed_ports = set()
+        def on_transceiver_event(event):
+            index = transceiver_monitor.get_uevent_port(event)
+            if index is not None:
+                changed_ports.add(index)
+        self.bus.subscribe(on_transceiver_event, subsystem='swps')
+
+        self.send(make_uevent('add', SWPS_PORT.format(0), 1, SUBSYSTEM='swps', IF_TYPE='SR4'))
+        self.send(make_uevent('remove', SWPS_PORT.format(31), 2, SUBSYSTEM='swps'))
+        self.send(make_uevent('add', SWPS_PORT.format(31), 2, SUBSYSTEM='swps'))
+        self.send(make_uevent('add', '/devices/virtual/swps/swps/module', 3, SUBSYSTEM='swps'))
+        self.send(make_uevent('add', '/devices/virtual/net/port7', 4, SUBSYSTEM='net'))
+        self.bus.receive()
+        assert changed_ports == set([0, 31])
+
+
+def test_get_uevent_port():
+    get_uevent_port = transceiver_monitor.get_uevent_port
+    assert get_uevent_port({'DEVPATH': SWPS_PORT.format(0)}) == 0
+    assert get_uevent_port({'DEVPATH': SWPS_PORT.format(47)}) == 47
+    assert get_uevent_port({'DEVPATH': 'port12'}) == 12
+    assert get_uevent_port({'DEVPATH': '/devices/virtual/swps/swps/port'}) is None
+    assert get_uevent_port({'DEVPATH': '/devices/virtual/swps/swps/port1a'}) is None
+    assert get_uevent_port({'DEVPATH': '/devices/virtual/swps/swps/module'}) is None
+    assert get_uevent_port({'DEVPATH': '/devices/virtual/swps/port3/eeprom'}) is None
@@ -26,6 +26,7 @@ options:
     -h | --help     : this help message
     -d | --debug    : run with debug mode
     -f | --force    : ignore error during installation or clean 
+    -n | --dry-run  : install against an emulated sysfs and show the writes
 command:
     install     : install drivers and generate related sysfs nodes
     clean       : uninstall drivers and remove related sysfs nodes
@@ -40,10 +41,10 @@ import sys, getopt
 import binascii
 import logging
 import re
-import time
 import random
 import optparse
 from collections import namedtuple
+from i2c_bringup import I2cBringup, Mux, Device, dry_run
 
 
 
@@ -52,6 +53,7 @@ PROJECT_NAME = 'qfx5210_64x'
 version = '0.1.0'
 verbose = False
 DEBUG = False
+DRY_RUN = False
 args = []
 ALL_DEVICE = {}               
 DEVICE_NO = {'led':4, 'fan':4,'thermal':6, 'psu':2, 'sfp':64}
@@ -65,6 +67,7 @@ if DEBUG == True:
 
 def main():
     global DEBUG
+    global DRY_RUN
     global args
     global FORCE
 
@@ -74,9 +77,10 @@ def main():
     if len(sys.argv)<2:
         show_help()
          
-    options, args = getopt.getopt(sys.argv[1:], 'hdf', ['help',
+    options, args = getopt.getopt(sys.argv[1:], 'hdfn', ['help',
                                                        'debug',
                                                        'force',
+                                                       'dry-run',
                                                           ])
     logging.basicConfig(
         filename=log_file,
@@ -105,6 +109,8 @@ def main():
             logging.basicConfig(level=logging.INFO)
         elif opt in ('-f', '--force'): 
             FORCE = 1
+        elif opt in ('-n', '--dry-run'):
+            DRY_RUN = True
         else:
             logging.info('no option')                          
     for arg in args:            
@@ -130,6 +136,9 @@ def main():
             return                
         else:
             show_help()
+
+    if DRY_RUN:
+        return 0
            
     DisableWatchDogCmd = '/usr/sbin/i2cset -f -y 0 0x65 0x3 0x04' 
     # Disable watchdog
@@ -372,95 +381,47 @@ sfp_map =  [37,38,39,40,42,41,44,43,33,34,35,36,45,46,47,48,49,50,51,52,
 	   66,67,68,73,74,75,76,85,86,87,88,31,32,29,30,81,82,83,84,25,26,
            27,28]
 
-mknod =[   
-'echo pca9548  0x77 > /sys/bus/i2c/devices/i2c-0/new_device',
-'echo pca9548  0x71 > /sys/bus/i2c/devices/i2c-1/new_device',
-'echo pca9548  0x76 > /sys/bus/i2c/devices/i2c-1/new_device',
-'echo pca9548  0x73 > /sys/bus/i2c/devices/i2c-1/new_device',
-'echo pca9548  0x70 > /sys/bus/i2c/devices/i2c-2/new_device',
-'echo pca9548  0x71 > /sys/bus/i2c/devices/i2c-2/new_device',
-'echo pca9548  0x72 > /sys/bus/i2c/devices/i2c-2/new_device',
-'echo pca9548  0x73 > /sys/bus/i2c/devices/i2c-2/new_device',
-'echo pca9548  0x74 > /sys/bus/i2c/devices/i2c-2/new_device',
-'echo pca9548  0x75 > /sys/bus/i2c/devices/i2c-2/new_device',
-'echo pca9548  0x76 > /sys/bus/i2c/devices/i2c-2/new_device',
-'echo 24c02  0x56 > /sys/bus/i2c/devices/i2c-0/new_device',
-'echo qfx5210_64x_psu1  0x53 > /sys/bus/i2c/devices/i2c-10/new_device',
-'echo ym2851  0x5b > /sys/bus/i2c/devices/i2c-10/new_device',
-'echo qfx5210_64x_psu2  0x50 > /sys/bus/i2c/devices/i2c-9/new_device',
-'echo ym2851  0x58 > /sys/bus/i2c/devices/i2c-9/new_device',
-'echo qfx5210_64x_fan  0x68 > /sys/bus/i2c/devices/i2c-17/new_device',
-'echo lm75  0x48 > /sys/bus/i2c/devices/i2c-18/new_device',
-'echo lm75  0x49 > /sys/bus/i2c/devices/i2c-18/new_device',
-'echo lm75  0x4a > /sys/bus/i2c/devices/i2c-18/new_device',
-'echo lm75  0x4b > /sys/bus/i2c/devices/i2c-18/new_device',
-'echo lm75  0x4d > /sys/bus/i2c/devices/i2c-17/new_device',
-'echo lm75  0x4e > /sys/bus/i2c/devices/i2c-17/new_device',
-'echo cpld_qfx5210  0x60 > /sys/bus/i2c/devices/i2c-19/new_device',
-'echo cpld_plain  0x62 > /sys/bus/i2c/devices/i2c-20/new_device',
-'echo cpld_plain  0x64 > /sys/bus/i2c/devices/i2c-21/new_device',
-'echo cpld_plain  0x66 > /sys/bus/i2c/devices/i2c-22/new_device',
-'echo cpld_plain  0x65 > /sys/bus/i2c/devices/i2c-0/new_device 2>/dev/null'
-]
+i2c_devices = [
+Mux('pca9548', 0x77, 0),
+Mux('pca9548', 0x71, 1),
+Mux('pca9548', 0x76, 1),
+Mux('pca9548', 0x73, 1),
+Mux('pca9548', 0x70, 2),
+Mux('pca9548', 0x71, 2),
+Mux('pca9548', 0x72, 2),
+Mux('pca9548', 0x73, 2),
+Mux('pca9548', 0x74, 2),
+Mux('pca9548', 0x75, 2),
+Mux('pca9548', 0x76, 2),
+Device('24c02', 0x56, 0),
+Device('qfx5210_64x_psu1', 0x53, 10),
+Device('ym2851', 0x5b, 10),
+Device('qfx5210_64x_psu2', 0x50, 9),
+Device('ym2851', 0x58, 9),
+Device('qfx5210_64x_fan', 0x68, 17),
+Device('lm75', 0x48, 18),
+Device('lm75', 0x49, 18),
+Device('lm75', 0x4a, 18),
+Device('lm75', 0x4b, 18),
+Device('lm75', 0x4d, 17),
+Device('lm75', 0x4e, 17),
+Device('cpld_qfx5210', 0x60, 19),
+Device('cpld_plain', 0x62, 20),
+Device('cpld_plain', 0x64, 21),
+Device('cpld_plain', 0x66, 22),
+Device('cpld_plain', 0x65, 0, optional=True)
+] + [Device('optoe1', 0x50, bus, port_name='Port'+str(i)) for i, bus in enumerate(sfp_map)]
        
 def i2c_order_check():    
     return 0
                      
 def device_install():
     global FORCE
-    
-    for i in range(0,len(mknod)):
-        #for pca954x need times to built new i2c buses            
-        if mknod[i].find('pca954') != -1:
-           time.sleep(1)         
-           
-        status, output = log_os_system(mknod[i], 1)
-        if status:
-            print output
-            if FORCE == 0:                
-                return status  
-
-    for i in range(0,len(sfp_map)):
-        path = "/sys/bus/i2c/devices/i2c-"+str(sfp_map[i])+"/new_device"
-        status, output =log_os_system("echo optoe1 0x50 > " + path, 1)
-        if status:
-            print output
-            if FORCE == 0:            
-                return status
-        status, output =log_os_system("echo Port"+str(i)+" > /sys/bus/i2c/devices/"+str(sfp_map[i])+"-0050/port_name", 1)
-        if status:
-            print output
-            if FORCE == 0:
-                return status
-    return 
+    return I2cBringup(i2c_devices, force=FORCE).install()
     
 def device_uninstall():
     global FORCE
-    
-    status, output =log_os_system("ls /sys/bus/i2c/devices/1-0076", 0)
-    
-    for i in range(0,len(sfp_map)):
-        target = "/sys/bus/i2c/devices/i2c-"+str(sfp_map[i])+"/delete_device"
-        status, output =log_os_system("echo 0x50 > "+ target, 1)
-        if status:
-            print output
-            if FORCE == 0:            
-                return status
-       
-    nodelist = mknod
-           
-    for i in range(len(nodelist)):
-        target = nodelist[-(i+1)]
-        temp = target.split()
-        del temp[1]
-        temp[-1] = temp[-1].replace('new_device', 'delete_device')
-        status, output = log_os_system(" ".join(temp), 1)
-        if status:
-            print output
-            if FORCE == 0:            
-                return status  
-                                  
-    return 
+    return I2cBringup(i2c_devices, force=FORCE).uninstall()
         
 def system_ready():
     if driver_check() == False:
@@ -470,6 +431,9 @@ def system_ready():
     return True
                
 def do_install():
+    if DRY_RUN:
+        return dry_run(i2c_devices)
+
     logging.info('Checking system....')
     if driver_check() == False:
         logging.info('No driver, installing....')
@@ -0,0 +1,113 @@
+import os
+import sys
+
+test_path = os.path.dirname(os.path.abspath(__file__))
+utils_path = os.path.join(os.path.dirname(test_path), 'qfx5210', 'utils')
+sys.path.insert(0, utils_path)
+
+from i2c_bringup import I2cBringup, FakeSysfs, Mux, Device
+import juniper_qfx5210_util
+
+
+def new_device_writes(sysfs):
+    return [(path, value) for path, value in sysfs.written() if path.endswith('/new_device')]
+
+
+def test_muxes_before_devices():
+    devices = [
+        Mux('pca9548', 0x77, 0),
+        Device('lm75', 0x48, 3),
+        Mux('pca9548', 0x71, 1),
+        Device('lm75', 0x49, 10),
+        Device('24c02', 0x56, 0),
+    ]
+    sysfs = FakeSysfs((0,), delay=0.02)
+    try:
+        assert I2cBringup(devices, sysfs, timeout=1).install() == 0
+        writes = new_device_writes(sysfs)
+        assert writes[:2] == [('i2c-0/new_device', 'pca9548 0x77'),
+                              ('i2c-1/new_device', 'pca9548 0x71')]
+        assert sorted(writes[2:]) == [('i2c-0/new_device', '24c02 0x56'),
+                                      ('i2c-10/new_device', 'lm75 0x49'),
+                                      ('i2c-3/new_device', 'lm75 0x48')]
+        # Buses of the second mux are numbered after the ones of the first
+        assert os.path.isdir(sysfs.path('i2c-16'))
+        assert not os.path.exists(sysfs.path('i2c-17'))
+    finally:
+        sysfs.cleanup()
+
+
+def test_mux_waits_for_channels_of_previous_mux():
+    devices = [Mux('pca9548', 0x77, 0), Mux('pca9548', 0x76, 8)]
+    sysfs = FakeSysfs((0,), delay=0.05)
+    try:
+        assert I2cBringup(devices, sysfs, timeout=1).install() == 0
+        (first, _, _), (second, _, _) = [entry for entry in sysfs.log if entry[1].endswith('/new_device')]
+        assert second - first >= 0.05
+        assert os.path.exists(sysfs.path('8-0076', 'channel-7'))
+    finally:
+        sysfs.cleanup()
+
+
+def test_port_name_after_device():
+    devices = [Mux('pca9548', 0x77, 0), Device('optoe1', 0x50, 5, port_name='Port4')]
+    sysfs = FakeSysfs((0,), delay=0.02)
+    try:
+        assert I2cBringup(devices, sysfs, timeout=1).install() == 0
+        assert sysfs.written()[-2:] == [('i2c-5/new_device', 'optoe1 0x50'),
+                                        ('5-0050/port_name', 'Port4')]
+    finally:
+        sysfs.cleanup()
+
+
+def test_failures():
+    devices = [
+        Device('lm75', 0x48, 0),
+        Device('lm75', 0x48, 0),
+        Device('cpld_plain', 0x65, 3, optional=True),
+        Device('cpld_plain', 0x66, 4),
+    ]
+    sysfs = FakeSysfs((0,), delay=0.01)
+    try:
+        # Second lm75 busy, no bus 4; the optional device is not counted
+        assert I2cBringup(devices, sysfs, timeout=0.1).install() == 2
+    finally:
+        sysfs.cleanup()
+
+
+def test_uninstall_order():
+    devices = [
+        Mux('pca9548', 0x77, 0),
+        Mux('pca9548', 0x71, 1),
+        Device('lm75', 0x48, 9),
+        Device('24c02', 0x56, 0),
+    ]
+    sysfs = FakeSysfs((0,), delay=0.01)
+    try:
+        bringup = I2cBringup(devices, sysfs, timeout=1)
+        assert bringup.install() == 0
+        del sysfs.log[:]
+        assert bringup.uninstall() == 0
+        writes = sysfs.written()
+        assert sorted(writes[:2]) == [('i2c-0/delete_device', '0x56'), ('i2c-9/delete_device', '0x48')]
+        assert writes[2:] == [('i2c-1/delete_device', '0x71'), ('i2c-0/delete_device', '0x77')]
+        assert not os.path.exists(sysfs.path('i2c-9'))
+    finally:
+        sysfs.cleanup()
+
+
+def test_qfx5210_devices():
+    sysfs = FakeSysfs((0,), delay=0.005)
+    try:
+        assert I2cBringup(juniper_qfx5210_util.i2c_devices, sysfs, timeout=1).install() == 0
+        writes = new_device_writes(sysfs)
+        muxes = [device for device in juniper_qfx5210_util.i2c_devices if isinstance(device, Mux)]
+        assert writes[:len(muxes)] == [('i2c-{}/new_device'.format(mux.bus), 'pca9548 0x{:02x}'.format(mux.addr))
+                                       for mux in muxes]
+        # One optoe1 per port, named as the sfp_map order
+        for i, bus in enumerate(juniper_qfx5210_util.sfp_map):
+            assert ('{}-0050/port_name'.format(bus), 'Port' + str(i)) in sysfs.written()
+        # The optional CPLD at 0x65 as well
+        assert os.path.isdir(sysfs.path('0-0065'))
+    finally:
+        sysfs.cleanup()
@@ -20,11 +20,20 @@ try:
     import io
     import re
     import syslog
+    import time
+    from multiprocessing.pool import ThreadPool
 except ImportError as e:
     raise ImportError (str(e) + "- required module not found")
 
 MAX_SELECT_DELAY = 3600
 
+# Maximum number of modules whose EEPROM is read concurrently
+MAX_SFP_WORKERS = 8
+
+# Time in seconds during which SFP events following the first one are collected
+# and reported together, e.g. when a bundle of cables is plugged in
+SFP_EVENT_COALESCE_WINDOW = 0.5
+
 MLNX_NUM_PSU = 2
 
 EEPROM_CACHE_ROOT = '/var/cache/sonic/decode-syseeprom'
@@ -70,11 +79,15 @@ class Chassis(ChassisBase):
         self.sfp_module_initialized = False
         self.sfp_event_initialized = False
         self.reboot_cause_initialized = False
+        self.sfp_worker_pool = None
         self.initialize_system_led()
         logger.log_info("Chassis loaded successfully")
 
 
     def __del__(self):
+        if self.sfp_worker_pool is not None:
+            self.sfp_worker_pool.terminate()
+
         if self.sfp_event_initialized:
             self.sfp_event.deinitialize()
 
@@ -246,6 +259,54 @@ class Chassis(ChassisBase):
         return sfp
 
 
+    def _get_sfp_worker_pool(self):
+        if self.sfp_worker_pool is None:
+            self.sfp_worker_pool = ThreadPool(MAX_SFP_WORKERS)
+        return self.sfp_worker_pool
+
+
+    def _get_transceiver_dom(self, index):
+        sfp = self.get_sfp(index)
+        if sfp is None:
+            return index, None
+
+        try:
+            if not sfp.get_presence():
+                return index, None
+            # The DOM page is read once, the getters below are served from the EEPROM page cache
+            return index, {
+                'dom': sfp.get_transceiver_bulk_status(),
+                'rx_los': sfp.get_rx_los(),
+                'tx_fault': sfp.get_tx_fault()
+            }
+        except Exception as e:
+            logger.log_error("Fail to retrieve DOM of SFP {} - {}".format(index, repr(e)))
+            return index, None
+
+
+    def get_all_transceiver_dom(self, ports=None):
+        """
+        Retrieves the DOM information of several SFPs, reading the modules concurrently
+
+        Args:
+            ports: A list of (1-based) indexes of the sfps to read, all the sfps if None
+
+        Returns:
+            A dict which maps the index of every sfp to None if the module is not present
+            or could not be read, otherwise to a dict with the following keys:
+                'dom': dict returned by get_transceiver_bulk_status()
+                'rx_los': list returned by get_rx_los()
+                'tx_fault': list returned by get_tx_fault()
+        """
+        if not self.sfp_module_initialized:
+            self.initialize_sfp()
+
+        if ports is None:
+            ports = range(1, len(self._sfp_list) + 1)
+
+        return dict(self._get_sfp_worker_pool().map(self._get_transceiver_dom, ports))
+
+
     def _extract_num_of_fans_and_fan_drawers(self):
         num_of_fan = 0
         num_of_drawer = 0
@@ -450,6 +511,9 @@ class Chassis(ChassisBase):
                   Ex. {'fan':{'0':'0', '2':'1'}, 'sfp':{'11':'0'}}
                       indicates that fan 0 has been removed, fan 2
                       has been inserted and sfp 11 has been removed.
+                  Events arriving shortly after each other are reported together.
+                  The transceiver info of the inserted sfps is returned under
+                  the key 'sfp_info', in the format of {sfp_index: info_dict}.
         """
         # Initialize SFP event first
         if not self.sfp_event_initialized:
@@ -471,28 +535,49 @@ class Chassis(ChassisBase):
             status = self.sfp_event.check_sfp_status(port_dict, timeout)
 
         if status:
-            self.reinit_sfps(port_dict)
-            return True, {'sfp':port_dict}
+            self._coalesce_sfp_events(port_dict)
+            sfp_info = self.reinit_sfps(port_dict)
+            return True, {'sfp':port_dict, 'sfp_info':sfp_info}
         else:
             return True, {'sfp':{}}
 
+    def _coalesce_sfp_events(self, port_dict):
+        """
+        Collect the SFP events arriving within SFP_EVENT_COALESCE_WINDOW after the first one
+        :param port_dict: SFP event data, updated with the new events
+        """
+        deadline = time.time() + SFP_EVENT_COALESCE_WINDOW
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0 or not self.sfp_event.check_sfp_status(port_dict, remaining):
+                break
+
+    def _reinit_sfp(self, index):
+        try:
+            sfp = self.get_sfp(index)
+            sfp.reinit()
+            return index, sfp.get_transceiver_info()
+        except Exception as e:
+            logger.log_error("Fail to re-initialize SFP {} - {}".format(index, repr(e)))
+            return index, None
+
     def reinit_sfps(self, port_dict):
         """
-        Re-initialize SFP if there is any newly inserted SFPs
+        Re-initialize SFP if there is any newly inserted SFPs, the modules are read concurrently
         :param port_dict: SFP event data
-        :return:
+        :return: A dict which maps the index of every inserted SFP to its transceiver info,
+                 or None if it can't be read
         """
         # SFP not initialize yet, do nothing
         if not self.sfp_module_initialized:
-            return
+            return {}
 
         from . import sfp
-        for index, status in port_dict.items():
-            if status == sfp.SFP_STATUS_INSERTED:
-                try:
-                    self.get_sfp(index).reinit()
-                except Exception as e:
-                    logger.log_error("Fail to re-initialize SFP {} - {}".format(index, repr(e)))
+        inserted = [index for index, status in port_dict.items() if status == sfp.SFP_STATUS_INSERTED]
+        if not inserted:
+            return {}
+
+        return dict(self._get_sfp_worker_pool().map(self._reinit_sfp, inserted))
 
     def get_thermal_manager(self):
         from .thermal_manager import ThermalManager
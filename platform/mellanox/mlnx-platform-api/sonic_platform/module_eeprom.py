@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+#############################################################################
+# Mellanox
+#
+# Module contains a reader of the SFP module EEPROM which issues the
+# ethtool ioctls directly instead of running 'ethtool -m'
+#
+#############################################################################
+
+import array
+import fcntl
+import socket
+import struct
+import threading
+
+# Definitions from linux/sockios.h and linux/ethtool.h
+SIOCETHTOOL = 0x8946
+ETHTOOL_GMODULEINFO = 0x00000042
+ETHTOOL_GMODULEEEPROM = 0x00000043
+
+IFNAMSIZ = 16
+IFREQ_SIZE = 40
+
+# struct ethtool_modinfo { __u32 cmd; __u32 type; __u32 eeprom_len; __u32 reserved[8]; }
+ETHTOOL_MODINFO_FORMAT = '=III32x'
+# struct ethtool_eeprom { __u32 cmd; __u32 magic; __u32 offset; __u32 len; __u8 data[0]; }
+ETHTOOL_EEPROM_FORMAT = '=IIII'
+ETHTOOL_EEPROM_HEADER_SIZE = struct.calcsize(ETHTOOL_EEPROM_FORMAT)
+
+
+class ModuleEepromReader(object):
+    """
+    Read the EEPROM of the modules with ETHTOOL_GMODULEINFO and ETHTOOL_GMODULEEEPROM
+    ioctls, sent over a socket which is opened once and shared by all the ports.
+    """
+
+    def __init__(self):
+        self._sock = None
+        self._lock = threading.Lock()
+
+    def _get_socket(self):
+        if self._sock is None:
+            with self._lock:
+                if self._sock is None:
+                    self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        return self._sock
+
+    def _ethtool_ioctl(self, ifname, cmd_buf):
+        """
+        Send an ethtool command; cmd_buf is an array('B') which the kernel
+        reads the command from and writes the result back to.
+        """
+        if not isinstance(ifname, bytes):
+            ifname = ifname.encode('ascii')
+        ifreq = struct.pack('{}sP'.format(IFNAMSIZ), ifname, cmd_buf.buffer_info()[0])
+        ifreq += b'\x00' * (IFREQ_SIZE - len(ifreq))
+        fcntl.ioctl(self._get_socket().fileno(), SIOCETHTOOL, ifreq)
+
+    def get_module_info(self, ifname):
+        """
+        Returns a tuple (type, eeprom_len) of the module plugged in the port,
+        raises IOError if there is none
+        """
+        cmd_buf = array.array('B', struct.pack(ETHTOOL_MODINFO_FORMAT, ETHTOOL_GMODULEINFO, 0, 0))
+        self._ethtool_ioctl(ifname, cmd_buf)
+        _, module_type, eeprom_len = struct.unpack(ETHTOOL_MODINFO_FORMAT, bytes(bytearray(cmd_buf)))
+        return module_type, eeprom_len
+
+    def read(self, ifname, offset, num_bytes):
+        """
+        Read num_bytes from offset of the module EEPROM.
+        Returns the bytes as a list of integers, or None on failure.
+        """
+        try:
+            _, eeprom_len = self.get_module_info(ifname)
+            if offset < 0 or num_bytes < 0 or offset + num_bytes > eeprom_len:
+                return None
+
+            cmd_buf = array.array('B', struct.pack(ETHTOOL_EEPROM_FORMAT, ETHTOOL_GMODULEEEPROM, 0, offset, num_bytes) +
+                                  b'\x00' * num_bytes)
+            self._ethtool_ioctl(ifname, cmd_buf)
+        except (IOError, OSError):
+            return None
+
+        return cmd_buf[ETHTOOL_EEPROM_HEADER_SIZE:].tolist()
+
+
+_reader = ModuleEepromReader()
+
+
+def read_module_eeprom(ifname, offset, num_bytes):
+    """
+    Same as parsing the output of 'ethtool -m <ifname> hex on offset <offset> length <num_bytes>':
+    returns the bytes as a list of 2 digit hex strings, or None on failure
+    """
+    data = _reader.read(ifname, offset, num_bytes)
+    if data is None:
+        return None
+    return ['{:02x}'.format(byte) for byte in data]
+
+
+def is_module_present(ifname):
+    """
+    A module is present if the first byte of its EEPROM can be read
+    """
+    return _reader.read(ifname, 0, 1) is not None
@@ -9,11 +9,13 @@
 #############################################################################
 
 try:
+    import errno
     import os.path
     from sonic_platform_base.psu_base import PsuBase
     from sonic_py_common.logger import Logger
     from sonic_platform.fan import Fan
     from sonic_platform.led import Led
+    from sonic_platform.utils import sysfs_reader
 except ImportError as e:
     raise ImportError (str(e) + "- required module not found")
 
@@ -113,10 +115,10 @@ class Psu(PsuBase):
         """
         result = 0
         try:
-            if not os.path.exists(filename):
-                return result
-            with open(filename, 'r') as fileobj:
-                result = int(fileobj.read().strip())
+            result = int(sysfs_reader.read(filename).strip())
+        except IOError as e:
+            if e.errno != errno.ENOENT:
+                logger.log_info("Fail to read file {} due to {}".format(filename, repr(e)))
         except Exception as e:
             logger.log_info("Fail to read file {} due to {}".format(filename, repr(e)))
         return result
@@ -9,7 +9,6 @@
 #############################################################################
 
 try:
-    import subprocess
     import time
     from sonic_platform_base.sfp_base import SfpBase
     from sonic_platform_base.sonic_eeprom import eeprom_dts
@@ -21,6 +20,8 @@ try:
     from sonic_platform_base.sonic_sfp.qsfp_dd import qsfp_dd_InterfaceId
     from sonic_platform_base.sonic_sfp.qsfp_dd import qsfp_dd_Dom
     from sonic_py_common.logger import Logger
+    from sonic_platform.sfp_eeprom_cache import SfpEepromCache, EEPROM_PAGE_SIZE
+    from sonic_platform.module_eeprom import read_module_eeprom, is_module_present
     from python_sdk_api.sxd_api import *
     from python_sdk_api.sx_api import *
 
@@ -87,7 +88,7 @@ XCVR_FIRST_APPLICATION_LIST_WIDTH_QSFP_DD = 32
 XCVR_SECOND_APPLICATION_LIST_OFFSET_QSFP_DD = 351
 XCVR_SECOND_APPLICATION_LIST_WIDTH_QSFP_DD = 28
 
-# to improve performance we retrieve all eeprom data via a single ethtool command
+# to improve performance we retrieve all eeprom data via a single ethtool read
 # in function get_transceiver_info and get_transceiver_bulk_status
 # XCVR_INTERFACE_DATA_SIZE stands for the max size to be read
 # this variable is only used by get_transceiver_info.
@@ -236,11 +237,26 @@ qsfp_compliance_code_tup = ('10/40G Ethernet Compliance Code', 'SONET Compliance
                             'Fibre Channel transmission media', 'Fibre Channel Speed')
 
 SFP_PATH = "/var/run/hw-management/qsfp/"
+
+# Network device of the module which the ethtool ioctls are sent to
+SFP_PORT_NAME_CONVENTION = "sfp{}"
+
 SFP_TYPE = "SFP"
 QSFP_TYPE = "QSFP"
 OSFP_TYPE = "OSFP"
 QSFP_DD_TYPE = "QSFP_DD"
 
+# EEPROM pages holding the DOM values, status and control bytes are cached for
+# a short time only, the other pages are kept until the module is plugged out or in.
+# SFP: lower page of A2h, QSFP/OSFP: lower page, QSFP-DD: lower page and page 11h
+QSFP_DD_PAGE11_START = 512
+volatile_eeprom_pages_dict = {
+    SFP_TYPE: (SFP_MODULE_ADDRA2_OFFSET // EEPROM_PAGE_SIZE,),
+    QSFP_TYPE: (0,),
+    OSFP_TYPE: (0,),
+    QSFP_DD_TYPE: (0, QSFP_DD_PAGE11_START // EEPROM_PAGE_SIZE)
+}
+
 #variables for sdk
 REGISTER_NUM = 1
 DEVICE_ID = 1
@@ -313,6 +329,7 @@ class SFP(SfpBase):
         self.index = sfp_index + 1
         self.sfp_eeprom_path = "qsfp{}".format(self.index)
         self.sfp_status_path = "qsfp{}_status".format(self.index)
+        self._eeprom_cache = SfpEepromCache(self._read_eeprom_bytes_raw)
         self._detect_sfp_type(sfp_type)
         self.dom_tx_disable_supported = False
         self._dom_capability_detect()
@@ -324,6 +341,7 @@ class SFP(SfpBase):
         Re-initialize this SFP object when a new SFP inserted
         :return: 
         """
+        self._eeprom_cache.invalidate()
         self._detect_sfp_type(self.sfp_type)
         self._dom_capability_detect()
 
@@ -334,38 +352,20 @@ class SFP(SfpBase):
         Returns:
             bool: True if device is present, False if not
         """
-        presence = False
-        ethtool_cmd = "ethtool -m sfp{} hex on offset 0 length 1 2>/dev/null".format(self.index)
-        try:
-            proc = subprocess.Popen(ethtool_cmd, stdout=subprocess.PIPE, shell=True, stderr=subprocess.STDOUT)
-            stdout = proc.communicate()[0]
-            proc.wait()
-            result = stdout.rstrip('\n')
-            if result != '':
-                presence = True
-
-        except OSError, e:
-            raise OSError("Cannot detect sfp")
+        presence = is_module_present(SFP_PORT_NAME_CONVENTION.format(self.index))
+        if not presence:
+            self._eeprom_cache.invalidate()
 
         return presence
 
 
-    # Read out any bytes from any offset
+    # Read out any bytes from any offset, served from the EEPROM page cache
     def _read_eeprom_specific_bytes(self, offset, num_bytes):
-        eeprom_raw = []
-        ethtool_cmd = "ethtool -m sfp{} hex on offset {} length {}".format(self.index, offset, num_bytes)
-        try:
-            output = subprocess.check_output(ethtool_cmd, shell=True)
-            output_lines = output.splitlines()
-            first_line_raw = output_lines[0]
-            if "Offset" in first_line_raw:
-                for line in output_lines[2:]:
-                    line_split = line.split()
-                    eeprom_raw = eeprom_raw + line_split[1:]
-        except subprocess.CalledProcessError as e:
-            return None
+        return self._eeprom_cache.read(offset, num_bytes)
+
 
-        return eeprom_raw
+    def _read_eeprom_bytes_raw(self, offset, num_bytes):
+        return read_module_eeprom(SFP_PORT_NAME_CONVENTION.format(self.index), offset, num_bytes)
 
 
     def _detect_sfp_type(self, sfp_type):
@@ -389,6 +389,8 @@ class SFP(SfpBase):
             # in this case we treat it as the default type according to the SKU
             self.sfp_type = sfp_type
 
+        self._eeprom_cache.set_volatile_pages(volatile_eeprom_pages_dict.get(self.sfp_type, (0,)))
+
 
     def _dom_capability_detect(self):
         if not self.get_presence():
@@ -974,7 +976,7 @@ class SFP(SfpBase):
 
             if self.dom_rx_tx_power_bias_supported:
                 # page 11h
-                offset = 512
+                offset = QSFP_DD_PAGE11_START
                 dom_data_raw = self._read_eeprom_specific_bytes(offset + QSFP_DD_CHANNL_MON_OFFSET, QSFP_DD_CHANNL_MON_WIDTH)
                 if dom_data_raw is None:
                     return transceiver_dom_info_dict
@@ -1301,7 +1303,7 @@ class SFP(SfpBase):
         elif self.sfp_type == QSFP_DD_TYPE:
             # page 11h
             if self.dom_rx_tx_power_bias_supported:
-                offset = 512
+                offset = QSFP_DD_PAGE11_START
                 dom_channel_monitor_raw = self._read_eeprom_specific_bytes((offset + QSFP_DD_CHANNL_RX_LOS_STATUS_OFFSET), QSFP_DD_CHANNL_RX_LOS_STATUS_WIDTH)
                 if dom_channel_monitor_raw is not None:
                     rx_los_data = int(dom_channel_monitor_raw[0], 8)
@@ -1353,7 +1355,7 @@ class SFP(SfpBase):
             return None
             # page 11h
             if self.dom_rx_tx_power_bias_supported:
-                offset = 512
+                offset = QSFP_DD_PAGE11_START
                 dom_channel_monitor_raw = self._read_eeprom_specific_bytes((offset + QSFP_DD_CHANNL_TX_FAULT_STATUS_OFFSET), QSFP_DD_CHANNL_TX_FAULT_STATUS_WIDTH)
                 if dom_channel_monitor_raw is not None:
                     tx_fault_data = int(dom_channel_monitor_raw[0], 8)
@@ -1646,7 +1648,7 @@ class SFP(SfpBase):
         elif self.sfp_type == QSFP_DD_TYPE:
             # page 11h
             if self.dom_rx_tx_power_bias_supported:
-                offset = 512
+                offset = QSFP_DD_PAGE11_START
                 sfpd_obj = qsfp_dd_Dom()
                 if sfpd_obj is None:
                     return None
@@ -1723,7 +1725,7 @@ class SFP(SfpBase):
         elif self.sfp_type == QSFP_DD_TYPE:
             # page 11
             if self.dom_rx_tx_power_bias_supported:
-                offset = 512
+                offset = QSFP_DD_PAGE11_START
                 sfpd_obj = qsfp_dd_Dom()
                 if sfpd_obj is None:
                     return None
@@ -1801,7 +1803,7 @@ class SFP(SfpBase):
             return None
             # page 11
             if self.dom_rx_tx_power_bias_supported:
-                offset = 512
+                offset = QSFP_DD_PAGE11_START
                 sfpd_obj = qsfp_dd_Dom()
                 if sfpd_obj is None:
                     return None
@@ -1852,6 +1854,8 @@ class SFP(SfpBase):
         if rc != SX_STATUS_SUCCESS:
             logger.log_warning("sx_mgmt_phy_mod_reset failed, rc = %d" % rc)
 
+        self._eeprom_cache.invalidate()
+
         return rc == SX_STATUS_SUCCESS
 
 
@@ -2010,7 +2014,8 @@ class SFP(SfpBase):
         else:
             self._set_lpmode_raw(log_port_list, SX_MGMT_PHY_MOD_PWR_ATTR_PWR_MODE_E, SX_MGMT_PHY_MOD_PWR_MODE_AUTO_E)
             logger.log_info( "Disabled low power mode for module [%d]" % (self.sdk_index))
- 
+
+        self._eeprom_cache.invalidate()
         return True
 
 
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+
+#############################################################################
+# Mellanox
+#
+# Module contains a page level cache of the SFP module EEPROM, which
+# serves the field decoders of the SFP class from a few page reads
+#
+#############################################################################
+
+import time
+
+# Size of a page in the linear EEPROM address space exposed by the driver:
+# for SFP, 0-255 is A0h and 256-511 is A2h; for QSFP/QSFP-DD, 0-127 is the
+# lower page followed by the upper pages (e.g. page 3 of QSFP at 384 and
+# page 11h of QSFP-DD at 512).
+EEPROM_PAGE_SIZE = 128
+
+# Pages are read in blocks of two, i.e. lower page together with upper page 0
+EEPROM_PAGES_PER_BLOCK = 2
+
+# Time to live of the pages holding the monitored values and the status bits
+VOLATILE_PAGE_TTL = 1
+
+
+class SfpEepromCache(object):
+    """
+    Page level cache of the EEPROM of one SFP module.
+
+    Static pages stay valid until invalidate() is called on a plug event,
+    volatile pages (DOM values, status and control bytes) are re-read once
+    they are older than their time to live. Page ranges the module failed to
+    return are not tried again until invalidate() either.
+    """
+
+    def __init__(self, read_func, volatile_pages=(), ttl=VOLATILE_PAGE_TTL):
+        """
+        :param read_func: function (offset, num_bytes) returning the raw bytes
+                          as a list of hex strings, or None on failure
+        :param volatile_pages: indexes of the pages that must not be kept longer than ttl
+        :param ttl: time to live of volatile pages in seconds
+        """
+        self._read_func = read_func
+        self._ttl = ttl
+        self._volatile_pages = frozenset(volatile_pages)
+        self._pages = {}
+        self._unsupported = set()
+
+    def set_volatile_pages(self, volatile_pages):
+        self._volatile_pages = frozenset(volatile_pages)
+
+    def invalidate(self):
+        """
+        Drop all the cached pages, to be called when the module is plugged in or out
+        """
+        self._pages = {}
+        self._unsupported = set()
+
+    def _is_valid(self, page, now):
+        entry = self._pages.get(page)
+        if entry is None:
+            return False
+        return page not in self._volatile_pages or now - entry[0] < self._ttl
+
+    def _load(self, first_page, last_page, now):
+        if (first_page, last_page) in self._unsupported:
+            return False
+
+        offset = first_page * EEPROM_PAGE_SIZE
+        num_bytes = (last_page - first_page + 1) * EEPROM_PAGE_SIZE
+        raw = self._read_func(offset, num_bytes)
+        if raw is None or len(raw) != num_bytes:
+            self._unsupported.add((first_page, last_page))
+            return False
+
+        for page in range(first_page, last_page + 1):
+            start = (page - first_page) * EEPROM_PAGE_SIZE
+            self._pages[page] = (now, raw[start : start + EEPROM_PAGE_SIZE])
+        return True
+
+    def read(self, offset, num_bytes):
+        """
+        Read num_bytes from offset, loading the pages which are missing or expired.
+        Returns the same as read_func.
+        """
+        if num_bytes <= 0:
+            return self._read_func(offset, num_bytes)
+
+        first_page = offset // EEPROM_PAGE_SIZE
+        last_page = (offset + num_bytes - 1) // EEPROM_PAGE_SIZE
+        now = time.time()
+
+        missing = [page for page in range(first_page, last_page + 1) if not self._is_valid(page, now)]
+        if missing:
+            # Try the whole blocks holding the missing pages first, then the missing pages only.
+            # Some modules don't implement all the pages of a block, in which case fall back
+            # to reading the requested bytes without caching them. Failed ranges are remembered
+            # so that the next reads go straight to the requested bytes.
+            block_first = missing[0] - missing[0] % EEPROM_PAGES_PER_BLOCK
+            block_last = missing[-1] - missing[-1] % EEPROM_PAGES_PER_BLOCK + EEPROM_PAGES_PER_BLOCK - 1
+            if not self._load(block_first, block_last, now) and \
+               ((block_first, block_last) == (missing[0], missing[-1]) or not self._load(missing[0], missing[-1], now)):
+                return self._read_func(offset, num_bytes)
+
+        raw = []
+        for page in range(first_page, last_page + 1):
+            raw.extend(self._pages[page][1])
+        start = offset - first_page * EEPROM_PAGE_SIZE
+        return raw[start : start + num_bytes]
@@ -15,6 +15,7 @@ try:
     from os.path import isfile, join
     import io
     import os.path
+    from .utils import sysfs_reader
 except ImportError as e:
     raise ImportError (str(e) + "- required module not found")
 
@@ -374,8 +375,7 @@ class Thermal(ThermalBase):
         """
         result = None
         try:
-            with open(filename, 'r') as fileobj:
-                result = fileobj.read().strip()
+            result = sysfs_reader.read(filename).strip()
         except Exception as e:
             logger.log_info("Fail to read file {} due to {}".format(filename, repr(e)))
         return result
@@ -563,11 +563,8 @@ class Thermal(ThermalBase):
         normal = None
         current = None
         try:    
-            with open(normal_temp_path, 'r') as file_obj:
-                normal = float(file_obj.read())
-
-            with open(current_temp_path, 'r') as file_obj:
-                current = float(file_obj.read())
+            normal = float(sysfs_reader.read(normal_temp_path))
+            current = float(sysfs_reader.read(current_temp_path))
 
             return current <= normal
         except Exception as e:
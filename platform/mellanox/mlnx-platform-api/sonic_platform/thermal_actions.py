@@ -78,8 +78,8 @@ class CheckAndSetAllFanSpeedAction(SetAllFanSpeedAction):
         :param thermal_info_dict: A dictionary stores all thermal information.
         :return:
         """
-        from .thermal import Thermal
-        if Thermal.check_thermal_zone_temperature():
+        from .thermal_infos import ThermalSnapshot
+        if ThermalSnapshot.current().is_thermal_zone_temperature_normal():
             SetAllFanSpeedAction.execute(self, thermal_info_dict)
         
 
@@ -194,10 +194,9 @@ class UpdateCoolingLevelToMinAction(ThermalPolicyActionBase):
     @classmethod
     def update_cooling_level_to_minimum(cls, thermal_info_dict):
         from .fan import Fan
-        from .thermal import Thermal
         from .thermal_conditions import UpdateCoolingLevelToMinCondition
-        from .thermal_infos import FanInfo
-        if Thermal.check_thermal_zone_temperature():
+        from .thermal_infos import FanInfo, ThermalSnapshot
+        if ThermalSnapshot.current().is_thermal_zone_temperature_normal():
             fan_info_obj = thermal_info_dict[FanInfo.INFO_NAME]
             speed = Fan.min_cooling_level * 10
             for fan in fan_info_obj.get_presence_fans():
@@ -81,10 +81,11 @@ class MinCoolingLevelChangeCondition(ThermalPolicyConditionBase):
     temperature = None
     
     def is_match(self, thermal_info_dict):
-        from .thermal import Thermal
+        from .thermal_infos import ThermalSnapshot
+        snapshot = ThermalSnapshot.current()
 
-        trust_state = Thermal.check_module_temperature_trustable()
-        temperature = Thermal.get_min_amb_temperature()
+        trust_state = snapshot.get_module_temperature_trust()
+        temperature = snapshot.get_min_amb_temperature()
         temperature = temperature / 1000
 
         change_cooling_level = False
@@ -103,8 +104,8 @@ class CoolingLevelChangeCondition(ThermalPolicyConditionBase):
     cooling_level = None
 
     def is_match(self, thermal_info_dict):
-        from .fan import Fan
-        current_cooling_level = Fan.get_cooling_level()
+        from .thermal_infos import ThermalSnapshot
+        current_cooling_level = ThermalSnapshot.current().get_cooling_level()
         if current_cooling_level != CoolingLevelChangeCondition.cooling_level:
             CoolingLevelChangeCondition.cooling_level = current_cooling_level
             return True
@@ -119,7 +120,8 @@ class UpdateCoolingLevelToMinCondition(ThermalPolicyConditionBase):
             return False
 
         from .fan import Fan
-        current_cooling_level = Fan.get_cooling_level()
+        from .thermal_infos import ThermalSnapshot
+        current_cooling_level = ThermalSnapshot.current().get_cooling_level()
         if current_cooling_level == Fan.min_cooling_level:
             UpdateCoolingLevelToMinCondition.enable = False
             return False
@@ -2,6 +2,89 @@ from sonic_platform_base.sonic_thermal_control.thermal_info_base import ThermalP
 from sonic_platform_base.sonic_thermal_control.thermal_json_object import thermal_json_object
 
 
+class ThermalSnapshot(object):
+    """
+    Sensor values of one thermal policy cycle, shared by all the thermal infos, conditions
+    and actions of the cycle. Each value is read on first use and kept until the end of
+    the cycle. Out of a cycle, current() returns a new snapshot on each call.
+    """
+    _current = None
+
+    def __init__(self, chassis=None):
+        self._chassis = chassis
+        self._values = {}
+
+    @classmethod
+    def begin(cls, chassis):
+        """
+        Start a thermal policy cycle
+        :param chassis: The chassis object
+        :return: The snapshot of the cycle
+        """
+        cls._current = cls(chassis)
+        return cls._current
+
+    @classmethod
+    def end(cls):
+        cls._current = None
+
+    @classmethod
+    def current(cls, chassis=None):
+        """
+        Retrieves the snapshot of the current cycle
+        :param chassis: The chassis object
+        :return: A ThermalSnapshot object
+        """
+        snapshot = cls._current
+        if snapshot is None or (chassis is not None and snapshot._chassis is not chassis):
+            snapshot = cls(chassis)
+        return snapshot
+
+    def _get(self, name, read_func):
+        if name not in self._values:
+            self._values[name] = read_func()
+        return self._values[name]
+
+    def get_fans(self):
+        return self._get('fans', lambda: list(self._chassis.get_all_fans()))
+
+    def get_fan_presence(self):
+        return self._get('fan_presence', lambda: [fan.get_presence() for fan in self.get_fans()])
+
+    def get_fan_status(self):
+        return self._get('fan_status', lambda: [fan.get_status() for fan in self.get_fans()])
+
+    def get_psus(self):
+        return self._get('psus', lambda: list(self._chassis.get_all_psus()))
+
+    def get_psu_presence(self):
+        return self._get('psu_presence', lambda: [psu.get_presence() for psu in self.get_psus()])
+
+    def get_psu_powergood(self):
+        return self._get('psu_powergood', lambda: [presence and psu.get_powergood_status()
+                                                   for psu, presence in zip(self.get_psus(), self.get_psu_presence())])
+
+    def get_module_temperature_trust(self):
+        from .thermal import Thermal
+        return self._get('module_temperature_trust', Thermal.check_module_temperature_trustable)
+
+    def get_min_amb_temperature(self):
+        from .thermal import Thermal
+        return self._get('min_amb_temperature', Thermal.get_min_amb_temperature)
+
+    def is_thermal_zone_temperature_normal(self):
+        from .thermal import Thermal
+        return self._get('thermal_zone_temperature_normal', Thermal.check_thermal_zone_temperature)
+
+    def get_cooling_level(self):
+        """
+        Retrieves the cooling level at the beginning of the cycle, actions which need the
+        value set by another action of the same cycle must read it from Fan
+        """
+        from .fan import Fan
+        return self._get('cooling_level', Fan.get_cooling_level)
+
+
 @thermal_json_object('fan_info')
 class FanInfo(ThermalPolicyInfoBase):
     """
@@ -23,28 +106,23 @@ class FanInfo(ThermalPolicyInfoBase):
         :param chassis: The chassis object
         :return:
         """
-        self._status_changed = False
-        for fan in chassis.get_all_fans():
-            presence = fan.get_presence()
-            status = fan.get_status()
-            if presence and fan not in self._presence_fans:
-                self._presence_fans.add(fan)
-                self._status_changed = True
-                if fan in self._absence_fans:
-                    self._absence_fans.remove(fan)
-            elif not presence and fan not in self._absence_fans:
-                self._absence_fans.add(fan)
-                self._status_changed = True
-                if fan in self._presence_fans:
-                    self._presence_fans.remove(fan)
-
-            if not status and fan not in self._fault_fans:
-                self._fault_fans.add(fan)
-                self._status_changed = True
-            elif status and fan in self._fault_fans:
-                self._fault_fans.remove(fan)
-                self._status_changed = True
-                    
+        snapshot = ThermalSnapshot.current(chassis)
+        presence_fans = set()
+        absence_fans = set()
+        fault_fans = set()
+        for fan, presence, status in zip(snapshot.get_fans(), snapshot.get_fan_presence(), snapshot.get_fan_status()):
+            if presence:
+                presence_fans.add(fan)
+            else:
+                absence_fans.add(fan)
+            if not status:
+                fault_fans.add(fan)
+
+        self._status_changed = (presence_fans, absence_fans, fault_fans) != \
+                               (self._presence_fans, self._absence_fans, self._fault_fans)
+        self._presence_fans = presence_fans
+        self._absence_fans = absence_fans
+        self._fault_fans = fault_fans
 
     def get_absence_fans(self):
         """
@@ -93,18 +171,18 @@ class PsuInfo(ThermalPolicyInfoBase):
         :param chassis: The chassis object
         :return:
         """
-        self._status_changed = False
-        for psu in chassis.get_all_psus():
-            if psu.get_presence() and psu.get_powergood_status() and psu not in self._presence_psus:
-                self._presence_psus.add(psu)
-                self._status_changed = True
-                if psu in self._absence_psus:
-                    self._absence_psus.remove(psu)
-            elif (not psu.get_presence() or not psu.get_powergood_status()) and psu not in self._absence_psus:
-                self._absence_psus.add(psu)
-                self._status_changed = True
-                if psu in self._presence_psus:
-                    self._presence_psus.remove(psu)
+        snapshot = ThermalSnapshot.current(chassis)
+        presence_psus = set()
+        absence_psus = set()
+        for psu, powergood in zip(snapshot.get_psus(), snapshot.get_psu_powergood()):
+            if powergood:
+                presence_psus.add(psu)
+            else:
+                absence_psus.add(psu)
+
+        self._status_changed = (presence_psus, absence_psus) != (self._presence_psus, self._absence_psus)
+        self._presence_psus = presence_psus
+        self._absence_psus = absence_psus
 
     def get_absence_psus(self):
         """
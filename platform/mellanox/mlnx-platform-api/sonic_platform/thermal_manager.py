@@ -24,6 +24,20 @@ class ThermalManager(ThermalManagerBase):
         """
         cls.start_thermal_control_algorithm()
 
+    @classmethod
+    def run_policy(cls, chassis):
+        """
+        Collect thermal information and run thermal policies. The sensors are read once
+        per cycle into a ThermalSnapshot shared by all the infos, conditions and actions.
+        :param chassis: The chassis object
+        :return:
+        """
+        ThermalSnapshot.begin(chassis)
+        try:
+            super(ThermalManager, cls).run_policy(chassis)
+        finally:
+            ThermalSnapshot.end()
+
     @classmethod
     def start_thermal_control_algorithm(cls):
         """
@@ -1,3 +1,98 @@
+import os
+import threading
+from collections import OrderedDict
+
+# Sysfs attributes fit in a page, a short read means the whole content has been read
+SYSFS_READ_SIZE = 4096
+
+# Number of files kept open, the least recently read ones are closed beyond it
+SYSFS_MAX_OPEN_FILES = 256
+
+
+class SysfsReader(object):
+    """
+    Reader of sysfs (and other small) files which keeps them open and re-reads them
+    from offset 0, instead of opening and closing them on every read.
+    A file is reopened once if reading it fails. Reading a sysfs attribute whose
+    device has been removed fails with ENODEV, which also covers the symlinks
+    hw-management re-creates when a device comes back, so the path isn't stat'ed
+    on every read. A regular file replaced by a rename is not detected: the
+    files read here are rewritten in place.
+    """
+    def __init__(self, max_open_files=SYSFS_MAX_OPEN_FILES):
+        # file path -> fd, in order of last read
+        self._fds = OrderedDict()
+        self._max_open_files = max_open_files
+        self._lock = threading.Lock()
+
+    def _open(self, file_path):
+        fd = os.open(file_path, os.O_RDONLY)
+        self._fds[file_path] = fd
+        while len(self._fds) > self._max_open_files:
+            self._close(next(iter(self._fds)))
+        return fd
+
+    def _close(self, file_path):
+        fd = self._fds.pop(file_path, None)
+        if fd is not None:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _get_fd(self, file_path):
+        fd = self._fds.pop(file_path, None)
+        if fd is not None:
+            # Most recently read last
+            self._fds[file_path] = fd
+        return fd
+
+    @staticmethod
+    def _read_fd(fd):
+        # os.pread is not available in python 2, the lock protects the file offset
+        os.lseek(fd, 0, os.SEEK_SET)
+        chunks = []
+        while True:
+            chunk = os.read(fd, SYSFS_READ_SIZE)
+            chunks.append(chunk)
+            if len(chunk) < SYSFS_READ_SIZE:
+                break
+        data = b''.join(chunks)
+        return data if isinstance(data, str) else data.decode('utf-8', 'replace')
+
+    def _read(self, file_path):
+        fd = self._get_fd(file_path)
+        if fd is not None:
+            try:
+                return self._read_fd(fd)
+            except OSError:
+                self._close(file_path)
+
+        try:
+            return self._read_fd(self._open(file_path))
+        except OSError as e:
+            self._close(file_path)
+            raise IOError(e.errno, e.strerror, file_path)
+
+    def read(self, file_path):
+        """
+        Read the content of a file
+        :param file_path: File path
+        :return: Content of the file, raises IOError on failure
+        """
+        with self._lock:
+            return self._read(file_path)
+
+    def close(self):
+        with self._lock:
+            for file_path in list(self._fds):
+                self._close(file_path)
+
+
+# Reader shared by all the sensors of the platform
+sysfs_reader = SysfsReader()
+
+
 def read_str_from_file(file_path, default='', raise_exception=False):
     """
     Read string content from file
@@ -7,8 +102,7 @@ def read_str_from_file(file_path, default='', raise_exception=False):
     :return: String content of the file
     """
     try:
-        with open(file_path, 'r') as f:
-            value = f.read().strip()
+        value = sysfs_reader.read(file_path).strip()
     except (ValueError, IOError) as e:
         if not raise_exception:
             value = default
@@ -27,8 +121,7 @@ def read_int_from_file(file_path, default=0, raise_exception=False):
     :return: Integer value of the file content
     """
     try:
-        with open(file_path, 'r') as f:
-            value = int(f.read().strip())
+        value = int(sysfs_reader.read(file_path).strip())
     except (ValueError, IOError) as e:
         if not raise_exception:
             value = default
@@ -0,0 +1,60 @@
+import os
+import sys
+from mock import MagicMock
+
+test_path = os.path.dirname(os.path.abspath(__file__))
+modules_path = os.path.dirname(test_path)
+sys.path.insert(0, modules_path)
+
+from sonic_platform.chassis import Chassis
+
+
+def make_sfp(presence, bulk_status):
+    sfp = MagicMock()
+    sfp.get_presence = MagicMock(return_value=presence)
+    sfp.get_transceiver_bulk_status = bulk_status
+    sfp.get_rx_los = MagicMock(return_value=[False] * 4)
+    sfp.get_tx_fault = MagicMock(return_value=[False] * 4)
+    return sfp
+
+
+def test_get_all_transceiver_dom():
+    chassis = Chassis()
+    chassis.sfp_module_initialized = True
+    chassis._sfp_list = [
+        make_sfp(True, MagicMock(return_value={'temperature': 30.0})),
+        make_sfp(False, MagicMock(return_value={'temperature': 31.0})),
+        make_sfp(True, MagicMock(side_effect=IndexError)),
+        make_sfp(True, MagicMock(return_value={'temperature': 33.0}))
+    ]
+
+    result = chassis.get_all_transceiver_dom()
+    assert sorted(result.keys()) == [1, 2, 3, 4]
+    assert result[1]['dom'] == {'temperature': 30.0}
+    assert result[1]['rx_los'] == [False] * 4
+    # Absent module and failure of one module
+    assert result[2] is None
+    assert result[3] is None
+    assert result[4]['dom'] == {'temperature': 33.0}
+    assert not chassis._sfp_list[1].get_transceiver_bulk_status.called
+
+    result = chassis.get_all_transceiver_dom([4])
+    assert list(result.keys()) == [4]
+
+
+def test_coalesce_sfp_events():
+    events = [{1: '1'}, {2: '1'}, {1: '0'}]
+
+    def check_sfp_status(port_dict, timeout):
+        assert 0 < timeout <= 0.5
+        if not events:
+            return False
+        port_dict.update(events.pop(0))
+        return True
+
+    chassis = Chassis()
+    chassis.sfp_event = MagicMock()
+    chassis.sfp_event.check_sfp_status = check_sfp_status
+    port_dict = {3: '1'}
+    chassis._coalesce_sfp_events(port_dict)
+    assert port_dict == {1: '0', 2: '1', 3: '1'}
@@ -0,0 +1,68 @@
+import ctypes
+import os
+import struct
+import sys
+from mock import patch
+
+test_path = os.path.dirname(os.path.abspath(__file__))
+modules_path = os.path.dirname(test_path)
+sys.path.insert(0, modules_path)
+
+from sonic_platform import module_eeprom
+from sonic_platform.module_eeprom import ModuleEepromReader, read_module_eeprom, is_module_present
+
+
+class MockEthtool(object):
+    """
+    Serve the ethtool ioctls from a dict of interface name to EEPROM bytes,
+    writing the result to the user buffer the way the kernel does
+    """
+    def __init__(self, modules):
+        self.modules = modules
+        self.calls = []
+
+    def ioctl(self, fd, request, ifreq):
+        assert request == module_eeprom.SIOCETHTOOL
+        assert len(ifreq) == module_eeprom.IFREQ_SIZE
+        ifname, addr = struct.unpack_from('{}sP'.format(module_eeprom.IFNAMSIZ), ifreq)
+        ifname = ifname.rstrip(b'\x00').decode('ascii')
+        cmd = ctypes.c_uint32.from_address(addr).value
+        self.calls.append((ifname, cmd))
+
+        if ifname not in self.modules:
+            raise IOError(5, 'Input/output error')
+        eeprom = self.modules[ifname]
+
+        if cmd == module_eeprom.ETHTOOL_GMODULEINFO:
+            ctypes.memmove(addr + 8, struct.pack('=I', len(eeprom)), 4)
+        elif cmd == module_eeprom.ETHTOOL_GMODULEEEPROM:
+            _, _, offset, length = struct.unpack(module_eeprom.ETHTOOL_EEPROM_FORMAT,
+                                                 ctypes.string_at(addr, module_eeprom.ETHTOOL_EEPROM_HEADER_SIZE))
+            data = bytes(bytearray(eeprom[offset : offset + length]))
+            ctypes.memmove(addr + module_eeprom.ETHTOOL_EEPROM_HEADER_SIZE, data, len(data))
+        return ifreq
+
+
+def test_read():
+    ethtool = MockEthtool({'sfp1': [i % 256 for i in range(256)]})
+    reader = ModuleEepromReader()
+    with patch('sonic_platform.module_eeprom.fcntl.ioctl', ethtool.ioctl):
+        assert reader.get_module_info('sfp1')[1] == 256
+        assert reader.read('sfp1', 250, 6) == [250, 251, 252, 253, 254, 255]
+        # Out of the bounds reported by the module
+        assert reader.read('sfp1', 250, 7) is None
+        assert reader.read('sfp2', 0, 1) is None
+    assert ethtool.calls == [('sfp1', module_eeprom.ETHTOOL_GMODULEINFO),
+                             ('sfp1', module_eeprom.ETHTOOL_GMODULEINFO),
+                             ('sfp1', module_eeprom.ETHTOOL_GMODULEEEPROM),
+                             ('sfp1', module_eeprom.ETHTOOL_GMODULEINFO),
+                             ('sfp2', module_eeprom.ETHTOOL_GMODULEINFO)]
+
+
+def test_ethtool_compatible_output():
+    ethtool = MockEthtool({'sfp1': [0x11, 0x0a, 0xff] + [0] * 253})
+    with patch('sonic_platform.module_eeprom.fcntl.ioctl', ethtool.ioctl):
+        assert read_module_eeprom('sfp1', 0, 3) == ['11', '0a', 'ff']
+        assert read_module_eeprom('sfp2', 0, 3) is None
+        assert is_module_present('sfp1')
+        assert not is_module_present('sfp2')
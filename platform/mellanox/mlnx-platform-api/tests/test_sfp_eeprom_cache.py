@@ -0,0 +1,85 @@
+import os
+import sys
+from mock import MagicMock, patch
+
+test_path = os.path.dirname(os.path.abspath(__file__))
+modules_path = os.path.dirname(test_path)
+sys.path.insert(0, modules_path)
+
+from sonic_platform.sfp_eeprom_cache import SfpEepromCache, EEPROM_PAGE_SIZE
+
+
+class MockEeprom(object):
+    def __init__(self, size):
+        self.data = ['{:02x}'.format(i % 256) for i in range(size)]
+        self.reads = []
+
+    def read(self, offset, num_bytes):
+        self.reads.append((offset, num_bytes))
+        if offset + num_bytes > len(self.data):
+            return None
+        return self.data[offset : offset + num_bytes]
+
+
+def test_read_whole_block_once():
+    eeprom = MockEeprom(512)
+    cache = SfpEepromCache(eeprom.read)
+
+    assert cache.read(20, 16) == eeprom.data[20:36]
+    assert cache.read(148, 16) == eeprom.data[148:164]
+    assert cache.read(120, 16) == eeprom.data[120:136]
+    assert eeprom.reads == [(0, 2 * EEPROM_PAGE_SIZE)]
+
+
+def test_volatile_page_expires():
+    eeprom = MockEeprom(256)
+    cache = SfpEepromCache(eeprom.read, volatile_pages=(0,), ttl=1)
+
+    with patch('sonic_platform.sfp_eeprom_cache.time.time', MagicMock(return_value=100)):
+        cache.read(22, 2)
+        cache.read(130, 2)
+    assert len(eeprom.reads) == 1
+
+    eeprom.data[22] = 'ff'
+    with patch('sonic_platform.sfp_eeprom_cache.time.time', MagicMock(return_value=102)):
+        assert cache.read(130, 2) == eeprom.data[130:132]
+        assert len(eeprom.reads) == 1
+        assert cache.read(22, 1) == ['ff']
+    assert len(eeprom.reads) == 2
+
+
+def test_invalidate():
+    eeprom = MockEeprom(256)
+    cache = SfpEepromCache(eeprom.read)
+
+    cache.read(128, 1)
+    eeprom.data[128] = '11'
+    assert cache.read(128, 1) == ['80']
+    cache.invalidate()
+    assert cache.read(128, 1) == ['11']
+
+
+def test_fall_back_to_missing_pages_and_raw_read():
+    # Only the lower page and upper page 0 and 1 are implemented
+    eeprom = MockEeprom(3 * EEPROM_PAGE_SIZE)
+    cache = SfpEepromCache(eeprom.read)
+
+    assert cache.read(256 + 10, 4) == eeprom.data[266:270]
+    assert eeprom.reads == [(256, 256), (256, 128)]
+
+    eeprom.reads = []
+    assert cache.read(512, 4) is None
+    assert eeprom.reads == [(512, 256), (512, 128), (512, 4)]
+
+    # The unsupported pages are not tried again
+    eeprom.reads = []
+    assert cache.read(512, 4) is None
+    assert cache.read(600, 2) is None
+    assert eeprom.reads == [(512, 4), (600, 2)]
+
+    # until the module is replaced
+    eeprom.data.extend(['00'] * 3 * EEPROM_PAGE_SIZE)
+    cache.invalidate()
+    eeprom.reads = []
+    assert cache.read(512, 4) == ['00'] * 4
+    assert eeprom.reads == [(512, 256)]
@@ -0,0 +1,158 @@
+import os
+import sys
+import imp
+import time
+import threading
+from mock import patch
+
+test_path = os.path.dirname(os.path.abspath(__file__))
+modules_path = os.path.dirname(test_path)
+sys.path.insert(0, modules_path)
+
+plugin_path = os.path.join(modules_path, '..', '..', '..', 'device', 'mellanox',
+                           'x86_64-mlnx_msn2700-r0', 'plugins', 'sfputil.py')
+sfputil = imp.load_source('sfputil', plugin_path)
+
+# PORT_START, QSFP_PORT_START, PORT_END, PORT_IN_BLOCK, EEPROM_OFFSET of the msn2700
+MSN2700_PORTS = (0, 0, 31, 32, 1)
+PORTS = range(1, 33)
+ABSENT_PORTS = (5, 17)
+READ_LATENCY = 0.002
+
+
+def make_qsfp_eeprom(port):
+    """
+    Lower page and upper page 0 of a QSFP28 cable with a serial number of its own
+    """
+    eeprom = [0] * 256
+    def put(offset, value):
+        for i, c in enumerate(value):
+            eeprom[offset + i] = c if isinstance(c, int) else ord(c)
+    put(0, [0x11])
+    put(128, [0x11, 0x00, 0x23, 0x80, 0, 0, 0, 0, 0, 0, 0, 0x05, 0xff, 0, 0, 0, 0, 0, 3])
+    put(148, 'Mellanox        ')
+    put(165, [0x00, 0x02, 0xc9])
+    put(168, 'MCP1600-C003    ')
+    put(184, 'A2')
+    put(196, 'MT19{:02d}VS0{:04d}   '.format(port, port * 7))
+    put(212, '190601  ')
+    return eeprom
+
+
+class FakeEeprom(object):
+    """
+    read_module_eeprom of the modules of all the ports, taking READ_LATENCY per read
+    """
+    def __init__(self):
+        self.eeproms = dict((sfputil.SFP_PORT_NAME_CONVENTION.format(port), make_qsfp_eeprom(port))
+                            for port in PORTS if port not in ABSENT_PORTS)
+        self.reads = []
+        self.lock = threading.Lock()
+
+    def __call__(self, sfpname, offset, num_bytes):
+        time.sleep(READ_LATENCY)
+        with self.lock:
+            self.reads.append((sfpname, offset, num_bytes))
+        eeprom = self.eeproms.get(sfpname)
+        if eeprom is None or offset + num_bytes > len(eeprom):
+            return None
+        return ['{:02x}'.format(byte) for byte in eeprom[offset:offset + num_bytes]]
+
+
+class UncachedEeprom(object):
+    """
+    SfpEepromCache reading every field from the module
+    """
+    def __init__(self, read_func):
+        self.read = read_func
+
+
+class YieldingEepromCache(sfputil.SfpEepromCache):
+    """
+    SfpEepromCache letting the other threads run once created, before the call
+    which created it registers it
+    """
+    def __init__(self, read_func):
+        super(YieldingEepromCache, self).__init__(read_func)
+        time.sleep(0.001)
+
+
+class TestSfpUtilPlugin(object):
+
+    def setup_method(self, method):
+        self.eeprom = FakeEeprom()
+        self.patches = [
+            patch.object(sfputil, 'read_module_eeprom', self.eeprom),
+            patch.object(sfputil.SfpUtil, 'get_port_position_tuple_by_platform_name', return_value=MSN2700_PORTS),
+            patch.object(sfputil, 'log_err'),
+        ]
+        for p in self.patches:
+            p.start()
+        self.sfp = sfputil.SfpUtil()
+
+    def teardown_method(self, method):
+        if self.sfp.worker_pool is not None:
+            self.sfp.worker_pool.terminate()
+        for p in reversed(self.patches):
+            p.stop()
+
+    def get_uncached(self):
+        with patch.object(sfputil, 'SfpEepromCache', UncachedEeprom):
+            return dict((port, self.sfp.get_transceiver_info_dict(port)) for port in PORTS)
+
+    def test_cached(self):
+        expected = self.get_uncached()
+        uncached_reads = len(self.eeprom.reads)
+        assert expected[1]['serial'] == 'MT1901VS00007'
+        assert expected[1]['model'] == 'MCP1600-C003'
+        assert all(expected[port] is None for port in ABSENT_PORTS)
+
+        del self.eeprom.reads[:]
+        assert dict((port, self.sfp.get_transceiver_info_dict(port)) for port in PORTS) == expected
+        # one block read per module
+        assert len(self.eeprom.reads) * 4 < uncached_reads
+        assert self.sfp.get_eeprom_caches() == {}
+
+    def test_bulk(self):
+        expected = self.get_uncached()
+
+        del self.eeprom.reads[:]
+        start = time.time()
+        assert self.sfp.get_transceiver_info_dict_bulk(PORTS) == expected
+        elapsed = time.time() - start
+        # modules read concurrently
+        assert elapsed < len(self.eeprom.reads) * READ_LATENCY / 2
+        assert not sfputil.log_err.called
+
+    def test_concurrent_callers(self):
+        # xcvrd threads and sfputil CLI calls sharing the plugin, as in c54d205
+        expected = self.get_uncached()
+        results = []
+        errors = []
+
+        def bulk():
+            try:
+                for _ in range(3):
+                    results.append(self.sfp.get_transceiver_info_dict_bulk(PORTS))
+            except Exception as e:
+                errors.append(e)
+
+        def per_port():
+            try:
+                for _ in range(3):
+                    results.append(dict((port, self.sfp.get_transceiver_info_dict(port)) for port in PORTS))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=target) for target in (bulk, per_port) * 3]
+        with patch.object(sfputil, 'SfpEepromCache', YieldingEepromCache):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert errors == []
+        assert len(results) == 18
+        assert all(result == expected for result in results)
+        # a module which failed in a worker would be logged and mapped to None
+        assert not sfputil.log_err.called
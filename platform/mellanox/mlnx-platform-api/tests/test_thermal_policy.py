@@ -10,7 +10,7 @@ modules_path = os.path.dirname(test_path)
 sys.path.insert(0, modules_path)
 
 from sonic_platform.thermal_manager import ThermalManager
-from sonic_platform.thermal_infos import FanInfo, PsuInfo
+from sonic_platform.thermal_infos import FanInfo, PsuInfo, ThermalSnapshot
 from sonic_platform.thermal import Thermal
 
 Thermal.check_thermal_zone_temperature = MagicMock()
@@ -100,7 +100,8 @@ def test_fan_policy(thermal_manager):
     Thermal.check_thermal_zone_temperature = MagicMock(return_value=True)
     thermal_manager.run_policy(chassis)
     Thermal.set_thermal_algorithm_status.assert_called_with(True, False)
-    assert Thermal.check_thermal_zone_temperature.call_count == 2
+    # Thermal zone is checked once per cycle even if several actions need it
+    assert Thermal.check_thermal_zone_temperature.call_count == 1
     assert fan_list[0].speed == 60
     assert fan_list[1].speed == 60
 
@@ -112,7 +113,8 @@ def test_fan_policy(thermal_manager):
     Thermal.check_thermal_zone_temperature = MagicMock(return_value=False)
     thermal_manager.run_policy(chassis)
     Thermal.set_thermal_algorithm_status.assert_called_with(True, False)
-    assert Thermal.check_thermal_zone_temperature.call_count == 2
+    # Thermal zone is checked once per cycle even if several actions need it
+    assert Thermal.check_thermal_zone_temperature.call_count == 1
     assert fan_list[0].speed == 100
     assert fan_list[1].speed == 100
 
@@ -133,6 +135,28 @@ def test_psu_policy(thermal_manager):
     Thermal.set_thermal_algorithm_status.assert_called_with(True, False)
 
 
+def test_thermal_snapshot(thermal_manager):
+    chassis = MockChassis()
+    fan = MockFan()
+    fan.get_presence = MagicMock(return_value=True)
+    chassis.fan_list.append(fan)
+    chassis.psu_list.append(MockPsu())
+    thermal_manager.run_policy(chassis)
+    assert fan.get_presence.call_count == 1
+    assert ThermalSnapshot._current is None
+
+    # Out of a cycle the sensors are read on each call
+    ThermalSnapshot.current(chassis).get_fan_presence()
+    ThermalSnapshot.current(chassis).get_fan_presence()
+    assert fan.get_presence.call_count == 3
+
+    snapshot = ThermalSnapshot.begin(chassis)
+    assert ThermalSnapshot.current() is snapshot
+    assert ThermalSnapshot.current(chassis) is snapshot
+    assert ThermalSnapshot.current(MockChassis()) is not snapshot
+    ThermalSnapshot.end()
+
+
 def test_any_fan_absence_condition():
     chassis = MockChassis()
     chassis.make_fan_absence()
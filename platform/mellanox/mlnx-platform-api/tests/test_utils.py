@@ -0,0 +1,122 @@
+import os
+import sys
+import errno
+
+import pytest
+from mock import patch
+
+test_path = os.path.dirname(os.path.abspath(__file__))
+modules_path = os.path.dirname(test_path)
+sys.path.insert(0, modules_path)
+
+from sonic_platform.utils import SysfsReader, SYSFS_READ_SIZE
+
+
+def write(file_path, content):
+    with open(file_path, 'w') as f:
+        f.write(content)
+
+
+def test_sysfs_reader_reuses_fd(tmpdir):
+    file_path = str(tmpdir.join('temp1_input'))
+    write(file_path, '45000\n')
+
+    reader = SysfsReader()
+    assert reader.read(file_path) == '45000\n'
+    fd = reader._fds[file_path]
+
+    # Content rewritten in place is read through the same fd
+    write(file_path, '46000\n')
+    assert reader.read(file_path) == '46000\n'
+    assert reader._fds[file_path] == fd
+
+    write(file_path, 'x' * (SYSFS_READ_SIZE + 1))
+    assert len(reader.read(file_path)) == SYSFS_READ_SIZE + 1
+    reader.close()
+    assert not reader._fds
+
+
+def test_sysfs_reader_missing_file(tmpdir):
+    file_path = str(tmpdir.join('psu1_status'))
+    reader = SysfsReader()
+    with pytest.raises(IOError):
+        reader.read(file_path)
+    assert not reader._fds
+
+    write(file_path, '1')
+    assert reader.read(file_path) == '1'
+
+
+class RemovedDevice(object):
+    """
+    os.read failing with ENODEV on the next read of an fd, as sysfs does once the
+    device of an attribute has been removed
+    """
+    def __init__(self, fd):
+        self.fd = fd
+        self.read = os.read
+        self.failed = False
+
+    def __call__(self, fd, size):
+        if fd == self.fd and not self.failed:
+            self.failed = True
+            raise OSError(errno.ENODEV, os.strerror(errno.ENODEV))
+        return self.read(fd, size)
+
+
+def test_sysfs_reader_no_stat(tmpdir):
+    file_path = str(tmpdir.join('fan1_speed_get'))
+    write(file_path, '6000')
+    reader = SysfsReader()
+    assert reader.read(file_path) == '6000'
+    with patch('os.stat', side_effect=AssertionError('stat')), \
+            patch('os.open', side_effect=AssertionError('open')):
+        assert reader.read(file_path) == '6000'
+
+
+def test_sysfs_reader_removed_device(tmpdir):
+    # hw-management re-creates its symlinks with 'ln -sf' once the device is back
+    target1 = str(tmpdir.join('temp1_input.1'))
+    target2 = str(tmpdir.join('temp1_input.2'))
+    link = str(tmpdir.join('module1_temp_input'))
+    write(target1, '45000')
+    write(target2, '52000')
+    os.symlink(target1, link)
+
+    reader = SysfsReader()
+    assert reader.read(link) == '45000'
+    old_fd = reader._fds[link]
+    os.unlink(link)
+    os.symlink(target2, link)
+    removed = RemovedDevice(old_fd)
+    with patch('os.read', removed):
+        assert reader.read(link) == '52000'
+    assert removed.failed
+    assert reader.read(link) == '52000'
+
+    # Removed for good: the fd isn't kept
+    old_fd = reader._fds[link]
+    os.unlink(link)
+    with patch('os.read', RemovedDevice(old_fd)):
+        with pytest.raises(IOError) as e:
+            reader.read(link)
+    assert e.value.errno == errno.ENOENT
+    assert link not in reader._fds
+
+
+def test_sysfs_reader_max_open_files(tmpdir):
+    paths = [str(tmpdir.join('temp{}_input'.format(i))) for i in range(5)]
+    for path in paths:
+        write(path, '40000')
+
+    reader = SysfsReader(max_open_files=3)
+    for path in paths[:3]:
+        reader.read(path)
+    reader.read(paths[0])
+    reader.read(paths[3])
+    reader.read(paths[4])
+
+    # The least recently read ones are closed
+    assert list(reader._fds) == [paths[0], paths[3], paths[4]]
+    assert reader.read(paths[1]) == '40000'
+    assert len(reader._fds) == 3
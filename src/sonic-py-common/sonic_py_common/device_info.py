@@ -1,4 +1,5 @@
 import glob
+import json
 import os
 import re
 import subprocess
@@ -18,6 +19,14 @@ CONTAINER_PLATFORM_PATH = USR_SHARE_SONIC_PATH + "/platform"
 MACHINE_CONF_PATH = "/host/machine.conf"
 SONIC_VERSION_YAML_PATH = "/etc/sonic/sonic_version.yml"
 
+# Snapshot of the device identity written at boot, readable from the
+# containers too, and the ID of the boot it is valid for
+IDENTITY_SNAPSHOT_PATH = "/etc/sonic/device_identity.json"
+BOOT_ID_PATH = "/proc/sys/kernel/random/boot_id"
+# Facts saved in the snapshot. The HwSKU is not, as it comes from the
+# config DB which may be reloaded with another one.
+IDENTITY_SNAPSHOT_KEYS = ["machine_info", "platform", "num_npus", "system_mac"]
+
 # Port configuration file names
 PORT_CONFIG_FILE = "port_config.ini"
 PLATFORM_JSON_FILE = "platform.json"
@@ -30,6 +39,99 @@ ASIC_CONF_FILENAME = "asic.conf"
 FRONTEND_ASIC_SUB_ROLE = "FrontEnd"
 BACKEND_ASIC_SUB_ROLE = "BackEnd"
 
+# Facts about the identity of the device, which don't change while it is
+# up, resolved once per process: key -> value
+_identity_cache = {}
+_identity_snapshot_loaded = False
+
+
+def _get_boot_id():
+    try:
+        with open(BOOT_ID_PATH) as boot_id_file:
+            return boot_id_file.read().strip()
+    except (IOError, OSError):
+        return None
+
+
+def _load_identity_snapshot():
+    """
+    Fills the identity cache from the snapshot, if it was written during
+    the current boot
+    """
+    global _identity_snapshot_loaded
+
+    if _identity_snapshot_loaded:
+        return
+    _identity_snapshot_loaded = True
+
+    if not os.path.isfile(IDENTITY_SNAPSHOT_PATH):
+        return
+    try:
+        with open(IDENTITY_SNAPSHOT_PATH) as snapshot_file:
+            snapshot = json.load(snapshot_file)
+    except (IOError, OSError, ValueError):
+        return
+
+    boot_id = snapshot.get("boot_id")
+    if not boot_id or boot_id != _get_boot_id():
+        return
+    for key in IDENTITY_SNAPSHOT_KEYS:
+        if snapshot.get(key) is not None:
+            _identity_cache.setdefault(key, snapshot[key])
+
+
+def _get_identity(key, resolve):
+    """
+    Returns an identity fact from the cache, or resolve() which is cached
+    unless it is None
+    """
+    _load_identity_snapshot()
+    if key in _identity_cache:
+        return _identity_cache[key]
+
+    value = resolve()
+    if value is not None:
+        _identity_cache[key] = value
+    return value
+
+
+def clear_identity_cache():
+    """
+    Forgets the identity facts resolved, which are resolved again from
+    their sources on the next calls, not from the snapshot
+    """
+    global _identity_snapshot_loaded
+
+    _identity_cache.clear()
+    _identity_snapshot_loaded = True
+
+
+def write_identity_snapshot(path=None):
+    """
+    Resolves the identity facts of the device and saves them, for the
+    processes started later during this boot. Meant to be run at boot.
+
+    Returns:
+        A dictionary of the facts saved
+    """
+    clear_identity_cache()
+    snapshot = {
+        "boot_id": _get_boot_id(),
+        "machine_info": get_machine_info(),
+        "platform": get_platform(),
+        "num_npus": get_num_npus(),
+        "system_mac": get_system_mac(),
+    }
+
+    path = path or IDENTITY_SNAPSHOT_PATH
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as snapshot_file:
+        json.dump(snapshot, snapshot_file, indent=4)
+    # Readers never see a partial snapshot
+    os.rename(tmp_path, path)
+
+    return snapshot
+
 
 def get_localhost_info(field):
     try:
@@ -58,6 +160,14 @@ def get_machine_info():
         A dictionary containing the key/value pairs as found in the machine
         configuration file
     """
+    machine_vars = _get_identity('machine_info', _read_machine_info)
+    if machine_vars is None:
+        return None
+
+    return dict(machine_vars)
+
+
+def _read_machine_info():
     if not os.path.isfile(MACHINE_CONF_PATH):
         return None
 
@@ -87,6 +197,10 @@ def get_platform():
     if platform_env:
         return platform_env
 
+    return _get_identity('platform', _resolve_platform)
+
+
+def _resolve_platform():
     # If 'PLATFORM' env variable is not defined, we try to read the platform
     # identifier from machine.conf. This is critical for sonic-config-engine,
     # because it is responsible for populating this value in Config DB.
@@ -113,7 +227,7 @@ def get_hwsku():
         A string containing the device's hardware SKU identifier
     """
 
-    return get_localhost_info('hwsku')
+    return _get_identity('hwsku', lambda: get_localhost_info('hwsku'))
 
 
 def get_platform_and_hwsku():
@@ -224,6 +338,10 @@ def get_sonic_version_info():
 #
 
 def get_num_npus():
+    return _get_identity('num_npus', _read_num_npus)
+
+
+def _read_num_npus():
     asic_conf_file_path = get_asic_conf_file_path()
     if asic_conf_file_path is None:
         return 1
@@ -254,11 +372,21 @@ def get_namespaces():
     In a multi NPU platform, each NPU is in a Linux Namespace.
     This method returns list of all the Namespace present on the device
     """
+    ns_list = _identity_cache.get('namespaces')
+    if ns_list is not None:
+        return list(ns_list)
+
     ns_list = []
     for path in glob.glob(NAMESPACE_PATH_GLOB):
         ns = os.path.basename(path)
         ns_list.append(ns)
-    return natsorted(ns_list)
+    ns_list = natsorted(ns_list)
+
+    # Cached once the namespaces of all the NPUs are created
+    if len(ns_list) > 1 and len(ns_list) == get_num_npus():
+        _identity_cache['namespaces'] = list(ns_list)
+
+    return ns_list
 
 
 def get_all_namespaces():
@@ -292,6 +420,11 @@ def _valid_mac_address(mac):
 
 
 def get_system_mac(namespace=None):
+    key = 'system_mac' if namespace is None else 'system_mac@' + namespace
+    return _get_identity(key, lambda: _resolve_system_mac(namespace))
+
+
+def _resolve_system_mac(namespace):
     version_info = get_sonic_version_info()
 
     if (version_info['asic_type'] == 'mellanox'):
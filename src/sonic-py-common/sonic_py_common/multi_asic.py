@@ -1,6 +1,8 @@
 import glob
 import os
 import subprocess
+import threading
+import time
 
 from natsort import natsorted
 from swsssdk import ConfigDBConnector
@@ -25,6 +27,16 @@ BGP_INTERNAL_NEIGH_CFG_DB_TABLE = 'BGP_INTERNAL_NEIGHBOR'
 NEIGH_DEVICE_METADATA_CFG_DB_TABLE = 'DEVICE_NEIGHBOR_METADATA'
 DEFAULT_NAMESPACE = ''
 PORT_ROLE = 'role'
+# The cached PORT tables are read again after this many seconds, in case
+# keyspace notifications were missed
+PORT_TABLE_CACHE_REFRESH = 60
+
+# Per-process pool of config DB connections, namespace -> ConfigDBConnector
+_config_db_pool = {}
+# namespace -> _PortTableCache
+_port_table_caches = {}
+_pool_lock = threading.RLock()
+_pool_pid = None
 
 
 def connect_config_db_for_ns(namespace=DEFAULT_NAMESPACE):
@@ -65,6 +77,132 @@ def connect_to_all_dbs_for_ns(namespace=DEFAULT_NAMESPACE):
     return db
 
 
+class _PortTableCache(object):
+    """
+    PORT table of the config DB of a namespace, kept up to date from the
+    keyspace notifications of its entries: the entries notified are read
+    again on the next access, and the whole table every
+    PORT_TABLE_CACHE_REFRESH seconds.
+    """
+
+    def __init__(self, config_db):
+        self.config_db = config_db
+        self.channel_prefix = None
+        self.pubsub = None
+        self.ports = None
+        self.expiry = 0
+
+    def _subscribe(self):
+        db_name = self.config_db.db_name
+        self.channel_prefix = '__keyspace@{}__:{}{}'.format(
+            self.config_db.get_dbid(db_name), PORT_CFG_DB_TABLE,
+            self.config_db.TABLE_NAME_SEPARATOR)
+        pubsub = self.config_db.get_redis_client(db_name).pubsub()
+        pubsub.psubscribe(self.channel_prefix + '*')
+        self.pubsub = pubsub
+
+    def _get_notified_ports(self):
+        ports = set()
+        while True:
+            message = self.pubsub.get_message()
+            if message is None:
+                return ports
+            if message['type'] != 'pmessage':
+                continue
+            channel = message['channel']
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            ports.add(channel[len(self.channel_prefix):])
+
+    def close(self):
+        if self.pubsub is not None:
+            try:
+                self.pubsub.close()
+            except Exception:
+                pass
+        self.pubsub = None
+        self.ports = None
+
+    def get_ports(self):
+        """
+        Returns the PORT table, a dict of port name -> port entry, which
+        must not be modified
+        """
+        try:
+            if self.pubsub is None:
+                # Subscribe before reading the table, not to miss changes
+                self._subscribe()
+                self.ports = None
+
+            if self.ports is None or time.time() >= self.expiry:
+                self._get_notified_ports()
+                self.ports = self.config_db.get_table(PORT_CFG_DB_TABLE)
+                self.expiry = time.time() + PORT_TABLE_CACHE_REFRESH
+            else:
+                for port in self._get_notified_ports():
+                    entry = self.config_db.get_entry(PORT_CFG_DB_TABLE, port)
+                    if entry:
+                        self.ports[port] = entry
+                    else:
+                        self.ports.pop(port, None)
+        except Exception:
+            # Without the subscription, the table can't be trusted
+            self.close()
+            raise
+
+        return self.ports
+
+
+def _check_pool_pid():
+    """
+    Drops the connections inherited from the parent process after a fork
+    """
+    global _pool_pid
+
+    if _pool_pid != os.getpid():
+        _config_db_pool.clear()
+        _port_table_caches.clear()
+        _pool_pid = os.getpid()
+
+
+def get_config_db_for_ns(namespace=DEFAULT_NAMESPACE):
+    """
+    Returns a connection to the config DB of a namespace from the pool of
+    the process, connecting on first use. It is shared with the other
+    callers, so it must not be used to subscribe or change its settings;
+    use connect_config_db_for_ns() for a connection of one's own.
+    """
+    with _pool_lock:
+        _check_pool_pid()
+        config_db = _config_db_pool.get(namespace)
+        if config_db is None:
+            config_db = connect_config_db_for_ns(namespace)
+            _config_db_pool[namespace] = config_db
+        return config_db
+
+
+def _get_cached_port_table(namespace):
+    with _pool_lock:
+        _check_pool_pid()
+        cache = _port_table_caches.get(namespace)
+        if cache is None:
+            cache = _PortTableCache(get_config_db_for_ns(namespace))
+            _port_table_caches[namespace] = cache
+        return cache.get_ports()
+
+
+def clear_config_db_pool():
+    """
+    Closes the subscriptions of the cached PORT tables and empties the
+    pool of config DB connections
+    """
+    with _pool_lock:
+        for cache in _port_table_caches.values():
+            cache.close()
+        _port_table_caches.clear()
+        _config_db_pool.clear()
+
+
 def get_asic_conf_file_path():
     """
     Retrieves the path to the ASIC conguration file on the device
@@ -231,7 +369,7 @@ def get_all_namespaces():
     if is_multi_asic():
         for asic in range(num_asics):
             namespace = "{}{}".format(ASIC_NAME_PREFIX, asic)
-            config_db = connect_config_db_for_ns(namespace)
+            config_db = get_config_db_for_ns(namespace)
 
             metadata = config_db.get_table('DEVICE_METADATA')
             if metadata['localhost']['sub_role'] == FRONTEND_ASIC_SUB_ROLE:
@@ -293,16 +431,14 @@ def get_port_table(namespace=None):
 
 def get_port_entry_for_asic(port, namespace):
 
-    config_db = connect_config_db_for_ns(namespace)
-    ports = config_db.get_entry(PORT_CFG_DB_TABLE, port)
-    return ports
+    ports = _get_cached_port_table(namespace)
+    return dict(ports.get(port, {}))
 
 
 def get_port_table_for_asic(namespace):
 
-    config_db = connect_config_db_for_ns(namespace)
-    ports = config_db.get_table(PORT_CFG_DB_TABLE)
-    return ports
+    ports = _get_cached_port_table(namespace)
+    return dict((port, dict(entry)) for port, entry in ports.items())
 
 
 def get_namespace_for_port(port_name):
@@ -311,7 +447,7 @@ def get_namespace_for_port(port_name):
     port_namespace = None
 
     for ns in ns_list:
-        ports = get_port_table_for_asic(ns)
+        ports = _get_cached_port_table(ns)
         if port_name in ports:
             port_namespace = ns
             break
@@ -347,7 +483,9 @@ def is_port_internal(port_name, namespace=None):
 
 def get_external_ports(port_names, namespace=None):
     external_ports = set()
-    ports_config = get_port_table(namespace)
+    ports_config = {}
+    for ns in get_namespace_list(namespace):
+        ports_config.update(_get_cached_port_table(ns))
     for port in port_names:
         if port in ports_config:
             if (PORT_ROLE not in ports_config[port] or
@@ -364,7 +502,7 @@ def is_port_channel_internal(port_channel, namespace=None):
     ns_list = get_namespace_list(namespace)
 
     for ns in ns_list:
-        config_db = connect_config_db_for_ns(ns)
+        config_db = get_config_db_for_ns(ns)
         port_channels = config_db.get_entry(PORT_CHANNEL_CFG_DB_TABLE, port_channel)
 
         if port_channels:
@@ -382,15 +520,15 @@ def get_back_end_interface_set(namespace=None):
     if not is_multi_asic():
         return None
 
-    port_table = get_port_table(namespace)
-    for port, info in port_table.items():
-        if PORT_ROLE in info and info[PORT_ROLE] == INTERNAL_PORT:
-            bk_end_intf_list.append(port)
+    ns_list = get_namespace_list(namespace)
+    for ns in ns_list:
+        for port, info in _get_cached_port_table(ns).items():
+            if PORT_ROLE in info and info[PORT_ROLE] == INTERNAL_PORT:
+                bk_end_intf_list.append(port)
 
     if len(bk_end_intf_list):
-        ns_list = get_namespace_list(namespace)
         for ns in ns_list:
-            config_db = connect_config_db_for_ns(ns)
+            config_db = get_config_db_for_ns(ns)
             port_channels = config_db.get_table(PORT_CHANNEL_CFG_DB_TABLE)
             # a back-end LAG must be configured with all of its member from back-end interfaces.
             # mixing back-end and front-end interfaces is miss configuration and not allowed.
@@ -412,7 +550,7 @@ def is_bgp_session_internal(bgp_neigh_ip, namespace=None):
 
     for ns in ns_list:
 
-        config_db = connect_config_db_for_ns(ns)
+        config_db = get_config_db_for_ns(ns)
         bgp_sessions = config_db.get_entry(BGP_INTERNAL_NEIGH_CFG_DB_TABLE, bgp_neigh_ip)
         if bgp_sessions:
             return True
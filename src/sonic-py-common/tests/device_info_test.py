@@ -0,0 +1,171 @@
+import json
+import os
+import shutil
+import tempfile
+
+import mock
+
+from sonic_py_common import device_info
+
+MACHINE_CONF = """\
+onie_version=2016.11-5.1.0008-9600
+onie_platform=x86_64-mlnx_msn2700-r0
+onie_machine=mlnx_msn2700
+onie_arch=x86_64
+onie_base_mac=e4:1d:2d:44:5e:80
+"""
+
+SONIC_VERSION = """\
+build_version: 'master.0-dirty'
+asic_type: mellanox
+"""
+
+
+class FakeConfigDBConnector(object):
+    connects = 0
+
+    def __init__(self, **kwargs):
+        pass
+
+    def connect(self):
+        FakeConfigDBConnector.connects += 1
+
+    def get_table(self, table):
+        return {'localhost': {'hwsku': 'ACS-MSN2700',
+                              'platform': 'x86_64-mlnx_msn2700-r0'}}
+
+
+class FakePopen(object):
+    calls = 0
+
+    def __init__(self, cmd, **kwargs):
+        FakePopen.calls += 1
+
+    def communicate(self):
+        return "e4:1d:2d:44:5e:81\n", ""
+
+
+class TestDeviceInfo(object):
+    def setup_method(self, method):
+        # Fake filesystem root
+        self.root = tempfile.mkdtemp()
+        for path, content in [('host/machine.conf', MACHINE_CONF),
+                              ('etc/sonic/sonic_version.yml', SONIC_VERSION),
+                              ('proc/boot_id', 'b0071d\n')]:
+            path = os.path.join(self.root, path)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'w') as f:
+                f.write(content)
+
+        FakeConfigDBConnector.connects = 0
+        FakePopen.calls = 0
+        self.opened = []
+
+        def counting_open(path, *args, **kwargs):
+            self.opened.append(os.path.relpath(path, self.root))
+            return open(path, *args, **kwargs)
+
+        self.patches = [
+            mock.patch.object(device_info, 'MACHINE_CONF_PATH',
+                              os.path.join(self.root, 'host/machine.conf')),
+            mock.patch.object(device_info, 'SONIC_VERSION_YAML_PATH',
+                              os.path.join(self.root, 'etc/sonic/sonic_version.yml')),
+            mock.patch.object(device_info, 'IDENTITY_SNAPSHOT_PATH',
+                              os.path.join(self.root, 'etc/sonic/device_identity.json')),
+            mock.patch.object(device_info, 'BOOT_ID_PATH',
+                              os.path.join(self.root, 'proc/boot_id')),
+            mock.patch.object(device_info, 'CONTAINER_PLATFORM_PATH',
+                              os.path.join(self.root, 'usr/share/sonic/platform')),
+            mock.patch.object(device_info, 'HOST_DEVICE_PATH',
+                              os.path.join(self.root, 'usr/share/sonic/device')),
+            mock.patch.object(device_info, 'ConfigDBConnector', FakeConfigDBConnector),
+            mock.patch.object(device_info.subprocess, 'Popen', FakePopen),
+            mock.patch.object(device_info, 'open', counting_open, create=True),
+            mock.patch.dict(os.environ),
+        ]
+        for patch in self.patches:
+            patch.start()
+        os.environ.pop('PLATFORM', None)
+        self.new_process()
+
+    def teardown_method(self, method):
+        for patch in reversed(self.patches):
+            patch.stop()
+        device_info._identity_cache.clear()
+        device_info._identity_snapshot_loaded = False
+        shutil.rmtree(self.root)
+
+    def new_process(self):
+        device_info._identity_cache.clear()
+        device_info._identity_snapshot_loaded = False
+        del self.opened[:]
+
+    def test_resolved_once(self):
+        for _ in range(10):
+            assert device_info.get_platform() == 'x86_64-mlnx_msn2700-r0'
+            assert device_info.get_hwsku() == 'ACS-MSN2700'
+            assert device_info.get_machine_info()['onie_machine'] == 'mlnx_msn2700'
+            assert device_info.get_num_npus() == 1
+            # Mellanox: from onie_base_mac of machine.conf
+            assert device_info.get_system_mac() == 'e4:1d:2d:44:5e:80'
+
+        assert self.opened.count('host/machine.conf') == 1
+        assert self.opened.count('etc/sonic/sonic_version.yml') == 1
+        assert FakeConfigDBConnector.connects == 1
+        assert FakePopen.calls == 0
+
+    def test_platform_env(self):
+        os.environ['PLATFORM'] = 'x86_64-kvm_x86_64-r0'
+        assert device_info.get_platform() == 'x86_64-kvm_x86_64-r0'
+        assert self.opened == []
+
+    def test_machine_info_copy(self):
+        device_info.get_machine_info()['onie_platform'] = 'changed'
+        assert device_info.get_machine_info()['onie_platform'] == 'x86_64-mlnx_msn2700-r0'
+
+    def test_clear_identity_cache(self):
+        device_info.get_hwsku()
+        device_info.clear_identity_cache()
+        device_info.get_hwsku()
+
+        assert FakeConfigDBConnector.connects == 2
+
+    def test_mac_from_command(self):
+        with open(device_info.MACHINE_CONF_PATH, 'w') as f:
+            f.write(MACHINE_CONF.replace('onie_base_mac', 'onie_other_mac'))
+
+        for _ in range(5):
+            assert device_info.get_system_mac() == 'e4:1d:2d:44:5e:81'
+        assert FakePopen.calls == 1
+
+    def test_snapshot(self):
+        with open(device_info.MACHINE_CONF_PATH, 'w') as f:
+            f.write(MACHINE_CONF.replace('onie_base_mac', 'onie_other_mac'))
+
+        snapshot = device_info.write_identity_snapshot()
+        assert snapshot['platform'] == 'x86_64-mlnx_msn2700-r0'
+        assert snapshot['system_mac'] == 'e4:1d:2d:44:5e:81'
+        assert 'hwsku' not in snapshot
+        assert FakePopen.calls == 1
+
+        # Another process of the same boot
+        self.new_process()
+        assert device_info.get_platform() == 'x86_64-mlnx_msn2700-r0'
+        assert device_info.get_system_mac() == 'e4:1d:2d:44:5e:81'
+        assert device_info.get_machine_info()['onie_machine'] == 'mlnx_msn2700'
+        assert device_info.get_num_npus() == 1
+        assert sorted(self.opened) == ['etc/sonic/device_identity.json', 'proc/boot_id']
+        assert FakePopen.calls == 1
+
+    def test_snapshot_of_previous_boot(self):
+        device_info.write_identity_snapshot()
+        with open(device_info.BOOT_ID_PATH, 'w') as f:
+            f.write('n3w\n')
+
+        self.new_process()
+        device_info.get_platform()
+        assert 'host/machine.conf' in self.opened
+
+        with open(device_info.IDENTITY_SNAPSHOT_PATH) as f:
+            assert json.load(f)['boot_id'] == 'b0071d'
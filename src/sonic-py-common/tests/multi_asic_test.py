@@ -0,0 +1,155 @@
+import mock
+
+from sonic_py_common import multi_asic
+
+
+class FakePubSub(object):
+    def __init__(self, db):
+        self.db = db
+        self.messages = []
+        self.patterns = []
+
+    def psubscribe(self, *patterns):
+        self.patterns.extend(patterns)
+        self.db.pubsubs.append(self)
+
+    def get_message(self):
+        if self.messages:
+            return self.messages.pop(0)
+        return None
+
+    def close(self):
+        self.db.pubsubs.remove(self)
+
+
+class FakeRedis(object):
+    def __init__(self, db):
+        self.db = db
+
+    def pubsub(self):
+        return FakePubSub(self.db)
+
+
+class FakeConfigDBConnector(object):
+    """
+    Config DB of a namespace, its tables shared by the connections to it
+    """
+    TABLE_NAME_SEPARATOR = '|'
+    tables = {}
+    pubsubs = []
+    connects = 0
+    reads = 0
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self.db_name = 'CONFIG_DB'
+
+    def connect(self):
+        FakeConfigDBConnector.connects += 1
+
+    def get_dbid(self, db_name):
+        return 4
+
+    def get_redis_client(self, db_name):
+        return FakeRedis(self)
+
+    def get_table(self, table):
+        FakeConfigDBConnector.reads += 1
+        entries = self.tables[self.namespace].get(table, {})
+        return dict((key, dict(entry)) for key, entry in entries.items())
+
+    def get_entry(self, table, key):
+        FakeConfigDBConnector.reads += 1
+        return dict(self.tables[self.namespace].get(table, {}).get(key, {}))
+
+    @classmethod
+    def set_entry(cls, namespace, table, key, entry):
+        if entry:
+            cls.tables[namespace].setdefault(table, {})[key] = entry
+        else:
+            cls.tables[namespace].get(table, {}).pop(key, None)
+        for pubsub in cls.pubsubs:
+            if pubsub.db.namespace == namespace:
+                pubsub.messages.append({
+                    'type': 'pmessage',
+                    'channel': '__keyspace@4__:{}|{}'.format(table, key),
+                    'data': 'hset'})
+
+
+class TestMultiAsic(object):
+    def setup_method(self, method):
+        FakeConfigDBConnector.tables = {
+            'asic0': {'PORT': {'Ethernet0': {'role': 'Ext'},
+                               'Ethernet4': {'lanes': '4'}}},
+            'asic1': {'PORT': {'Ethernet-BP0': {'role': 'Int'},
+                               'Ethernet8': {'role': 'Ext'}},
+                      'PORTCHANNEL': {'PortChannel4001': {'members': ['Ethernet-BP0']}}},
+        }
+        FakeConfigDBConnector.pubsubs = []
+        FakeConfigDBConnector.connects = 0
+        FakeConfigDBConnector.reads = 0
+        multi_asic.clear_config_db_pool()
+
+        self.patches = [
+            mock.patch.object(multi_asic, 'ConfigDBConnector', FakeConfigDBConnector),
+            mock.patch.object(multi_asic, 'SonicDBConfig'),
+            mock.patch.object(multi_asic, 'is_multi_asic', return_value=True),
+            mock.patch.object(multi_asic, 'get_namespaces_from_linux',
+                              return_value=['asic0', 'asic1']),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def teardown_method(self, method):
+        multi_asic.clear_config_db_pool()
+        for patch in self.patches:
+            patch.stop()
+
+    def test_port_queries(self):
+        assert multi_asic.get_namespace_for_port('Ethernet8') == 'asic1'
+        assert multi_asic.get_port_role('Ethernet4') == multi_asic.EXTERNAL_PORT
+        assert multi_asic.is_port_internal('Ethernet-BP0')
+        assert not multi_asic.is_port_internal('Ethernet0', 'asic0')
+        assert multi_asic.get_external_ports(['Ethernet0', 'Ethernet-BP0', 'Ethernet8']) == \
+            set(['Ethernet0', 'Ethernet8'])
+        assert multi_asic.get_back_end_interface_set() == \
+            set(['Ethernet-BP0', 'PortChannel4001'])
+        assert sorted(multi_asic.get_port_table()) == \
+            ['Ethernet-BP0', 'Ethernet0', 'Ethernet4', 'Ethernet8']
+
+    def test_connections_pooled(self):
+        for _ in range(10):
+            for port in ['Ethernet0', 'Ethernet4', 'Ethernet8', 'Ethernet-BP0']:
+                multi_asic.get_namespace_for_port(port)
+                multi_asic.is_port_internal(port)
+            multi_asic.get_external_ports(['Ethernet0', 'Ethernet8'])
+
+        # one connection and one read of the PORT table per namespace
+        assert FakeConfigDBConnector.connects == 2
+        assert FakeConfigDBConnector.reads == 2
+
+    def test_port_table_updated(self):
+        assert not multi_asic.is_port_internal('Ethernet4')
+        multi_asic.get_port_table()
+        reads = FakeConfigDBConnector.reads
+
+        FakeConfigDBConnector.set_entry('asic0', 'PORT', 'Ethernet4', {'role': 'Int'})
+        FakeConfigDBConnector.set_entry('asic0', 'PORT', 'Ethernet12', {'role': 'Ext'})
+        FakeConfigDBConnector.set_entry('asic0', 'PORT', 'Ethernet0', None)
+
+        assert multi_asic.is_port_internal('Ethernet4')
+        assert multi_asic.get_namespace_for_port('Ethernet12') == 'asic0'
+        try:
+            multi_asic.get_namespace_for_port('Ethernet0')
+            assert False
+        except ValueError:
+            pass
+        # only the entries changed are read again
+        assert FakeConfigDBConnector.reads == reads + 3
+
+    def test_returned_tables_not_shared(self):
+        multi_asic.get_port_table('asic0')['Ethernet0']['role'] = 'Int'
+        multi_asic.get_port_entry('Ethernet4', 'asic0')['role'] = 'Int'
+
+        assert not multi_asic.is_port_internal('Ethernet0')
+        assert not multi_asic.is_port_internal('Ethernet4')